@@ -0,0 +1,516 @@
+"""
+API Request Handlers
+
+Framework-independent request handling shared by the Flask app (app.py) and
+the ASGI app (asgi_app.py), so both serve the same routes and payloads.
+Each handler takes the analyzer and the parsed JSON body and returns a
+(payload, status_code) tuple.
+"""
+
+import json
+import logging
+import traceback
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from personality_analyzer.matching import MAX_TOP_K
+from personality_analyzer.metrics import REGISTRY, Family, stats_families
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[Dict[str, Any], int]
+
+# Server-sent events headers; proxies must not buffer or transform the stream
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no"
+}
+
+def error_response(message: str, status: int) -> Response:
+    """Build an error payload"""
+    return {
+        "error": message,
+        "status": "error"
+    }, status
+
+def no_match_error(analysis: Dict[str, Any]) -> Optional[Response]:
+    """Error response for an analysis that found no character because none are loaded, or None"""
+    if "matched_character" in analysis and analysis["matched_character"] is None:
+        return error_response("No characters available to match against", 503)
+    return None
+
+def top_k_error(top_k: Any) -> Optional[str]:
+    """Validation error for an optional top_k request field, or None if it is usable"""
+    if top_k is None:
+        return None
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        return "'top_k' must be a positive integer"
+    if top_k > MAX_TOP_K:
+        return f"'top_k' is too large: {top_k} (maximum {MAX_TOP_K})"
+    return None
+
+def handle_health(analyzer) -> Response:
+    """Health check"""
+    return {
+        "status": "healthy",
+        "service": "Elliot Personality Analyzer API",
+        "analyzer_status": "ready" if analyzer else "failed"
+    }, 200
+
+def metric_families(analyzer) -> List[Family]:
+    """Analyzer, batching and chat history stats as scrape-time metrics"""
+    from personality_analyzer.chat_history import get_history_manager
+
+    families = stats_families("elliot_chat_history", "Chat history windowing",
+                              get_history_manager().get_stats(),
+                              counters=("windows", "summarized_windows", "messages_condensed",
+                                        "messages_reused", "hits", "misses", "evictions"))
+    if analyzer is None:
+        return families
+
+    families += stats_families("elliot_result_cache", "Analysis result cache", analyzer.get_cache_stats(),
+                               counters=("hits", "misses", "evictions"))
+    families += stats_families("elliot_single_flight", "Analysis request coalescing",
+                               analyzer.get_single_flight_stats(), counters=("executions", "coalesced"))
+    families += stats_families("elliot_conversation_cache", "Conversation feature cache",
+                               analyzer.get_conversation_stats(),
+                               counters=("messages_computed", "messages_reused"))
+    families += stats_families("elliot_character_registry", "Character registry",
+                               analyzer.character_registry.get_stats(),
+                               counters=("reloads", "reload_failures"))
+    batching = analyzer.get_batching_stats()
+    if batching is not None:
+        families += stats_families("elliot_micro_batching", "Micro-batching scheduler", batching,
+                                   counters=("requests", "batches"))
+    return families
+
+def handle_metrics(analyzer) -> Tuple[str, int]:
+    """
+    Prometheus metrics: stage, route and Claude call latency histograms,
+    per-route error counts, and cache and batching stats
+    Returns: (text exposition body, status); serve it as METRICS_MEDIA_TYPE
+    """
+    return REGISTRY.render(metric_families(analyzer)), 200
+
+def handle_analyze(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Main endpoint for personality analysis from terminal input
+    Accepts: text, mode, context (and optional session_id) from the Elliot terminal
+    Returns: personality analysis and avatar recommendations
+    """
+    if analyzer is None:
+        return error_response("Personality analyzer not initialized. Check server logs.", 500)
+
+    try:
+        # Validate input
+        if not data or 'text' not in data:
+            return error_response("Missing 'text' field in request", 400)
+
+        user_text = data.get('text', '')
+        mode = data.get('mode', 'general')  # quest, conversation, jd
+        context = data.get('context', [])  # conversation history
+        session_id = data.get('session_id')  # lets conversation turns reuse per-message work
+
+        if not user_text.strip():
+            return error_response("Text input cannot be empty", 400)
+
+        logger.info(f"Analyzing text in {mode} mode: {user_text[:100]}...")
+
+        # Perform personality analysis
+        personality_scores, explanation, avatar_data = analyzer.analyze_text(
+            text=user_text,
+            mode=mode,
+            context=context,
+            session_id=session_id
+        )
+
+        return {
+            "status": "success",
+            "personality_scores": personality_scores,
+            "explanation": explanation,
+            "avatar_data": avatar_data,
+            "analysis_mode": mode,
+            "text_length": len(user_text)
+        }, 200
+
+    except Exception as e:
+        logger.error(f"Error in analyze_text: {e}")
+        logger.error(traceback.format_exc())
+        return error_response(f"Analysis failed: {str(e)}", 500)
+
+def handle_analyze_batch(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Batch endpoint for backend jobs (candidate essays, JD libraries)
+    Accepts: texts (list of strings), mode
+    Returns: one analysis or error per text, in input order
+    """
+    if analyzer is None:
+        return error_response("Personality analyzer not initialized. Check server logs.", 500)
+
+    try:
+        # Validate input
+        if not data or not isinstance(data.get('texts'), list):
+            return error_response("Missing 'texts' list in request", 400)
+
+        texts = data['texts']
+        mode = data.get('mode', 'general')  # quest, conversation, jd
+
+        if not texts:
+            return error_response("Texts list cannot be empty", 400)
+
+        if len(texts) > analyzer.max_batch_items:
+            return error_response(f"Too many texts: {len(texts)} (maximum {analyzer.max_batch_items})", 400)
+
+        logger.info(f"Analyzing batch of {len(texts)} texts in {mode} mode")
+
+        results = analyzer.analyze_batch(texts, mode=mode)
+
+        return {
+            "status": "success",
+            "results": results,
+            "analysis_mode": mode,
+            "count": len(results),
+            "error_count": sum(1 for result in results if result["status"] == "error")
+        }, 200
+
+    except Exception as e:
+        logger.error(f"Error in analyze_batch: {e}")
+        logger.error(traceback.format_exc())
+        return error_response(f"Batch analysis failed: {str(e)}", 500)
+
+def handle_quest(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Specific endpoint for quest mode analysis
+    Processes all 4 quest responses together for comprehensive analysis
+    """
+    if analyzer is None:
+        return error_response("Personality analyzer not initialized", 500)
+
+    try:
+        if not data or 'responses' not in data:
+            return error_response("Missing 'responses' field in request", 400)
+
+        responses = data.get('responses', [])
+        user_name = data.get('user_name', 'User')
+
+        if len(responses) < 4:
+            return error_response("Quest mode requires all 4 responses", 400)
+
+        logger.info(f"Analyzing quest responses for {user_name}")
+
+        # Process quest responses
+        combined_analysis = analyzer.analyze_quest_responses(responses, user_name)
+
+        return {
+            "status": "success",
+            "analysis": combined_analysis,
+            "user_name": user_name,
+            "response_count": len(responses)
+        }, 200
+
+    except Exception as e:
+        logger.error(f"Error in analyze_quest: {e}")
+        return error_response(f"Quest analysis failed: {str(e)}", 500)
+
+def handle_generate_avatar(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Generate avatar based on personality analysis
+    """
+    if analyzer is None:
+        return error_response("Personality analyzer not initialized", 500)
+
+    try:
+        personality_scores = data.get('personality_scores', {})
+        user_context = data.get('user_context', {})
+
+        logger.info("Generating avatar from personality scores")
+
+        # Generate avatar
+        avatar_data = analyzer.generate_avatar_from_scores(personality_scores, user_context)
+
+        return {
+            "status": "success",
+            "avatar": avatar_data
+        }, 200
+
+    except Exception as e:
+        logger.error(f"Error in generate_avatar: {e}")
+        return error_response(f"Avatar generation failed: {str(e)}", 500)
+
+def handle_analyze_traits(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Analyze personality from UI trait selections and find matching character
+    """
+    try:
+        if not data or 'traits' not in data:
+            return error_response("Missing 'traits' field in request", 400)
+
+        selected_traits = data.get('traits', {})
+        user_name = data.get('user_name', 'User')
+        top_k = data.get('top_k')
+
+        invalid = top_k_error(top_k)
+        if invalid:
+            return error_response(invalid, 400)
+
+        logger.info(f"Analyzing UI traits for {user_name}: {list(selected_traits.keys())}")
+
+        # Use mock analysis if analyzer isn't available, otherwise use real analysis
+        if analyzer is None:
+            # Simple mock analysis based on traits
+            from personality_analyzer.utils import map_ui_traits_to_big_five
+            from personality_analyzer.matching import get_character_matcher
+
+            user_big_five = map_ui_traits_to_big_five(selected_traits)
+
+            analysis = {
+                "status": "success",
+                "analysis_type": "ui_traits_mock",
+                "user_name": user_name,
+                "selected_traits": selected_traits,
+                "big_five_scores": user_big_five,
+                **get_character_matcher().match_report(user_big_five, top_k),
+                "completion_status": "complete",
+                "note": "Using trait-based analysis (model not available)"
+            }
+        else:
+            # Use full analyzer
+            analysis = analyzer.analyze_ui_traits(selected_traits, user_name, top_k)
+            analysis["status"] = "success"
+
+        return no_match_error(analysis) or (analysis, 200)
+
+    except Exception as e:
+        logger.error(f"Error in analyze_ui_traits: {e}")
+        logger.error(traceback.format_exc())
+        return error_response(f"Trait analysis failed: {str(e)}", 500)
+
+def handle_characters(analyzer, trait_filter: Optional[str] = None) -> Response:
+    """
+    Get all available AI character profiles
+    Accepts: optional trait filter expression, e.g. "energetic,creative|analytical,!chaotic"
+    (',' is AND, '|' is OR, '!' is NOT)
+    """
+    try:
+        trait_filter = trait_filter or None
+
+        if analyzer:
+            character_data = analyzer.get_all_character_profiles(trait_filter)
+        else:
+            # Fallback to direct import
+            from personality_analyzer.character_data import get_all_characters
+            from personality_analyzer.trait_index import get_trait_index
+            characters = get_all_characters()
+            if trait_filter is not None:
+                characters = {name: characters[name] for name in get_trait_index().select(trait_filter)}
+            character_data = {
+                "characters": characters,
+                "character_count": len(characters),
+                "character_names": list(characters.keys())
+            }
+            if trait_filter is not None:
+                character_data["filter"] = trait_filter
+                character_data["unknown_traits"] = get_trait_index().unknown_traits(trait_filter)
+
+        return {
+            "status": "success",
+            **character_data
+        }, 200
+
+    except ValueError as e:
+        return error_response(f"Invalid trait filter: {str(e)}", 400)
+    except Exception as e:
+        logger.error(f"Error in get_characters: {e}")
+        return error_response(f"Failed to retrieve characters: {str(e)}", 500)
+
+def characters_body(analyzer, trait_filter: Optional[str] = None) -> Optional[bytes]:
+    """
+    The unfiltered /api/characters response of the current character snapshot,
+    serialized when the characters were loaded
+    Returns: JSON body to serve as is, or None to go through handle_characters
+    """
+    if analyzer is None or trait_filter:
+        return None
+    return analyzer.character_registry.snapshot.profiles_json
+
+def handle_match_character(analyzer, data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Find best matching character for given text or traits
+    """
+    try:
+        if not data:
+            return error_response("No data provided", 400)
+
+        # Check if we have text or traits
+        user_text = data.get('text')
+        selected_traits = data.get('traits')
+        mode = data.get('mode', 'general')
+        top_k = data.get('top_k')
+
+        if not user_text and not selected_traits:
+            return error_response("Either 'text' or 'traits' must be provided", 400)
+
+        invalid = top_k_error(top_k)
+        if invalid:
+            return error_response(invalid, 400)
+
+        if analyzer is None:
+            # Use mock analysis for traits only
+            if selected_traits:
+                return handle_analyze_traits(analyzer, data)
+            else:
+                return error_response("Text analysis requires model (not available). Please use trait selection instead.", 503)
+
+        # Use real analyzer
+        if user_text:
+            analysis = analyzer.get_character_match_for_text(user_text, mode, top_k)
+        else:
+            analysis = analyzer.analyze_ui_traits(selected_traits, data.get('user_name', 'User'), top_k)
+
+        analysis["status"] = "success"
+        return no_match_error(analysis) or (analysis, 200)
+
+    except Exception as e:
+        logger.error(f"Error in match_character: {e}")
+        return error_response(f"Character matching failed: {str(e)}", 500)
+
+def parse_chat_request(data: Optional[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[Response]]:
+    """
+    Validate a chat request
+
+    Returns:
+        Tuple of (generate_character_response keyword arguments, error response);
+        exactly one of them is None
+    """
+    if not isinstance(data, dict):
+        return None, error_response("Request body must be a JSON object", 400)
+
+    if 'message' not in data:
+        return None, error_response("Missing 'message' field in request", 400)
+
+    user_message = data.get('message', '')
+
+    if not isinstance(user_message, str):
+        return None, error_response("'message' must be a string", 400)
+
+    if not user_message.strip():
+        return None, error_response("Message cannot be empty", 400)
+
+    return {
+        "user_message": user_message,
+        "character_name": data.get('character_name', 'TheBuilder'),
+        "character_context": data.get('character_context', {}),
+        "conversation_history": data.get('conversation_history', []),
+        "session_id": data.get('session_id')  # lets long chats reuse their history summary
+    }, None
+
+def chat_response(response: Dict[str, Any], character_name: str) -> Response:
+    """Wrap a generated character response"""
+    return {
+        "status": "success",
+        "response": response,
+        "character_name": character_name,
+        "timestamp": response.get("timestamp")
+    }, 200
+
+def chat_error(e: Exception) -> Response:
+    """Log and wrap a chat failure"""
+    logger.error(f"Error in chat_with_character: {e}")
+    logger.error(traceback.format_exc())
+    return error_response(f"Chat failed: {str(e)}", 500)
+
+def handle_chat(data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Chat endpoint for character conversations
+    Accepts: message, character_name, character_context, conversation_history (and optional session_id)
+    Returns: character response
+    """
+    try:
+        kwargs, error = parse_chat_request(data)
+        if error:
+            return error
+
+        logger.info(f"Chat request for {kwargs['character_name']}: {kwargs['user_message'][:100]}...")
+
+        # Import Claude API for character chat
+        from personality_analyzer.claude_chat import generate_character_response
+
+        response = generate_character_response(**kwargs)
+
+        return chat_response(response, kwargs['character_name'])
+
+    except Exception as e:
+        return chat_error(e)
+
+async def handle_chat_async(data: Optional[Dict[str, Any]]) -> Response:
+    """
+    Chat endpoint for character conversations, awaiting the Claude call
+    """
+    try:
+        kwargs, error = parse_chat_request(data)
+        if error:
+            return error
+
+        logger.info(f"Chat request for {kwargs['character_name']}: {kwargs['user_message'][:100]}...")
+
+        from personality_analyzer.claude_chat import generate_character_response_async
+
+        response = await generate_character_response_async(**kwargs)
+
+        return chat_response(response, kwargs['character_name'])
+
+    except Exception as e:
+        return chat_error(e)
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode a stream event as a server-sent event"""
+    return f"data: {json.dumps(event)}\n\n"
+
+def stream_done_event(event: Dict[str, Any], character_name: str) -> Dict[str, Any]:
+    """Give the final stream event the same fields as a /api/chat response"""
+    payload, _ = chat_response(event["response"], character_name)
+    return {"type": "done", **payload}
+
+def handle_chat_stream(data: Optional[Dict[str, Any]]) -> Tuple[Optional[Iterator[str]], Optional[Response]]:
+    """
+    Streaming chat endpoint for character conversations
+    Accepts: same fields as /api/chat
+    Returns: Tuple of (server-sent event stream, error response); exactly one
+    of them is None. The stream sends {"type": "delta", "text": ...} events as
+    Claude generates, then a {"type": "done", ...} event with the /api/chat payload.
+    """
+    kwargs, error = parse_chat_request(data)
+    if error:
+        return None, error
+
+    logger.info(f"Streaming chat request for {kwargs['character_name']}: {kwargs['user_message'][:100]}...")
+
+    from personality_analyzer.claude_chat import stream_character_response
+
+    def events():
+        for event in stream_character_response(**kwargs):
+            if event["type"] == "done":
+                event = stream_done_event(event, kwargs['character_name'])
+            yield format_sse(event)
+
+    return events(), None
+
+def handle_chat_stream_async(data: Optional[Dict[str, Any]]) -> Tuple[Optional[AsyncIterator[str]], Optional[Response]]:
+    """
+    Streaming chat endpoint for character conversations, awaiting the Claude stream
+    """
+    kwargs, error = parse_chat_request(data)
+    if error:
+        return None, error
+
+    logger.info(f"Streaming chat request for {kwargs['character_name']}: {kwargs['user_message'][:100]}...")
+
+    from personality_analyzer.claude_chat import stream_character_response_async
+
+    async def events():
+        async for event in stream_character_response_async(**kwargs):
+            if event["type"] == "done":
+                event = stream_done_event(event, kwargs['character_name'])
+            yield format_sse(event)
+
+    return events(), None
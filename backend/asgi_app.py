@@ -0,0 +1,192 @@
+"""
+ASGI Serving Mode for the Elliot Personality Analyzer API
+
+Serves the same routes and payloads as app.py on an event loop. Claude calls
+in /api/chat are awaited instead of blocking a worker, and CPU-bound model
+inference runs in a thread pool, so cheap routes like /api/analyze_traits and
+/api/characters stay responsive while chats and analyses are in flight.
+
+Usage:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5001
+    python asgi_app.py
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.exceptions import HTTPException
+
+from personality_analyzer.analyzer import PersonalityAnalyzer
+# Imported up front: importing anthropic takes over a second and would
+# otherwise block the event loop on the first chat request
+import personality_analyzer.claude_chat  # noqa: F401
+from api_handlers import (
+    error_response, handle_health, handle_analyze, handle_analyze_batch, handle_quest,
+    handle_generate_avatar, handle_analyze_traits, handle_characters, characters_body,
+    handle_match_character, handle_chat_async, handle_chat_stream_async, handle_metrics,
+    SSE_MEDIA_TYPE, SSE_HEADERS
+)
+from personality_analyzer.character_registry import install_reload_signal
+from personality_analyzer.metrics import METRICS_MEDIA_TYPE, observe_request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Threads available for model inference and other CPU-bound analysis
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "4"))
+
+class RequestMetricsMiddleware:
+    """Times each request by route template, through the end of streamed bodies"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            observe_request(scope["method"], getattr(route, "path", "unmatched"), status,
+                            time.perf_counter() - start)
+
+app = FastAPI(title="Elliot Personality Analyzer API")
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(RequestMetricsMiddleware)
+
+# Initialize the personality analyzer
+try:
+    analyzer = PersonalityAnalyzer()
+    logger.info("✅ PersonalityAnalyzer initialized successfully")
+except Exception as e:
+    logger.error(f"❌ Error initializing PersonalityAnalyzer: {e}")
+    analyzer = None
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+def respond(result) -> JSONResponse:
+    """Turn a (payload, status) handler result into an ASGI response"""
+    payload, status = result
+    return JSONResponse(payload, status_code=status)
+
+async def read_json(request: Request):
+    """Parsed JSON body, or None if it is missing or invalid"""
+    try:
+        return await request.json()
+    except Exception:
+        return None
+
+async def run_in_executor(handler, *args):
+    """Run a blocking handler on the inference thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, partial(handler, *args))
+
+def filtered_characters(trait_filter: Optional[str]) -> JSONResponse:
+    """A /api/characters response built by handle_characters, JSON encoding included"""
+    return respond(handle_characters(analyzer, trait_filter))
+
+@app.get('/')
+async def health_check():
+    """Health check endpoint"""
+    return respond(handle_health(analyzer))
+
+@app.post('/api/analyze')
+async def analyze_text(request: Request):
+    """Main endpoint for personality analysis from terminal input"""
+    return respond(await run_in_executor(handle_analyze, analyzer, await read_json(request)))
+
+@app.post('/api/analyze_batch')
+async def analyze_batch(request: Request):
+    """Batch endpoint for backend jobs"""
+    return respond(await run_in_executor(handle_analyze_batch, analyzer, await read_json(request)))
+
+@app.post('/api/quest')
+async def analyze_quest(request: Request):
+    """Specific endpoint for quest mode analysis"""
+    return respond(await run_in_executor(handle_quest, analyzer, await read_json(request)))
+
+@app.post('/api/generate_avatar')
+async def generate_avatar(request: Request):
+    """Generate avatar based on personality analysis"""
+    return respond(handle_generate_avatar(analyzer, await read_json(request)))
+
+@app.post('/api/analyze_traits')
+async def analyze_ui_traits(request: Request):
+    """Analyze personality from UI trait selections and find matching character"""
+    return respond(handle_analyze_traits(analyzer, await read_json(request)))
+
+@app.get('/api/characters')
+async def get_characters(request: Request):
+    """Get all available AI character profiles, optionally filtered by ?filter=<trait expression>"""
+    trait_filter = request.query_params.get('filter')
+    body = characters_body(analyzer, trait_filter)
+    if body is not None:
+        return Response(body, media_type="application/json")
+    # Filtering and encoding a large result set takes long enough to stall
+    # every stream on the loop, so both run on the executor
+    return await run_in_executor(filtered_characters, trait_filter)
+
+@app.post('/api/match_character')
+async def match_character(request: Request):
+    """Find best matching character for given text or traits"""
+    # Text matching runs the model, so it goes to the executor like /api/analyze
+    return respond(await run_in_executor(handle_match_character, analyzer, await read_json(request)))
+
+@app.post('/api/chat')
+async def chat_with_character(request: Request):
+    """Chat endpoint for character conversations"""
+    return respond(await handle_chat_async(await read_json(request)))
+
+@app.post('/api/chat/stream')
+async def stream_chat_with_character(request: Request):
+    """Streaming chat endpoint; sends Claude's text as server-sent events"""
+    stream, error = handle_chat_stream_async(await read_json(request))
+    if error:
+        return respond(error)
+    return StreamingResponse(stream, media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+@app.get('/metrics')
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    body, status = handle_metrics(analyzer)
+    return PlainTextResponse(body, status_code=status, media_type=METRICS_MEDIA_TYPE)
+
+@app.exception_handler(HTTPException)
+async def http_error(request: Request, exc: HTTPException):
+    if exc.status_code == 404:
+        return respond(error_response("Endpoint not found", 404))
+    return respond(error_response(str(exc.detail), exc.status_code))
+
+@app.exception_handler(Exception)
+async def internal_error(request: Request, exc: Exception):
+    return respond(error_response("Internal server error", 500))
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("🚀 Starting Elliot Personality Analyzer API (ASGI)...")
+    # SIGHUP reloads the character registry (gunicorn installs it per worker in post_worker_init)
+    install_reload_signal()
+    uvicorn.run(app, host='0.0.0.0', port=5001)
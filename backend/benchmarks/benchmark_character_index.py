@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Character Index Benchmark
+=========================
+
+Query latency against database size for the nearest-neighbour CharacterIndex
+and the CharacterMatcher full scan, from 1k to 300k synthetic characters
+(user-published Els). For each size it reports build time, per-query
+latency of best_match and of match_report with top_k, exact and
+approximate (max_leaves) index queries with how often they find a
+character scoring as high as the exact best match, and the cost of inserting and deleting characters in
+place. Exact index results are checked against the full scan before timing.
+
+Usage:
+    python benchmarks/benchmark_character_index.py
+    python benchmarks/benchmark_character_index.py --sizes 10000 100000 --queries 500 --max_leaves 1 4
+    python benchmarks/benchmark_character_index.py --continuous
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.character_index import CharacterIndex
+from personality_analyzer.matching import CharacterMatcher, CHARACTER_KEYS
+from benchmarks.benchmark_matching import make_characters, make_profiles
+
+def make_continuous_characters(count: int, rng: np.random.Generator) -> dict:
+    """Synthetic characters with real-valued 1-5 scores"""
+    return {f"UserEl{i}": dict(zip(CHARACTER_KEYS, (1 + 4 * rng.random(len(CHARACTER_KEYS))).tolist()))
+            for i in range(count)}
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def microseconds_per_call(fn, items) -> float:
+    _, seconds = timed(lambda: [fn(item) for item in items])
+    return seconds / len(items) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the character nearest-neighbour index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 300000],
+                       help="Character counts")
+    parser.add_argument("--queries", type=int, default=200, help="User profiles matched per size")
+    parser.add_argument("--top_k", type=int, default=5, help="top_k for the match_report timings")
+    parser.add_argument("--max_leaves", type=int, nargs="+", default=[1, 4],
+                       help="Leaf budgets of the approximate indexes")
+    parser.add_argument("--updates", type=int, default=1000, help="Inserts and deletes timed per size")
+    parser.add_argument("--continuous", action="store_true",
+                       help="Real-valued character scores instead of integer 1-5 scores")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    profiles = make_profiles(args.queries, rng)
+    generate = make_continuous_characters if args.continuous else make_characters
+
+    approximate = "".join(f" {f'leaves={leaves} µs':>15} {'recall':>7}" for leaves in args.max_leaves)
+    print(f"{'chars':>7} {'scan build s':>12} {'index build s':>13} {'scan µs':>9} {'index µs':>9} "
+          f"{'scan top-k µs':>13} {'index top-k µs':>14}{approximate} {'insert µs':>9} {'delete µs':>9}")
+
+    for size in args.sizes:
+        characters = generate(size, rng)
+        matcher, scan_build = timed(lambda: CharacterMatcher(characters))
+        index, index_build = timed(lambda: CharacterIndex(characters))
+
+        # Same matches as the full scan, before anything is timed
+        expected = [matcher.best_match(profile) for profile in profiles]
+        assert [match[0] for match in expected] == [index.best_match(profile)[0] for profile in profiles], \
+            "Index matches differ from the full scan"
+
+        scan_us = microseconds_per_call(matcher.best_match, profiles)
+        index_us = microseconds_per_call(index.best_match, profiles)
+        scan_top_us = microseconds_per_call(lambda profile: matcher.match_report(profile, args.top_k), profiles)
+        index_top_us = microseconds_per_call(lambda profile: index.match_report(profile, args.top_k), profiles)
+
+        row = (f"{size:>7} {scan_build:>12.2f} {index_build:>13.2f} {scan_us:>9.1f} {index_us:>9.1f} "
+               f"{scan_top_us:>13.1f} {index_top_us:>14.1f}")
+        for leaves in args.max_leaves:
+            index.max_leaves = leaves
+            matches = [index.best_match(profile) for profile in profiles]
+            # Characters tied with the best match count as found
+            recall = np.mean([found[2] >= best[2] - 1e-12 for found, best in zip(matches, expected)])
+            row += f" {microseconds_per_call(index.best_match, profiles):>15.1f} {recall:>7.3f}"
+        index.max_leaves = None
+
+        added = generate(args.updates, rng)
+        names = [f"Published{i}" for i in range(len(added))]
+        insert_us = microseconds_per_call(lambda item: index.insert(*item), list(zip(names, added.values())))
+        delete_us = microseconds_per_call(index.delete, names)
+        print(f"{row} {insert_us:>9.1f} {delete_us:>9.1f}")
+
+    print(f"\n   scan: CharacterMatcher; index: exact CharacterIndex; top-k: match_report with top_k={args.top_k}; "
+          f"leaves=N: approximate index scanning at most N leaves, recall of the best score")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Character Registry Benchmark
+============================
+
+Cost of loading characters from a registry file and of hot reloading them,
+from the 9 built-in characters up to 100k synthetic ones. For each size it
+reports the time to read and validate the file, to build the snapshot
+(matcher vectors, trait index, serialized listing), the per-request cost of
+serializing the unfiltered /api/characters payload against serving the
+body serialized at load time, and the latency of matches served by another
+thread while the registry reloads (every match must succeed, on the old or
+the new snapshot).
+
+Usage:
+    python benchmarks/benchmark_character_registry.py
+    python benchmarks/benchmark_character_registry.py --sizes 9 10000 --format yaml
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.character_registry import CharacterRegistry, CharacterSnapshot, read_registry, write_registry
+from benchmarks.benchmark_matching import make_characters, make_profiles
+from benchmarks.benchmark_trait_index import make_character_traits
+
+# Listing requests timed per size
+LISTING_REQUESTS = 20
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def match_latencies_during(registry: CharacterRegistry, profiles: list, action) -> np.ndarray:
+    """Per-match latencies (seconds) of a thread matching profiles while action runs"""
+    latencies = []
+    done = threading.Event()
+
+    def serve():
+        i = 0
+        while not done.is_set():
+            start = time.perf_counter()
+            name, _, _ = registry.snapshot.matcher.best_match(profiles[i % len(profiles)])
+            assert name is not None, "Match failed during reload"
+            latencies.append(time.perf_counter() - start)
+            i += 1
+
+    server = threading.Thread(target=serve)
+    server.start()
+    try:
+        action()
+    finally:
+        done.set()
+        server.join()
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark character registry loads and hot reloads")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 1000, 10000, 100000],
+                       help="Character counts")
+    parser.add_argument("--format", choices=["json", "yaml"], default="json", help="Registry file format")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    profiles = make_profiles(200, rng)
+
+    print(f"{'chars':>7} {'read ms':>9} {'build ms':>9} {'dumps µs':>10} {'cached µs':>10} "
+          f"{'idle p99 µs':>12} {'reload p99 µs':>14} {'reload max ms':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"characters_{size}.{args.format}")
+            characters = make_characters(size, rng)
+            character_traits = make_character_traits(size, rng)
+            write_registry(path, characters, character_traits)
+
+            loaded, read_seconds = timed(lambda: read_registry(path))
+            snapshot, build_seconds = timed(lambda: CharacterSnapshot(*loaded))
+            assert json.loads(snapshot.profiles_json)["character_names"] == list(characters)
+
+            _, dumps_seconds = timed(lambda: [json.dumps({"status": "success", **snapshot.profiles}).encode()
+                                              for _ in range(LISTING_REQUESTS)])
+            _, cached_seconds = timed(lambda: [snapshot.profiles_json for _ in range(LISTING_REQUESTS)])
+
+            registry = CharacterRegistry(path)
+            idle = match_latencies_during(registry, profiles, lambda: time.sleep(0.2))
+
+            # Same characters with one score changed, so the reload builds a new snapshot
+            name = next(iter(characters))
+            characters[name] = {**characters[name], "O": 6 - characters[name]["O"]}
+            write_registry(path, characters, character_traits)
+            reloading = match_latencies_during(registry, profiles, lambda: registry.reload())
+            assert registry.reloads == 1 and registry.snapshot.characters[name] == characters[name]
+
+            print(f"{size:>7} {read_seconds * 1000:>9.1f} {build_seconds * 1000:>9.1f} "
+                  f"{dumps_seconds / LISTING_REQUESTS * 1e6:>10.1f} {cached_seconds / LISTING_REQUESTS * 1e6:>10.2f} "
+                  f"{np.percentile(idle, 99) * 1e6:>12.1f} {np.percentile(reloading, 99) * 1e6:>14.1f} "
+                  f"{reloading.max() * 1000:>14.2f}")
+
+    print("\n   dumps: serializing the /api/characters payload per request; cached: the body built at load; "
+          "p99/max: matches served by another thread, idle or during a reload")
+
+if __name__ == "__main__":
+    main()
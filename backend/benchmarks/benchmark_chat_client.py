@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Chat Client Benchmark: Per-call vs Pooled Claude Client
+=======================================================
+
+Sends character chats to the local fake Anthropic API, which waits
+`--handshake_delay` seconds on every new connection to stand in for the
+TCP+TLS handshake to the real API. Compares building a new client per chat
+(the old get_claude_client behaviour) with the shared keep-alive client, both
+sequentially and from concurrent threads, and reports latency percentiles and
+the number of connections opened.
+
+Usage:
+    python benchmarks/benchmark_chat_client.py
+    python benchmarks/benchmark_chat_client.py --chats 200 --concurrency 16 --handshake_delay 0.15
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anthropic
+
+from benchmarks.fake_anthropic import fake_anthropic_env
+from personality_analyzer.claude_chat import _build_chat_request, get_claude_client, CLIENT_MAX_RETRIES
+
+CHAT_ARGS = ("Can you help me plan a side project?", "TheBuilder", {}, [])
+
+def new_client():
+    """A fresh client with its own connection pool, as built before pooling"""
+    return anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"], base_url=os.environ["CLAUDE_BASE_URL"],
+                               max_retries=CLIENT_MAX_RETRIES)
+
+CLIENTS = {
+    "per-call": new_client,
+    "pooled": get_claude_client
+}
+
+def timed_chat(get_client) -> float:
+    """Milliseconds for one chat, including getting the client"""
+    start = time.perf_counter()
+    client = get_client()
+    client.messages.create(**_build_chat_request(*CHAT_ARGS))
+    return (time.perf_counter() - start) * 1000
+
+def run(name: str, chats: int, concurrency: int, args):
+    """Run `chats` chats with `concurrency` threads against a fresh fake API"""
+    with fake_anthropic_env(latency=args.latency, handshake_delay=args.handshake_delay) as server:
+        get_client = CLIENTS[name]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(lambda _: timed_chat(get_client), range(chats)))
+        elapsed = time.perf_counter() - start
+        connections = server.connections
+
+    mean = np.mean(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{name:>9} {concurrency:>6} {chats / elapsed:>8.1f} {mean:>8.1f} {p50:>8.1f} "
+          f"{p95:>8.1f} {p99:>8.1f} {connections:>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call vs pooled Claude clients")
+    parser.add_argument("--chats", type=int, default=100, help="Chats per run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the concurrent runs")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake Claude response time in seconds")
+    parser.add_argument("--handshake_delay", type=float, default=0.1,
+                       help="Seconds per new connection (stands in for TCP+TLS setup)")
+    args = parser.parse_args()
+
+    # Keep request logging out of the results table
+    import logging
+    logging.getLogger("personality_analyzer.claude_chat").setLevel(logging.WARNING)
+
+    print(f"🤖 Fake API: {args.latency * 1000:.0f} ms per chat, "
+          f"{args.handshake_delay * 1000:.0f} ms per new connection; {args.chats} chats per run\n")
+    print(f"{'client':>9} {'thrds':>6} {'chats/s':>8} {'mean ms':>8} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'conns':>6}")
+    for concurrency in (1, args.concurrency):
+        for name in CLIENTS:
+            run(name, args.chats, concurrency, args)
+
+if __name__ == "__main__":
+    main()
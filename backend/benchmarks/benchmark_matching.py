@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Character Matching Benchmark
+============================
+
+Compares the previous find_best_character_match (a Python loop calling
+calculate_similarity per character) with CharacterMatcher, which scores a
+profile against a precomputed character matrix in one product, from the 9
+built-in characters up to 100k synthetic ones. Reports per-query latency for
+single profiles and for profiles scored in batches, and checks that both
+pick the same character for every query before timing. Also times ranking
+the top k matches of a similarity vector with CharacterMatcher.top_indices
+(a partial sort) against a full argsort.
+
+Usage:
+    python benchmarks/benchmark_matching.py
+    python benchmarks/benchmark_matching.py --sizes 9 1000 100000 --queries 200 --batch_size 1024 --top_k 10
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.character_data import get_all_characters
+from personality_analyzer.matching import CharacterMatcher, TRAITS, CHARACTER_KEYS
+from personality_analyzer.utils import calculate_similarity
+
+# Loop calls per size for the previous implementation, to bound its run time
+LEGACY_CALL_BUDGET = 300000
+
+def legacy_best_match(user_profile, all_characters):
+    """find_best_character_match as it was before CharacterMatcher"""
+    best_match_name = None
+    best_match_data = None
+    highest_similarity = -1.0
+    for char_name, char_data in all_characters.items():
+        similarity = calculate_similarity(user_profile, char_data)
+        if similarity > highest_similarity:
+            highest_similarity = similarity
+            best_match_name = char_name
+            best_match_data = char_data
+    return best_match_name, best_match_data, highest_similarity
+
+def make_characters(count: int, rng: np.random.Generator) -> dict:
+    """The built-in characters followed by synthetic ones with random 1-5 scores"""
+    characters = dict(list(get_all_characters().items())[:count])
+    for i in range(len(characters), count):
+        characters[f"UserEl{i}"] = dict(zip(CHARACTER_KEYS, rng.integers(1, 6, len(CHARACTER_KEYS)).tolist()))
+    return characters
+
+def make_profiles(count: int, rng: np.random.Generator) -> list:
+    """Random user profiles on the 0-1 scale"""
+    return [dict(zip(TRAITS, rng.random(len(TRAITS)).tolist())) for _ in range(count)]
+
+def microseconds_per_query(fn, queries: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / queries * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark character matching")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 100, 1000, 10000, 100000],
+                       help="Character counts")
+    parser.add_argument("--queries", type=int, default=100, help="User profiles matched per size")
+    parser.add_argument("--batch_size", type=int, default=256, help="Profiles per batched call")
+    parser.add_argument("--top_k", type=int, default=5, help="Matches ranked by the top-k timings")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    profiles = make_profiles(max(args.queries, args.batch_size), rng)
+
+    print(f"{'chars':>7} {'build ms':>9} {'loop µs':>10} {'matrix µs':>10} {'batch µs':>9} {'speedup':>8} "
+          f"{'top-k µs':>9} {'sort µs':>9}")
+    for size in args.sizes:
+        characters = make_characters(size, rng)
+
+        start = time.perf_counter()
+        matcher = CharacterMatcher(characters)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_queries = max(3, min(args.queries, LEGACY_CALL_BUDGET // size))
+        legacy_profiles = profiles[:legacy_queries]
+        queries = profiles[:args.queries]
+        batch = profiles[:args.batch_size]
+
+        # Same choice for every query, before anything is timed
+        legacy = [legacy_best_match(profile, characters)[0] for profile in legacy_profiles]
+        assert legacy == [matcher.best_match(profile)[0] for profile in legacy_profiles], "Single matches differ"
+        assert legacy == [name for name, _, _ in matcher.best_matches(legacy_profiles)], "Batch matches differ"
+
+        loop_us = microseconds_per_query(
+            lambda: [legacy_best_match(profile, characters) for profile in legacy_profiles], legacy_queries)
+        matrix_us = microseconds_per_query(lambda: [matcher.best_match(profile) for profile in queries], len(queries))
+        batch_us = microseconds_per_query(lambda: matcher.best_matches(batch), len(batch))
+
+        # Ranking only, on precomputed similarity vectors
+        rows = matcher.similarities_batch(queries)
+        full_sort = [np.argsort(-row, kind="stable")[:args.top_k] for row in rows]
+        assert all(np.array_equal(matcher.top_indices(row, args.top_k), expected)
+                   for row, expected in zip(rows, full_sort)), "Top-k differs from full sort"
+        top_k_us = microseconds_per_query(lambda: [matcher.top_indices(row, args.top_k) for row in rows], len(rows))
+        sort_us = microseconds_per_query(
+            lambda: [np.argsort(-row, kind="stable")[:args.top_k] for row in rows], len(rows))
+
+        print(f"{size:>7} {build_ms:>9.1f} {loop_us:>10.1f} {matrix_us:>10.1f} {batch_us:>9.1f} "
+              f"{loop_us / matrix_us:>7.0f}x {top_k_us:>9.1f} {sort_us:>9.1f}")
+
+    print(f"\n   loop: previous per-character loop; matrix: one profile per call; "
+          f"batch: {args.batch_size} profiles per call (µs per profile)")
+    print(f"   top-k: partial sort of one similarity vector for k={args.top_k}; sort: full argsort")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Padding Benchmark for TrainedPersonalityModel
+============================================
+
+Compares single-text prediction latency against input length for the old
+fixed `padding='max_length'` tokenization and the current dynamic,
+length-bucketed padding.
+
+Usage:
+    python benchmarks/benchmark_padding.py --model_path models/
+    python benchmarks/benchmark_padding.py --model_path models/ --runs 50
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.model_loader import TrainedPersonalityModel
+
+SAMPLE_WORDS = ("i love building creative things with my team and i am always "
+                "excited to learn new ideas but sometimes i worry about deadlines").split()
+
+def make_text(num_words: int) -> str:
+    """Build a text with roughly the requested number of words"""
+    words = (SAMPLE_WORDS * (num_words // len(SAMPLE_WORDS) + 1))[:num_words]
+    return " ".join(words)
+
+def time_call(fn, runs: int) -> float:
+    """Median latency of fn() in milliseconds"""
+    fn()  # Warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark padding strategies")
+    parser.add_argument("--model_path", type=str, default="models/",
+                       help="Directory written by PersonalityTrainer.save_model")
+    parser.add_argument("--runs", type=int, default=20,
+                       help="Timed runs per input length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 12, 25, 50, 100, 200, 400],
+                       help="Input lengths in words")
+    args = parser.parse_args()
+
+    model = TrainedPersonalityModel(args.model_path, batching=False)
+    max_length = model.config.get("max_length", 512)
+
+    def fixed_padding(text):
+        encoding = model.tokenizer(text, truncation=True, padding='max_length',
+                                   max_length=max_length, return_tensors='pt')
+        return model._forward(encoding['input_ids'], encoding['attention_mask'])
+
+    print("📊 Latency vs input length (median ms, batch of 1)")
+    print(f"{'words':>7} {'tokens':>7} {'fixed':>10} {'dynamic':>10} {'speedup':>9}")
+
+    for num_words in args.lengths:
+        text = make_text(num_words)
+        tokens = len(model.tokenizer(text, truncation=True, max_length=max_length)['input_ids'])
+
+        before = time_call(lambda: fixed_padding(text), args.runs)
+        after = time_call(lambda: model.predict_batch([text]), args.runs)
+
+        print(f"{num_words:>7} {tokens:>7} {before:>10.2f} {after:>10.2f} {before / after:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
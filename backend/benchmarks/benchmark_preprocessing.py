@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Preprocessing Benchmark
+=======================
+
+Compares preprocess_text throughput per mode for the previous approach (a
+new TextPreprocessor per call, one re.sub per contraction, URL, email,
+boilerplate and JD term pattern, and one pass over the words per word
+list) against the shared engine with precompiled patterns, single-pass
+contraction expansion and lookup-table feature counting. Outputs of both
+are checked for equality before timing.
+
+Usage:
+    python benchmarks/benchmark_preprocessing.py
+    python benchmarks/benchmark_preprocessing.py --repeat 5000
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.preprocessing import (
+    TextPreprocessor, CONTRACTIONS, preprocess_text,
+    FIRST_PERSON_PRONOUNS, SECOND_PERSON_PRONOUNS, THIRD_PERSON_PRONOUNS,
+    POSITIVE_WORDS, NEGATIVE_WORDS, CERTAINTY_WORDS, UNCERTAINTY_WORDS
+)
+
+SAMPLES = {
+    'general': ("Hi! I'm Sam and I can't wait to start. You're going to love it, "
+                "they've said it's great. Email me at sam@example.com or see "
+                "https://example.com/about. I don't think we'll regret it?"),
+    'quest': ("I'm really excited about a new AI project we're building to help "
+              "small businesses! Check www.example.com, I'd love your thoughts."),
+    'jd': ("We are an equal opportunity employer. Responsibilities: lead the team, "
+           "own duties across projects. Qualifications and skills: Python, "
+           "communication abilities. Apply now or send your CV to jobs@example.com. "
+           "Requirements: you'll need 5 years of experience and we won't compromise.")
+}
+
+LEGACY_WORD_LISTS = [
+    ('first_person_ratio', tuple(FIRST_PERSON_PRONOUNS), 'original'),
+    ('second_person_ratio', tuple(SECOND_PERSON_PRONOUNS), 'original'),
+    ('third_person_ratio', tuple(THIRD_PERSON_PRONOUNS), 'original'),
+    ('positive_emotion_ratio', tuple(POSITIVE_WORDS), 'processed'),
+    ('negative_emotion_ratio', tuple(NEGATIVE_WORDS), 'processed'),
+    ('certainty_ratio', tuple(CERTAINTY_WORDS), 'processed'),
+    ('uncertainty_ratio', tuple(UNCERTAINTY_WORDS), 'processed')
+]
+
+
+class LegacyPreprocessor(TextPreprocessor):
+    """The pattern handling and feature extraction used before the shared engine"""
+
+    def preprocess_text(self, text: str, mode: str = 'general'):
+        processed = self._preprocess_for_mode(text, mode)
+        return {
+            'processed_text': processed,
+            'original_length': len(text),
+            'word_count': len(processed.split()),
+            'sentence_count': len([s for s in processed.split('.') if s.strip()]),
+            'features': self._extract_linguistic_features(processed, text)
+        }
+
+    def _extract_linguistic_features(self, processed_text: str, original_text: str):
+        words = processed_text.split()
+        original_words = original_text.lower().split()
+        if not words:
+            return {}
+        word_count = len(words)
+
+        # The inline list literals were constant-folded to tuples, so this is
+        # the same linear scan per word and per word list
+        features = {
+            'avg_word_length': sum(len(word) for word in words) / word_count,
+            'exclamation_ratio': original_text.count('!') / word_count,
+            'question_ratio': original_text.count('?') / word_count
+        }
+        for name, word_list, tokens in LEGACY_WORD_LISTS:
+            source = original_words if tokens == 'original' else words
+            features[name] = sum(1 for word in source if word in word_list) / word_count
+        features['word_count'] = word_count
+        return features
+
+    def _preprocess_general_text(self, text: str) -> str:
+        text = text.lower()
+        text = re.sub(r'http\S+|www\S+|https\S+', '[URL]', text, flags=re.MULTILINE)
+        text = re.sub(r'\S+@\S+', '[EMAIL]', text)
+        for contraction, expansion in CONTRACTIONS.items():
+            text = re.sub(r'\b' + contraction + r'\b', expansion, text)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    def _preprocess_job_description(self, text: str) -> str:
+        text = text.lower()
+        for pattern in [r'equal opportunity employer', r'we are an equal opportunity',
+                        r'please submit your resume', r'send your cv to',
+                        r'apply now', r'click here to apply']:
+            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+        text = re.sub(r'\b(requirements?|qualifications?)\b', 'requirements', text)
+        text = re.sub(r'\b(responsibilities?|duties)\b', 'responsibilities', text)
+        text = re.sub(r'\b(skills?|abilities)\b', 'skills', text)
+        return self._preprocess_general_text(text)
+
+    def _preprocess_quest_responses(self, text: str) -> str:
+        text = text.lower()
+        text = re.sub(r'http\S+|www\S+|https\S+', '[URL]', text, flags=re.MULTILINE)
+        return re.sub(r'\s+', ' ', text).strip()
+
+
+def legacy_preprocess_text(text: str, mode: str):
+    """Previous convenience function: builds a preprocessor on every call"""
+    return LegacyPreprocessor().preprocess_text(text, mode)
+
+def throughput(fn, text: str, mode: str, repeat: int) -> float:
+    """Calls per second of fn(text, mode)"""
+    fn(text, mode)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text, mode)
+    return repeat / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text preprocessing")
+    parser.add_argument("--repeat", type=int, default=2000,
+                       help="Calls per mode and implementation")
+    args = parser.parse_args()
+
+    print("📊 preprocess_text throughput (calls/sec)")
+    print(f"{'mode':>8} {'chars':>7} {'before':>10} {'after':>10} {'speedup':>9}")
+
+    for mode, text in SAMPLES.items():
+        if legacy_preprocess_text(text, mode) != preprocess_text(text, mode):
+            print(f"❌ Output differs in {mode} mode")
+            sys.exit(1)
+
+        before = throughput(legacy_preprocess_text, text, mode, args.repeat)
+        after = throughput(preprocess_text, text, mode, args.repeat)
+
+        print(f"{mode:>8} {len(text):>7} {before:>10.0f} {after:>10.0f} {after / before:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Serving Benchmark: Flask vs ASGI
+================================
+
+Drives mixed traffic (slow /api/chat calls alongside cheap /api/analyze,
+/api/analyze_traits and /api/characters calls) against the Flask app and the
+ASGI app in turn, and reports requests/sec and latency percentiles per route.
+Chat calls go to a local fake Anthropic API with a fixed latency.
+
+Usage:
+    python benchmarks/benchmark_serving.py
+    python benchmarks/benchmark_serving.py --concurrency 64 --duration 30 --chat_latency 3
+    python benchmarks/benchmark_serving.py --servers asgi
+"""
+
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.fake_anthropic import start_fake_anthropic
+
+# Commands that serve the backend on a given port
+SERVERS = {
+    "flask": [sys.executable, "-c",
+              "import sys; from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi_app:app", "--host", "127.0.0.1",
+             "--log-level", "warning", "--port"]
+}
+
+# (route, method, payload) for each traffic type
+REQUESTS = {
+    "chat": ("/api/chat", "POST", {"message": "Can you help me plan a side project?", "character_name": "TheBuilder"}),
+    "analyze": ("/api/analyze", "POST", {"text": "I love building creative things with my team and I always plan ahead!"}),
+    "analyze_traits": ("/api/analyze_traits", "POST", {"traits": {"creative": True, "organized": True, "social": False}}),
+    "characters": ("/api/characters", "GET", None)
+}
+
+def free_port() -> int:
+    """Find an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(name: str, port: int, anthropic_url: str) -> subprocess.Popen:
+    """Launch a server and wait until its health check answers"""
+    env = dict(os.environ, ANTHROPIC_API_KEY="benchmark", CLAUDE_BASE_URL=anthropic_url)
+    process = subprocess.Popen(SERVERS[name] + [str(port)], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError(f"{name} server exited with code {process.returncode}")
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+def run_load(base_url: str, concurrency: int, duration: float, chat_ratio: float):
+    """Send mixed traffic from `concurrency` clients for `duration` seconds"""
+    latencies = {kind: [] for kind in REQUESTS}
+    errors = {kind: 0 for kind in REQUESTS}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    cheap_kinds = [kind for kind in REQUESTS if kind != "chat"]
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            kind = "chat" if rng.random() < chat_ratio else rng.choice(cheap_kinds)
+            route, method, payload = REQUESTS[kind]
+            start = time.perf_counter()
+            try:
+                response = session.request(method, base_url + route, json=payload, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies[kind].append(elapsed)
+                errors[kind] += 0 if ok else 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def print_results(name: str, latencies, errors, elapsed: float):
+    """Print throughput and latency percentiles per traffic type"""
+    total = sum(len(values) for values in latencies.values())
+    print(f"\n📊 {name}: {total / elapsed:.1f} req/s ({total} requests in {elapsed:.1f}s)")
+    print(f"{'route':>16} {'count':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        p50, p99 = np.percentile(values, [50, 99])
+        print(f"{kind:>16} {len(values):>7} {len(values) / elapsed:>8.1f} {p50:>9.1f} {p99:>9.1f} {errors[kind]:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Flask vs ASGI serving")
+    parser.add_argument("--servers", nargs="+", default=["flask", "asgi"], choices=list(SERVERS),
+                       help="Servers to benchmark")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per server")
+    parser.add_argument("--chat_ratio", type=float, default=0.2, help="Fraction of requests that are chats")
+    parser.add_argument("--chat_latency", type=float, default=2.0, help="Fake Claude response time in seconds")
+    args = parser.parse_args()
+
+    fake = start_fake_anthropic(latency=args.chat_latency)
+    anthropic_url = f"http://127.0.0.1:{fake.server_port}"
+    print(f"🤖 Fake Anthropic API at {anthropic_url} ({args.chat_latency}s per chat)")
+    print(f"👥 {args.concurrency} clients, {args.chat_ratio:.0%} chat traffic, {args.duration:.0f}s per server")
+
+    try:
+        for name in args.servers:
+            port = free_port()
+            process = start_server(name, port, anthropic_url)
+            try:
+                results = run_load(f"http://127.0.0.1:{port}", args.concurrency, args.duration, args.chat_ratio)
+                print_results(name, *results)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    finally:
+        fake.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+=================
+
+Imports each entry point in fresh interpreters under `python -X importtime`
+and reports the median cumulative import time, the slowest imports, and
+which heavy libraries were loaded. With the rule-based model, torch,
+transformers and scipy must stay unloaded: they are imported only when the
+trained backend is chosen. Importing `app` includes building the analyzer,
+so it is what a worker pays at boot.
+
+STARTUP_BUDGETS are enforced by test_startup.py. asgi_app is reported but not
+budgeted, since it imports the anthropic SDK up front on purpose.
+
+Usage:
+    python benchmarks/benchmark_startup.py
+    python benchmarks/benchmark_startup.py --runs 10 --top 15 personality_analyzer
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Any, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries the rule-based path must not import
+HEAVY_MODULES = ("torch", "transformers", "scipy")
+
+# Median import time budgets in seconds, with headroom for slow CI machines
+STARTUP_BUDGETS = {
+    "personality_analyzer": 1.0,
+    "app": 2.0
+}
+
+MODULES = ["personality_analyzer", "api_handlers", "app", "asgi_app"]
+
+def import_once(module: str) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and parse its -X importtime report"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+
+    seconds = next(cumulative for name, _, cumulative in imports if name == module)
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return {"seconds": seconds, "heavy_modules": heavy, "imports": imports}
+
+def measure_import(module: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Median import time of a module over fresh interpreters
+
+    Returns:
+        Dict with seconds (median), runs (all timings), heavy_modules (loaded
+        HEAVY_MODULES) and slowest (imports of the median run by self time)
+    """
+    results = [import_once(module) for _ in range(runs)]
+    results.sort(key=lambda result: result["seconds"])
+    median = results[len(results) // 2]
+    return {
+        "seconds": statistics.median(result["seconds"] for result in results),
+        "runs": [result["seconds"] for result in results],
+        "heavy_modules": sorted({name for result in results for name in result["heavy_modules"]}),
+        "slowest": sorted(median["imports"], key=lambda item: item[1], reverse=True)
+    }
+
+def print_slowest(slowest: List[tuple], top: int):
+    """Print the imports with the most self time"""
+    for name, self_seconds, cumulative in slowest[:top]:
+        print(f"      {self_seconds * 1000:>8.1f} ms self {cumulative * 1000:>8.1f} ms total  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the backend entry points")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list per module")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        result = measure_import(module, args.runs)
+        budget = STARTUP_BUDGETS.get(module)
+        verdict = ""
+        if budget is not None:
+            within = result["seconds"] <= budget and not result["heavy_modules"]
+            over_budget |= not within
+            verdict = f"  {'✅' if within else '❌'} budget {budget * 1000:.0f} ms"
+        heavy = ", ".join(result["heavy_modules"]) or "none"
+        print(f"📦 {module}: {result['seconds'] * 1000:.0f} ms median of {args.runs} "
+              f"(heavy modules: {heavy}){verdict}")
+        print_slowest(result["slowest"], args.top)
+        print()
+
+    sys.exit(1 if over_budget else 0)
+
+if __name__ == "__main__":
+    main()
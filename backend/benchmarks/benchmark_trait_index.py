@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Trait Index Benchmark
+=====================
+
+Compares the previous get_characters_by_trait (a scan lowercasing every
+character's trait list per call) with TraitIndex lookups, for one trait and
+for multi-trait AND/OR/NOT filters, from the 9 built-in characters up to
+100k synthetic ones. Multi-trait filters on the scan side combine one scan
+per trait, as a caller of the old single-trait function had to. Both sides
+are checked to return the same characters before timing.
+
+Usage:
+    python benchmarks/benchmark_trait_index.py
+    python benchmarks/benchmark_trait_index.py --sizes 9 10000 --queries 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from personality_analyzer.character_data import CHARACTER_TRAITS
+from personality_analyzer.trait_index import TraitIndex
+
+# Loop calls per size for the previous implementation, to bound its run time
+LEGACY_CALL_BUDGET = 2000000
+
+def legacy_characters_by_trait(trait, character_traits=CHARACTER_TRAITS):
+    """get_characters_by_trait as it was before TraitIndex"""
+    matching_characters = []
+    for char_name, traits in character_traits.items():
+        if trait.lower() in [t.lower() for t in traits]:
+            matching_characters.append(char_name)
+    return matching_characters
+
+def legacy_filter(character_traits, all_of, any_of, none_of):
+    """A multi-trait filter built from single-trait scans, in character order"""
+    selected = set(character_traits)
+    for trait in all_of:
+        selected &= set(legacy_characters_by_trait(trait, character_traits))
+    if any_of:
+        selected &= {name for trait in any_of for name in legacy_characters_by_trait(trait, character_traits)}
+    for trait in none_of:
+        selected -= set(legacy_characters_by_trait(trait, character_traits))
+    return [name for name in character_traits if name in selected]
+
+def make_character_traits(count: int, rng: np.random.Generator) -> dict:
+    """The built-in trait lists followed by synthetic characters with 4 traits from the same vocabulary"""
+    vocabulary = sorted({trait for traits in CHARACTER_TRAITS.values() for trait in traits})
+    character_traits = dict(list(CHARACTER_TRAITS.items())[:count])
+    for i in range(len(character_traits), count):
+        character_traits[f"UserEl{i}"] = [vocabulary[j] for j in rng.choice(len(vocabulary), 4, replace=False)]
+    return character_traits
+
+def make_queries(count: int, rng: np.random.Generator) -> list:
+    """Random (all_of, any_of, none_of) filters over the built-in vocabulary"""
+    vocabulary = sorted({trait for traits in CHARACTER_TRAITS.values() for trait in traits})
+    pick = lambda n: [vocabulary[j] for j in rng.choice(len(vocabulary), n, replace=False)]
+    return [(pick(1), pick(3), pick(1)) for _ in range(count)]
+
+def microseconds_per_query(fn, queries: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) / queries * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trait lookups")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[9, 1000, 10000, 100000],
+                       help="Character counts")
+    parser.add_argument("--queries", type=int, default=200, help="Lookups per size")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    queries = make_queries(args.queries, rng)
+
+    print(f"{'chars':>7} {'build ms':>9} {'scan µs':>10} {'index µs':>9} {'filter scan µs':>15} {'filter index µs':>16}")
+    for size in args.sizes:
+        character_traits = make_character_traits(size, rng)
+
+        start = time.perf_counter()
+        index = TraitIndex(character_traits)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_queries = queries[:max(3, min(len(queries), LEGACY_CALL_BUDGET // (5 * size)))]
+        traits = [all_of[0] for all_of, _, _ in legacy_queries]
+
+        # Same characters on both sides, before anything is timed
+        for (all_of, any_of, none_of), trait in zip(legacy_queries, traits):
+            assert index.query(all_of=[trait]) == legacy_characters_by_trait(trait, character_traits)
+            expected = legacy_filter(character_traits, all_of, any_of, none_of)
+            assert index.query(all_of, any_of, none_of) == expected, "Filter results differ"
+            expression = ",".join(all_of + ["|".join(any_of)] + [f"!{trait}" for trait in none_of])
+            assert index.select(expression) == expected, "Filter expression results differ"
+
+        scan_us = microseconds_per_query(
+            lambda: [legacy_characters_by_trait(trait, character_traits) for trait in traits], len(traits))
+        index_us = microseconds_per_query(lambda: [index.query(all_of=[trait]) for trait in traits], len(traits))
+        filter_scan_us = microseconds_per_query(
+            lambda: [legacy_filter(character_traits, *query) for query in legacy_queries], len(legacy_queries))
+        filter_index_us = microseconds_per_query(lambda: [index.query(*query) for query in queries], len(queries))
+
+        print(f"{size:>7} {build_ms:>9.1f} {scan_us:>10.1f} {index_us:>9.1f} "
+              f"{filter_scan_us:>15.1f} {filter_index_us:>16.1f}")
+
+    print("\n   filter: 1 required trait, any of 3, none of 1 (scan side combines single-trait scans)")
+
+if __name__ == "__main__":
+    main()
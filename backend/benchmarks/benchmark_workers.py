@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Worker Benchmark: Dev Server vs Pre-fork Gunicorn
+=================================================
+
+Runs the Werkzeug dev server (`python app.py`, reloader on) and the preloaded
+gunicorn launcher (gunicorn.conf.py) in turn, drives CPU-bound /api/analyze
+traffic with unique texts so the result cache never answers, and reports
+throughput, latency percentiles and memory per process. PSS splits shared
+copy-on-write pages between the processes that map them, so it shows how much
+of the model the workers actually share with the master.
+
+Usage:
+    python benchmarks/benchmark_workers.py
+    python benchmarks/benchmark_workers.py --workers 4 --concurrency 16 --duration 30
+    python benchmarks/benchmark_workers.py --servers gunicorn
+"""
+
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORDS = ("I love building creative things with my team and always plan ahead carefully "
+         "but sometimes worry about deadlines while exploring new ideas with friends").split()
+
+def free_port() -> int:
+    """Find an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def server_command(name: str, port: int, workers: int):
+    """Command that serves the Flask app on `port`"""
+    if name == "dev":
+        return [sys.executable, "app.py"]
+    return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--workers", str(workers), "--bind", f"127.0.0.1:{port}", "app:app"]
+
+def start_server(name: str, port: int, workers: int) -> subprocess.Popen:
+    """Launch a server and wait until its health check answers"""
+    env = dict(os.environ, PORT=str(port))
+    process = subprocess.Popen(server_command(name, port, workers), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError(f"{name} server exited with code {process.returncode}")
+            time.sleep(0.2)
+
+    stop_server(process)
+    raise RuntimeError(f"{name} server did not start")
+
+def stop_server(process: subprocess.Popen):
+    """Stop a server and everything it forked"""
+    os.killpg(process.pid, 15)
+    process.wait(timeout=30)
+
+def process_tree(root_pid: int):
+    """PIDs of `root_pid` and all its descendants, parents first"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop(0)
+        pids.append(pid)
+        pending.extend(sorted(children.get(pid, [])))
+    return pids
+
+def memory_mb(pid: int):
+    """(RSS, PSS) of a process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values.get("Rss:", 0.0), values.get("Pss:", 0.0)
+
+def random_text(rng: random.Random) -> str:
+    """A unique analysis input, so every request reaches the model"""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 40))) + f" ({rng.random():.12f})"
+
+def run_load(base_url: str, concurrency: int, duration: float):
+    """Send /api/analyze requests from `concurrency` clients for `duration` seconds"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.post(base_url + "/api/analyze", json={"text": random_text(rng)}, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += 0 if ok else 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+def print_results(name: str, latencies, errors: int, elapsed: float, memory):
+    """Print throughput, latency percentiles and per-process memory"""
+    p50, p99 = np.percentile(latencies, [50, 99]) if latencies else (0.0, 0.0)
+    print(f"\n📊 {name}: {len(latencies) / elapsed:.1f} req/s, p50 {p50:.1f} ms, p99 {p99:.1f} ms, "
+          f"{errors} errors ({len(latencies)} requests in {elapsed:.1f}s)")
+    print(f"{'process':>10} {'pid':>8} {'RSS MB':>9} {'PSS MB':>9}")
+    for role, pid, rss, pss in memory:
+        print(f"{role:>10} {pid:>8} {rss:>9.1f} {pss:>9.1f}")
+    print(f"{'total':>10} {'':>8} {sum(m[2] for m in memory):>9.1f} {sum(m[3] for m in memory):>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dev server vs pre-fork gunicorn workers")
+    parser.add_argument("--servers", nargs="+", default=["dev", "gunicorn"], choices=["dev", "gunicorn"],
+                       help="Servers to benchmark")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Gunicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds of load per server")
+    args = parser.parse_args()
+
+    print(f"👥 {args.concurrency} clients, {args.duration:.0f}s per server, "
+          f"{args.workers} gunicorn worker(s), {os.cpu_count()} CPU(s)")
+
+    for name in args.servers:
+        port = free_port()
+        process = start_server(name, port, args.workers)
+        try:
+            results = run_load(f"http://127.0.0.1:{port}", args.concurrency, args.duration)
+            # For the dev server the root is the reloader and its child serves;
+            # for gunicorn the root is the master and its children are workers
+            pids = process_tree(process.pid)
+            roles = ["reloader" if name == "dev" else "master"] + \
+                    ["server" if name == "dev" else "worker"] * (len(pids) - 1)
+            memory = [(role, pid, *memory_mb(pid)) for role, pid in zip(roles, pids)]
+            print_results(name, *results, memory)
+        finally:
+            stop_server(process)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Fake Anthropic Messages API
+===========================
+
+Local stand-in for POST /v1/messages, so /api/chat can be load-tested without
+network access or API costs. Point the backend at it with
+CLAUDE_BASE_URL=http://127.0.0.1:<port> (any ANTHROPIC_API_KEY works).
+
+Behaviour is configurable:
+    latency             Seconds before the first token
+    tokens_per_second   Generation speed after the first token (0: instant)
+    reply_tokens        Length of the reply in words (one word per stream delta)
+    error_rate          Fraction of requests answered with `error_status`
+                        (529 overloaded by default, which clients retry)
+    handshake_delay     Seconds spent on each new connection, standing in for
+                        TCP+TLS setup to the real API; connections are kept alive
+    cache_min_tokens    Shortest prompt prefix that is cached (2048, as for Haiku)
+
+Requests with "stream": true get Messages API server-sent events. Prompt
+caching is emulated as the API does it: prefixes ending at a cache_control
+block are remembered if they are long enough, and a breakpoint reads the
+longest remembered prefix ending at it or up to 20 blocks before it. Usage
+reports cache writes the first time and cache reads after.
+
+Usage:
+    python benchmarks/fake_anthropic.py --port 8787 --latency 0.5 --tokens_per_second 50
+    python benchmarks/fake_anthropic.py --error_rate 0.05 --reply_tokens 200
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_TEXT = "Hey! Let's build something great together. What are you working on today?"
+REPLY_WORDS = REPLY_TEXT.split(" ")
+
+# Block boundaries before a cache breakpoint checked for an earlier cached prefix
+CACHE_LOOKBACK_BLOCKS = 20
+
+ERROR_TYPES = {
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error"
+}
+
+def reply_tokens(count: int):
+    """Stream deltas for a reply of `count` words, cycling through REPLY_TEXT"""
+    words = [REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(count)]
+    # Keep the spaces so the deltas join back into the reply
+    return [word + " " for word in words[:-1]] + words[-1:]
+
+# The default reply, one word per delta
+REPLY_TOKENS = reply_tokens(len(REPLY_WORDS))
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages according to the server's settings"""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_delay)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body or b"{}")
+
+        if self.path.split("?")[0] != "/v1/messages":
+            self._send_error(404, "not_found_error", "Not found")
+            return
+
+        with self.server.lock:
+            self.server.requests += 1
+            failed = self.server.random.random() < self.server.error_rate
+            self.server.errors += failed
+
+        time.sleep(self.server.latency)
+        if failed:
+            status = self.server.error_status
+            self._send_error(status, ERROR_TYPES.get(status, "api_error"), "Injected failure")
+            return
+
+        if request.get("stream"):
+            self._stream_message(request)
+            return
+
+        tokens = self.server.reply_tokens
+        time.sleep(self._token_interval() * (len(tokens) - 1))
+        self._send_json(200, {
+            **self._message(request),
+            "content": [{"type": "text", "text": "".join(tokens)}],
+            "stop_reason": "end_turn",
+            "usage": {**self._input_usage(request), "output_tokens": len(tokens)}
+        })
+
+    def _token_interval(self) -> float:
+        """Seconds between generated tokens"""
+        rate = self.server.tokens_per_second
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def _input_usage(self, request: dict) -> dict:
+        """Input token counts (about 4 characters per token), with emulated prompt caching"""
+        blocks = []
+        for field in [request.get("system")] + [message.get("content") for message in request.get("messages", [])]:
+            if isinstance(field, str):
+                blocks.append((field, False))
+            elif isinstance(field, list):
+                blocks.extend((block.get("text", ""), "cache_control" in block) for block in field)
+
+        # Token count up to the end of each block; breakpoints on prefixes
+        # shorter than the minimum cacheable length are ignored
+        totals, total = [], 0
+        for text, _ in blocks:
+            total += len(text) // 4
+            totals.append(total)
+        min_tokens = self.server.cache_min_tokens
+        breakpoints = [i for i, (_, cached) in enumerate(blocks) if cached and totals[i] >= min_tokens]
+
+        def prefix_key(end: int) -> str:
+            # Prefixes are matched on content, whichever block carried the breakpoint
+            return json.dumps([text for text, _ in blocks[:end + 1]])
+
+        read = created = 0
+        with self.server.lock:
+            for i in breakpoints:
+                for end in range(i, max(i - CACHE_LOOKBACK_BLOCKS, -1), -1):
+                    if totals[end] >= min_tokens and prefix_key(end) in self.server.prompt_cache:
+                        read = max(read, totals[end])
+                        break
+                self.server.prompt_cache.add(prefix_key(i))
+            if breakpoints:
+                created = totals[breakpoints[-1]] - read
+
+        return {
+            "input_tokens": total - read - created,
+            "cache_creation_input_tokens": created,
+            "cache_read_input_tokens": read
+        }
+
+    def _message(self, request: dict) -> dict:
+        """Message fields shared by both response styles"""
+        return {
+            "id": f"msg_fake_{time.monotonic_ns()}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake"),
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 0, "output_tokens": 0}
+        }
+
+    def _stream_message(self, request: dict):
+        """Send the reply as Messages API stream events"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # Chunked, so the connection stays reusable after the stream ends
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens = self.server.reply_tokens
+        interval = self._token_interval()
+
+        message = self._message(request)
+        message["usage"] = {**self._input_usage(request), "output_tokens": 0}
+        self._send_event("message_start", {"type": "message_start", "message": message})
+        self._send_event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                 "content_block": {"type": "text", "text": ""}})
+        for i, token in enumerate(tokens):
+            if i and interval:
+                time.sleep(interval)
+            self._send_event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                     "delta": {"type": "text_delta", "text": token}})
+        self._send_event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._send_event("message_delta", {"type": "message_delta",
+                                           "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                           "usage": {"output_tokens": len(tokens)}})
+        self._send_event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_event(self, event: str, payload: dict):
+        data = f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_error(self, status: int, error_type: str, message: str):
+        self._send_json(status, {"type": "error", "error": {"type": error_type, "message": message}})
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_anthropic(port: int = 0, latency: float = 2.0, tokens_per_second: float = 0.0,
+                         reply_tokens_count: int = len(REPLY_WORDS), error_rate: float = 0.0,
+                         error_status: int = 529, handshake_delay: float = 0.0,
+                         seed: int = 0, cache_min_tokens: int = 2048) -> ThreadingHTTPServer:
+    """
+    Start the fake API on a background thread
+
+    Args:
+        port: Port to bind (0 picks a free one; see server.server_port)
+        latency: Seconds to wait before each response (time to first token)
+        tokens_per_second: Generation speed after the first token (0 for instant)
+        reply_tokens_count: Reply length in words
+        error_rate: Fraction of requests that fail with error_status
+        error_status: HTTP status of injected failures
+        handshake_delay: Seconds to wait on each new connection
+        seed: Seed for choosing which requests fail
+        cache_min_tokens: Shortest prompt prefix that is cached
+
+    Returns:
+        The running server; call shutdown() to stop it. Its requests, errors
+        and connections attributes count what it has served.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeMessagesHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.tokens_per_second = tokens_per_second
+    server.reply_tokens = reply_tokens(reply_tokens_count)
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.handshake_delay = handshake_delay
+    server.random = random.Random(seed)
+    server.requests = 0  # Messages requests received
+    server.errors = 0  # Injected failures
+    server.connections = 0  # Connections accepted so far
+    server.cache_min_tokens = cache_min_tokens
+    server.prompt_cache = set()  # Cached prompt prefixes
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="fake-anthropic", daemon=True).start()
+    return server
+
+
+@contextmanager
+def fake_anthropic_env(path: str = "", **kwargs):
+    """
+    Run a fake API and point this process's Claude clients at it for the
+    duration of the block
+
+    Args:
+        path: Extra base URL path (an unknown path makes every call fail with 404)
+        **kwargs: start_fake_anthropic arguments
+    """
+    from personality_analyzer.claude_chat import reset_claude_clients
+
+    server = start_fake_anthropic(**kwargs)
+    saved = {key: os.environ.get(key) for key in ("ANTHROPIC_API_KEY", "CLAUDE_BASE_URL")}
+    os.environ["ANTHROPIC_API_KEY"] = "fake"
+    os.environ["CLAUDE_BASE_URL"] = f"http://127.0.0.1:{server.server_port}{path}"
+    reset_claude_clients()
+    try:
+        yield server
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        reset_claude_clients()
+        server.shutdown()
+        server.server_close()
+
+
+def add_fake_arguments(parser: argparse.ArgumentParser, latency: float = 2.0):
+    """Add the fake API's settings to a command line parser"""
+    parser.add_argument("--latency", type=float, default=latency, help="Seconds before the first token")
+    parser.add_argument("--tokens_per_second", type=float, default=0.0,
+                       help="Generation speed after the first token (0: instant)")
+    parser.add_argument("--reply_tokens", type=int, default=len(REPLY_WORDS), help="Reply length in words")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error_status", type=int, default=529, help="HTTP status of injected failures")
+    parser.add_argument("--handshake_delay", type=float, default=0.0, help="Seconds per new connection")
+
+def fake_settings(args) -> dict:
+    """start_fake_anthropic arguments from parsed add_fake_arguments options"""
+    return {
+        "latency": args.latency,
+        "tokens_per_second": args.tokens_per_second,
+        "reply_tokens_count": args.reply_tokens,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "handshake_delay": args.handshake_delay
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8787, help="Port to listen on")
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_fake_anthropic(args.port, **fake_settings(args))
+    print(f"🤖 Fake Anthropic API on http://127.0.0.1:{server.server_port} "
+          f"({args.latency}s to first token, {args.tokens_per_second or 'instant'} tokens/s, "
+          f"{args.reply_tokens} tokens, {args.error_rate:.0%} errors)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
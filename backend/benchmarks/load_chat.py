@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Chat Load Generator
+===================
+
+Drives /api/chat (or /api/chat/stream with --stream) at a fixed concurrency
+and reports throughput, time-to-first-token and end-to-end latency
+percentiles. By default it starts a local fake Anthropic API and a backend
+server pointed at it, so no API key, network or API spend is involved; pass
+--url to load an already running backend instead.
+
+TTFT is the time to the first streamed text delta. Without --stream the
+whole reply arrives at once, so TTFT equals end-to-end latency.
+
+Usage:
+    python benchmarks/load_chat.py --stream --concurrency 32 --duration 30
+    python benchmarks/load_chat.py --server flask --latency 1.0 --tokens_per_second 40 --reply_tokens 150
+    python benchmarks/load_chat.py --error_rate 0.1 --stream
+    python benchmarks/load_chat.py --url http://127.0.0.1:5001 --stream
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_anthropic import start_fake_anthropic, add_fake_arguments, fake_settings
+from benchmarks.benchmark_serving import SERVERS, free_port, start_server
+
+CHARACTERS = ["TheBuilder", "TheDetective", "GrumpyOldManEl", "PirateEl", "GymBroEl",
+              "FreakyEl", "CoffeeAddictEl", "ConspiracyEl", "AGIEl"]
+
+MESSAGE = "Can you help me plan a side project this weekend?"
+
+
+class ChatResult:
+    """Timing and outcome of one chat request"""
+
+    __slots__ = ("ttft", "latency", "status", "output_tokens")
+
+    def __init__(self, ttft=None, latency=None, status="error", output_tokens=0):
+        self.ttft = ttft
+        self.latency = latency
+        self.status = status  # success, fallback or error
+        self.output_tokens = output_tokens
+
+
+def chat_payload(client_id: int, turn: int) -> dict:
+    """Request body for one chat turn"""
+    return {
+        "message": MESSAGE,
+        "character_name": CHARACTERS[(client_id + turn) % len(CHARACTERS)],
+        "session_id": f"load-{client_id}"
+    }
+
+def outcome(payload: dict) -> tuple:
+    """(status, output tokens) of a /api/chat payload"""
+    response = payload.get("response") or {}
+    return response.get("status", "error"), (response.get("usage") or {}).get("output_tokens", 0)
+
+def send_chat(session: requests.Session, base_url: str, body: dict, timeout: float) -> ChatResult:
+    """Send one non-streaming chat"""
+    start = time.perf_counter()
+    response = session.post(f"{base_url}/api/chat", json=body, timeout=timeout)
+    latency = time.perf_counter() - start
+    if response.status_code != 200:
+        return ChatResult(latency=latency)
+    status, tokens = outcome(response.json())
+    return ChatResult(latency, latency, status, tokens)
+
+def send_stream(session: requests.Session, base_url: str, body: dict, timeout: float) -> ChatResult:
+    """Send one streaming chat, timing the first text delta"""
+    start = time.perf_counter()
+    ttft = None
+    done = {}
+    with session.post(f"{base_url}/api/chat/stream", json=body, timeout=timeout, stream=True) as response:
+        if response.status_code != 200:
+            return ChatResult(latency=time.perf_counter() - start)
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            event = json.loads(line[len(b"data: "):])
+            if event["type"] == "delta" and ttft is None:
+                ttft = time.perf_counter() - start
+            elif event["type"] == "done":
+                done = event
+    latency = time.perf_counter() - start
+    status, tokens = outcome(done)
+    return ChatResult(ttft, latency, status, tokens)
+
+def run_load(base_url: str, concurrency: int, duration: float, max_requests: int, stream: bool, timeout: float):
+    """Send chats from `concurrency` clients until the duration or request count is reached"""
+    results = []
+    issued = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    send = send_stream if stream else send_chat
+
+    def client(client_id: int):
+        nonlocal issued
+        session = requests.Session()
+        turn = 0
+        while time.monotonic() < stop_at:
+            with lock:
+                if max_requests and issued >= max_requests:
+                    break
+                issued += 1
+            try:
+                result = send(session, base_url, chat_payload(client_id, turn), timeout)
+            except requests.RequestException:
+                result = ChatResult()
+            turn += 1
+            with lock:
+                results.append(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return results, time.perf_counter() - start
+
+def percentiles(values) -> str:
+    """p50/p95/p99 in milliseconds"""
+    if not values:
+        return f"{'-':>9} {'-':>9} {'-':>9}"
+    p50, p95, p99 = np.percentile(np.array(values) * 1000, [50, 95, 99])
+    return f"{p50:>9.1f} {p95:>9.1f} {p99:>9.1f}"
+
+def print_report(results, elapsed: float, stream: bool):
+    """Print throughput, outcome counts and latency percentiles"""
+    counts = {status: sum(1 for r in results if r.status == status) for status in ("success", "fallback", "error")}
+    tokens = sum(r.output_tokens for r in results)
+    completed = [r for r in results if r.status == "success"]
+
+    print(f"\n📊 {len(results)} chats in {elapsed:.1f}s: {len(results) / elapsed:.1f} chats/s, "
+          f"{tokens / elapsed:.1f} output tokens/s")
+    print(f"   {counts['success']} success, {counts['fallback']} fallback, {counts['error']} error")
+    print(f"\n{'metric':>12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print(f"{'TTFT':>12} {percentiles([r.ttft for r in completed if r.ttft is not None])}")
+    print(f"{'end-to-end':>12} {percentiles([r.latency for r in completed])}")
+    if not stream:
+        print("   (non-streaming: TTFT is the end-to-end latency; use --stream to measure it separately)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test character chat")
+    parser.add_argument("--url", help="Backend to load (default: start one against a fake Anthropic API)")
+    parser.add_argument("--server", default="asgi", choices=list(SERVERS), help="Backend to start without --url")
+    parser.add_argument("--stream", action="store_true", help="Use /api/chat/stream and measure TTFT")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many chats (0: no limit)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    add_fake_arguments(parser, latency=0.5)
+    args = parser.parse_args()
+
+    fake = process = None
+    base_url = args.url
+    try:
+        if base_url is None:
+            fake = start_fake_anthropic(**fake_settings(args))
+            anthropic_url = f"http://127.0.0.1:{fake.server_port}"
+            port = free_port()
+            process = start_server(args.server, port, anthropic_url)
+            base_url = f"http://127.0.0.1:{port}"
+            print(f"🤖 Fake Anthropic API at {anthropic_url}: {args.latency}s to first token, "
+                  f"{args.tokens_per_second or 'instant'} tokens/s, {args.reply_tokens} tokens, "
+                  f"{args.error_rate:.0%} errors")
+            print(f"🚀 {args.server} backend at {base_url}")
+
+        endpoint = "/api/chat/stream" if args.stream else "/api/chat"
+        limit = f", up to {args.requests} chats" if args.requests else ""
+        print(f"👥 {args.concurrency} clients on {endpoint} for {args.duration:.0f}s{limit}")
+
+        results, elapsed = run_load(base_url, args.concurrency, args.duration, args.requests,
+                                    args.stream, args.timeout)
+        print_report(results, elapsed, args.stream)
+
+        if fake is not None:
+            print(f"\n🤖 Fake API served {fake.requests} requests ({fake.errors} injected errors) "
+                  f"over {fake.connections} connections")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if fake is not None:
+            fake.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Character Registry Export Script
+================================
+
+Writes the built-in AI_CHARACTERS and CHARACTER_TRAITS as a JSON or YAML
+character registry file, the starting point for managing characters outside
+the code. Point deployment.character_registry_path at the file to serve it.
+
+Usage:
+    python export_characters.py data/characters.yaml
+    python export_characters.py data/characters.json
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from personality_analyzer.character_data import AI_CHARACTERS, CHARACTER_TRAITS
+from personality_analyzer.character_registry import read_registry, write_registry
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the built-in characters as a registry file")
+    parser.add_argument("path", help="Registry file to write (.json, .yaml or .yml)")
+    args = parser.parse_args()
+
+    write_registry(args.path, AI_CHARACTERS, CHARACTER_TRAITS)
+    # Round trip, so the file is known to load
+    characters, _, version = read_registry(args.path)
+
+    print(f"✅ Wrote {len(characters)} characters to {args.path} (version {version})")
+    print("📝 Set deployment.character_registry_path in training_config.yaml to serve it")
+
+if __name__ == "__main__":
+    main()
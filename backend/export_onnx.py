@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+ONNX Export Script for the Personality Prediction Model
+======================================================
+
+Converts the `personality_model.pt` and tokenizer written by
+`PersonalityTrainer.save_model` into an ONNX graph with dynamic batch and
+sequence axes, so the Flask workers can serve it with ONNX Runtime.
+
+Usage:
+    python export_onnx.py
+    python export_onnx.py --model_dir models/ --opset 17
+    python export_onnx.py --model_dir models/ --no-verify
+"""
+
+import os
+import sys
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from personality_analyzer.model_loader import (
+    TrainedPersonalityModel, OnnxPersonalityModel, ONNX_MODEL_FILENAME
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VERIFY_TEXTS = [
+    "Hi!",
+    "I love building creative solutions with my team and learning new things.",
+    "Honestly I worry a lot about deadlines, but I always plan everything in advance " * 8
+]
+
+class ScoringModule(nn.Module):
+    """BERT + classification head + sigmoid as a single exportable module"""
+    
+    def __init__(self, model: TrainedPersonalityModel):
+        super().__init__()
+        self.bert = model.bert
+        self.classification_head = model.classification_head
+    
+    def forward(self, input_ids, attention_mask):
+        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+        logits = self.classification_head(outputs.pooler_output)
+        return torch.sigmoid(logits)
+
+def export_onnx(model_dir: str, opset: int = 17) -> str:
+    """
+    Export a trained personality model to ONNX
+    
+    Args:
+        model_dir: Directory containing personality_model.pt, tokenizer/ and training_config.json
+        opset: ONNX opset version
+        
+    Returns:
+        Path to the exported ONNX file
+    """
+    model = TrainedPersonalityModel(model_dir, device="cpu", batching=False)
+    module = ScoringModule(model).eval()
+    
+    dummy = model.tokenizer(["personality export"], return_tensors='pt')
+    onnx_path = os.path.join(model_dir, ONNX_MODEL_FILENAME)
+    
+    torch.onnx.export(
+        module,
+        (dummy['input_ids'], dummy['attention_mask']),
+        onnx_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["scores"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "scores": {0: "batch"}
+        },
+        opset_version=opset,
+        dynamo=False
+    )
+    
+    logger.info(f"Exported ONNX model to {onnx_path}")
+    return onnx_path
+
+def verify_export(model_dir: str, tolerance: float = 1e-4) -> float:
+    """
+    Compare ONNX Runtime scores with the PyTorch model
+    
+    Args:
+        model_dir: Directory containing both model formats
+        tolerance: Maximum allowed absolute score difference
+        
+    Returns:
+        Largest absolute difference observed
+    """
+    start = time.perf_counter()
+    torch_model = TrainedPersonalityModel(model_dir, device="cpu", batching=False)
+    torch_load = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    onnx_model = OnnxPersonalityModel(model_dir, batching=False)
+    onnx_load = time.perf_counter() - start
+    
+    torch_scores = torch_model.predict_batch(VERIFY_TEXTS)
+    onnx_scores = onnx_model.predict_batch(VERIFY_TEXTS)
+    
+    max_diff = max(
+        abs(expected[trait] - actual[trait])
+        for expected, actual in zip(torch_scores, onnx_scores)
+        for trait in torch_model.traits
+    )
+    
+    logger.info(f"Startup: PyTorch {torch_load:.2f}s, ONNX Runtime {onnx_load:.2f}s")
+    logger.info(f"Max absolute score difference: {max_diff:.2e}")
+    
+    if max_diff > tolerance:
+        raise ValueError(f"ONNX scores differ from PyTorch by {max_diff:.2e} (tolerance {tolerance:.0e})")
+    
+    return max_diff
+
+def main():
+    """Main export function"""
+    parser = argparse.ArgumentParser(description="Export personality model to ONNX")
+    
+    parser.add_argument("--model_dir", type=str, default="models/",
+                       help="Directory written by PersonalityTrainer.save_model")
+    parser.add_argument("--opset", type=int, default=17,
+                       help="ONNX opset version")
+    parser.add_argument("--tolerance", type=float, default=1e-4,
+                       help="Maximum allowed score difference against PyTorch")
+    parser.add_argument("--no-verify", dest="verify", action="store_false",
+                       help="Skip the PyTorch/ONNX Runtime comparison")
+    
+    args = parser.parse_args()
+    
+    try:
+        onnx_path = export_onnx(args.model_dir, args.opset)
+        
+        if args.verify:
+            max_diff = verify_export(args.model_dir, args.tolerance)
+            print(f"✅ ONNX scores match PyTorch (max diff {max_diff:.2e})")
+        
+        print(f"✅ ONNX model saved to: {onnx_path}")
+        print("📝 Set deployment.model_format: onnx in training_config.yaml to serve it")
+        
+    except Exception as e:
+        logger.error(f"ONNX export failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Production Server Configuration
+===============================
+
+Pre-fork multi-worker serving for the Flask app (or the ASGI app). The app,
+including the PersonalityAnalyzer and any torch model, is built once in the
+master process before forking, so workers share the weights copy-on-write
+instead of each loading their own copy.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi_app:app
+
+Environment:
+    WEB_CONCURRENCY     Number of worker processes (default: CPU count)
+    WORKER_THREADS      Request threads per Flask worker (default: 4)
+    TORCH_THREADS       Torch intra-op threads per worker (default: CPUs / workers)
+    PORT                Port to bind (default: 5001)
+"""
+
+import gc
+import os
+import sys
+
+cpu_count = os.cpu_count() or 1
+
+# Workers and per-worker threads
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count))
+worker_class = "gthread"
+threads = int(os.getenv("WORKER_THREADS", "4"))
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# Chats can wait several seconds on Claude; keep the worker timeout above that
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Load the app (and the model) once in the master and fork workers from it
+preload_app = True
+
+def torch_threads_per_worker(num_workers: int) -> int:
+    """Split the cores between workers so their torch thread pools do not oversubscribe"""
+    return int(os.getenv("TORCH_THREADS", max(1, cpu_count // num_workers)))
+
+# OpenMP/MKL read these when torch is imported, which happens after this file
+# runs because the app is preloaded
+os.environ.setdefault("OMP_NUM_THREADS", str(torch_threads_per_worker(workers)))
+os.environ.setdefault("MKL_NUM_THREADS", str(torch_threads_per_worker(workers)))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = "info"
+
+def when_ready(server):
+    """Called in the master once the preloaded app is ready, before forking"""
+    # Move everything allocated so far (model, tokenizer, character data) out of
+    # the collector's reach, so GC passes in workers do not write to the shared
+    # pages and break copy-on-write
+    gc.freeze()
+    num_workers = server.cfg.workers
+    server.log.info(f"Forking {num_workers} workers with "
+                    f"{torch_threads_per_worker(num_workers)} torch thread(s) each")
+
+def post_fork(server, worker):
+    """Called in each worker right after fork"""
+    # Only the trained backend imports torch; importing it here for the
+    # rule-based model would cost every worker seconds and unshared memory
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(torch_threads_per_worker(server.cfg.workers))
+
+def post_worker_init(worker):
+    """Called in each worker once it has set up its signal handlers"""
+    # The preloaded character registry is as old as the master: pick up
+    # registry file changes since (which also starts this worker's file
+    # watcher), and reload on SIGHUP sent to the worker (SIGHUP sent to the
+    # master restarts the workers instead)
+    from personality_analyzer.character_registry import install_reload_signal, reload_registries
+    reload_registries(force=False)
+    install_reload_signal()
@@ -6,18 +6,28 @@ and avatar generation for the Elliot terminal experience.
 """
 
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Any, Tuple, Optional
-from .preprocessing import preprocess_text
-from .model_loader import load_personality_model, load_tokenizer
+from .preprocessing import preprocess_text, count_message_features, combine_message_features
+from .model_loader import load_personality_model, load_tokenizer, load_deployment_config
 from .utils import (
     interpret_scores, generate_avatar_traits, create_default_avatar,
     generate_xai_insights, get_big_five_traits, map_ui_traits_to_big_five,
-    find_best_character_match, get_personality_insights
+    get_personality_insights
 )
-from .character_data import get_all_characters
+from .character_registry import CharacterRegistry, set_character_registry
+from .cache import ResultCache, SingleFlight, make_cache_key, MISSING
+from .metrics import time_stage
 
 logger = logging.getLogger(__name__)
 
+# Number of previous messages combined with the current one in conversation analysis
+CONVERSATION_WINDOW = 5
+
+# Maximum number of sessions whose per-message counts are kept
+MAX_CONVERSATION_SESSIONS = 1024
+
 class PersonalityAnalyzer:
     """
     Main personality analyzer class for the Elliot terminal experience
@@ -30,17 +40,39 @@ class PersonalityAnalyzer:
     """
     
     def __init__(self, model_path: str = "models/personality_model.pt", 
-                 tokenizer_path: str = "models/tokenizer"):
+                 tokenizer_path: str = "models/tokenizer",
+                 cache_size: int = 1024, cache_ttl_seconds: Optional[float] = 3600,
+                 max_batch_items: Optional[int] = None,
+                 character_registry_path: Optional[str] = None):
         """
         Initialize the personality analyzer
         
         Args:
             model_path: Path to personality prediction model
             tokenizer_path: Path to tokenizer files
+            cache_size: Maximum number of cached analyze_text results (0 disables)
+            cache_ttl_seconds: Lifetime of cached results (None for no expiry)
+            max_batch_items: Maximum texts per analyze_batch call
+                (defaults to deployment.max_request_batch_size)
+            character_registry_path: JSON/YAML character registry file
+                (defaults to deployment.character_registry_path, else the built-in characters)
         """
         self.model_path = model_path
         self.tokenizer_path = tokenizer_path
         
+        deployment = load_deployment_config()
+        if max_batch_items is None:
+            max_batch_items = int(deployment["max_request_batch_size"])
+        self.max_batch_items = max_batch_items
+        
+        # Cache of analyze_text results, invalidated whenever the model is swapped
+        self.result_cache = ResultCache(max_size=cache_size, ttl_seconds=cache_ttl_seconds)
+        # Identical analyses already running (retries, double submits) are
+        # joined instead of run again
+        self.in_flight = SingleFlight()
+        self._model = None
+        self._model_generation = 0
+        
         # Load model and tokenizer
         try:
             self.model = load_personality_model(model_path)
@@ -50,78 +82,310 @@ class PersonalityAnalyzer:
             logger.error(f"❌ Failed to initialize PersonalityAnalyzer: {e}")
             raise
         
-        # Cache for conversation context
-        self.conversation_cache = {}
+        # Per-session cache of per-message feature counts, so each conversation
+        # turn only preprocesses the new message
+        self.conversation_cache = OrderedDict()
+        self._conversation_lock = threading.Lock()
+        self.conversation_stats = {"messages_computed": 0, "messages_reused": 0}
         
-        # Load character database
-        self.characters = get_all_characters()
+        # Load character database; the snapshot (matcher vectors, trait index,
+        # serialized listing) is swapped on reload without touching the model
+        if character_registry_path is None:
+            character_registry_path = deployment["character_registry_path"]
+        max_leaves = deployment["character_index_max_leaves"]
+        self.character_registry = CharacterRegistry(
+            character_registry_path,
+            index_min_characters=int(deployment["character_index_min_size"]),
+            max_leaves=int(max_leaves) if max_leaves is not None else None
+        )
+        set_character_registry(self.character_registry)
         logger.info(f"Loaded {len(self.characters)} AI characters for matching")
+        # The watcher thread starts once the registry serves requests, so not
+        # in a gunicorn master that only preloads the app
+        poll_seconds = float(deployment["character_registry_poll_seconds"] or 0)
+        if poll_seconds > 0:
+            self.character_registry.start_watching(poll_seconds)
+    
+    @property
+    def characters(self) -> Dict[str, Dict[str, Any]]:
+        """Character name -> data of the current character snapshot"""
+        return self.character_registry.snapshot.characters
+    
+    @property
+    def matcher(self):
+        """Matcher of the current character snapshot"""
+        return self.character_registry.snapshot.matcher
+    
+    @property
+    def trait_index(self):
+        """Trait index of the current character snapshot"""
+        return self.character_registry.snapshot.trait_index
+    
+    @property
+    def model(self):
+        """Personality prediction model"""
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        """Swap the prediction model and invalidate cached results"""
+        self._model = model
+        self._model_generation += 1
+        self.result_cache.clear()
+    
+    @property
+    def model_version(self) -> str:
+        """Identifier of the current model, part of every result cache key"""
+        return f"{getattr(self._model, 'model_name', type(self._model).__name__)}#{self._model_generation}"
         
     def analyze_text(self, text: str, mode: str = 'general', 
-                    context: List[Dict[str, str]] = None) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+                    context: List[Dict[str, str]] = None,
+                    session_id: Optional[str] = None) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
         """
         Analyze personality from text input
         
+        Results are cached on the normalized text, mode, context and model version,
+        and concurrent calls with the same key share one computation.
+        
         Args:
             text: Input text to analyze
             mode: Analysis mode ('quest', 'conversation', 'jd', 'general')
             context: Conversation history for additional context
+            session_id: Conversation identifier used to reuse per-message work across turns
             
         Returns:
             Tuple of (personality_scores, explanation, avatar_data)
         """
         try:
-            logger.info(f"Analyzing text in {mode} mode: {text[:100]}...")
-            
-            # Preprocess text
-            preprocessed = preprocess_text(text, mode)
-            
-            if not preprocessed['processed_text']:
-                logger.warning("Empty text after preprocessing")
-                return self._create_minimal_analysis("Insufficient text for analysis")
-            
-            # Add context if available
-            full_text = text
-            if context and len(context) > 0:
-                # Combine recent conversation for better analysis
-                recent_messages = [msg.get('content', '') for msg in context[-5:]]
-                full_text = f"{' '.join(recent_messages)} {text}"
-                preprocessed = preprocess_text(full_text, mode)
+            cache_key = self._cache_key(text, mode, context)
+            cached = self.result_cache.get(cache_key)
+            if cached is not MISSING:
+                logger.info(f"Cache hit for {mode} mode analysis")
+                return cached
+            
+            return self.in_flight.do(
+                cache_key, lambda: self._analyze_and_cache(cache_key, text, mode, context, session_id)
+            )
             
-            # Get personality scores from model
+        except Exception as e:
+            logger.error(f"❌ Error in analyze_text: {e}")
+            return self._create_error_analysis(str(e))
+    
+    def _analyze_and_cache(self, cache_key: str, text: str, mode: str,
+                           context: Optional[List[Dict[str, str]]],
+                           session_id: Optional[str]) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """Run the analysis and cache it before concurrent callers are released"""
+        result = self._run_analysis(text, mode, context, session_id)
+        self.result_cache.set(cache_key, result)
+        return result
+    
+    def _cache_key(self, text: str, mode: str, context: Optional[List[Dict[str, str]]]) -> str:
+        """Build the result cache key for an analyze_text call"""
+        # Everything downstream of preprocessing is case-insensitive, and only the
+        # content of the last CONVERSATION_WINDOW context messages is used
+        normalized_text = text.strip().lower()
+        context_contents = [msg.get('content', '') for msg in context[-CONVERSATION_WINDOW:]] if context else []
+        return make_cache_key(normalized_text, mode, context_contents, self.model_version)
+    
+    def _run_analysis(self, text: str, mode: str, context: Optional[List[Dict[str, str]]],
+                      session_id: Optional[str] = None) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """Run the full preprocess -> predict -> interpret -> avatar pipeline"""
+        logger.info(f"Analyzing text in {mode} mode: {text[:100]}...")
+        
+        # Combine recent conversation for better analysis
+        recent_messages = [msg.get('content', '') for msg in context[-CONVERSATION_WINDOW:]] if context else []
+        
+        with time_stage("preprocess"):
+            if recent_messages and mode != 'jd':
+                # Counts are additive, so the window is combined from cached per-message
+                # counts rather than re-preprocessing the joined history
+                message_counts = self._get_message_counts(recent_messages + [text], mode, session_id)
+                text_is_empty = not message_counts[-1]['processed_text']
+                preprocessed = combine_message_features(message_counts)
+            else:
+                preprocessed = preprocess_text(text, mode)
+                text_is_empty = not preprocessed['processed_text']
+                
+                if recent_messages and not text_is_empty:
+                    # JD boilerplate patterns can span messages, so JD context is joined first
+                    preprocessed = preprocess_text(f"{' '.join(recent_messages)} {text}", mode)
+        
+        if text_is_empty:
+            logger.warning("Empty text after preprocessing")
+            return self._create_minimal_analysis("Insufficient text for analysis")
+        
+        # Get personality scores from model
+        with time_stage("predict"):
             personality_scores = self.model.predict(
                 features=preprocessed['features'],
                 text=preprocessed['processed_text']
             )
-            
-            # Interpret scores
+        
+        return self._finish_analysis(text, mode, preprocessed, personality_scores)
+    
+    def _finish_analysis(self, text: str, mode: str, preprocessed: Dict[str, Any],
+                         personality_scores: Dict[str, float]) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+        """Interpret model scores and build the explanation and avatar"""
+        # Interpret scores
+        with time_stage("interpret"):
             interpreted_scores = interpret_scores(personality_scores, preprocessed['features'])
-            
-            # Generate explanation
+        
+        # Generate explanation
+        with time_stage("explanation"):
             explanation = self._generate_explanation(
                 interpreted_scores, 
                 preprocessed['features'],
                 mode
             )
-            
-            # Generate avatar data
+        
+        # Generate avatar data
+        with time_stage("avatar"):
             avatar_data = generate_avatar_traits(
                 personality_scores,
                 context={'mode': mode, 'text_length': len(text)}
             )
+        
+        logger.info("✅ Personality analysis completed successfully")
+        
+        return interpreted_scores, explanation, avatar_data
+    
+    def analyze_batch(self, texts: List[str], mode: str = 'general') -> List[Dict[str, Any]]:
+        """
+        Analyze many independent texts in one call
+        
+        Every stage runs once over the whole batch. Cached results are reused,
+        the remaining texts go to the model in a single predict_many call
+        (batched forward passes for the trained model) and new results are
+        cached. A failing item does not affect the others.
+        
+        Args:
+            texts: Texts to analyze
+            mode: Analysis mode applied to every text
             
-            logger.info("✅ Personality analysis completed successfully")
+        Returns:
+            One dict per text, in input order: either status 'success' with
+            personality_scores, explanation and avatar_data, or status 'error'
+            with an error message
+        """
+        if len(texts) > self.max_batch_items:
+            raise ValueError(f"Batch of {len(texts)} texts exceeds the maximum of {self.max_batch_items}")
+        
+        logger.info(f"Analyzing batch of {len(texts)} texts in {mode} mode")
+        
+        results = [None] * len(texts)
+        pending = []
+        
+        # Cache lookup and preprocessing
+        for index, text in enumerate(texts):
+            try:
+                if not isinstance(text, str):
+                    raise ValueError("Text input must be a string")
+                if not text.strip():
+                    raise ValueError("Text input cannot be empty")
+                
+                cache_key = self._cache_key(text, mode, None)
+                cached = self.result_cache.get(cache_key)
+                if cached is not MISSING:
+                    results[index] = self._batch_result(cached)
+                    continue
+                
+                with time_stage("preprocess"):
+                    preprocessed = preprocess_text(text, mode)
+                if not preprocessed['processed_text']:
+                    analysis = self._create_minimal_analysis("Insufficient text for analysis")
+                    self.result_cache.set(cache_key, analysis)
+                    results[index] = self._batch_result(analysis)
+                    continue
+                
+                pending.append((index, text, cache_key, preprocessed))
+                
+            except Exception as e:
+                results[index] = {"status": "error", "error": str(e)}
+        
+        if not pending:
+            return results
+        
+        # One model call for every text that still needs scoring
+        try:
+            # Timed as its own stage: one call scores the whole batch
+            with time_stage("predict_many"):
+                scores_list = self.model.predict_many(
+                    [item[3]['features'] for item in pending],
+                    [item[3]['processed_text'] for item in pending]
+                )
+        except Exception as e:
+            logger.error(f"❌ Error in analyze_batch prediction: {e}")
+            for index, _, _, _ in pending:
+                results[index] = {"status": "error", "error": str(e)}
+            return results
+        
+        # Interpretation, explanation and avatar generation
+        for (index, text, cache_key, preprocessed), personality_scores in zip(pending, scores_list):
+            try:
+                analysis = self._finish_analysis(text, mode, preprocessed, personality_scores)
+                self.result_cache.set(cache_key, analysis)
+                results[index] = self._batch_result(analysis)
+            except Exception as e:
+                results[index] = {"status": "error", "error": str(e)}
+        
+        return results
+    
+    def _batch_result(self, analysis: Tuple[Dict[str, Any], str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Format one analyze_batch item"""
+        personality_scores, explanation, avatar_data = analysis
+        return {
+            "status": "success",
+            "personality_scores": personality_scores,
+            "explanation": explanation,
+            "avatar_data": avatar_data
+        }
+    
+    def _get_message_counts(self, messages: List[str], mode: str,
+                            session_id: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Get feature counts for each message, reusing counts cached for the session
+        
+        Only messages not seen in the session's recent window are preprocessed.
+        Sessions are evicted least recently used first.
+        """
+        with self._conversation_lock:
+            session = self.conversation_cache.pop(session_id, None)
+            if session is None:
+                session = OrderedDict()
+            self.conversation_cache[session_id] = session
+            
+            while len(self.conversation_cache) > MAX_CONVERSATION_SESSIONS:
+                self.conversation_cache.popitem(last=False)
+            
+            cached = {}
+            for message in messages:
+                counts = session.get((mode, message))
+                if counts is not None:
+                    session.move_to_end((mode, message))
+                    cached[message] = counts
+        
+        computed = {message: count_message_features(message, mode)
+                    for message in messages if message not in cached}
+        
+        with self._conversation_lock:
+            for message, counts in computed.items():
+                session[(mode, message)] = counts
             
-            return interpreted_scores, explanation, avatar_data
+            # The current window is all the next turn can reuse
+            while len(session) > CONVERSATION_WINDOW + 1:
+                session.popitem(last=False)
             
-        except Exception as e:
-            logger.error(f"❌ Error in analyze_text: {e}")
-            return self._create_error_analysis(str(e))
+            self.conversation_stats["messages_computed"] += len(computed)
+            self.conversation_stats["messages_reused"] += len(messages) - len(computed)
+        
+        return [cached[message] if message in cached else computed[message] for message in messages]
     
     def analyze_quest_responses(self, responses: List[str], user_name: str = "User") -> Dict[str, Any]:
         """
         Analyze personality from quest mode responses
         
+        Concurrent calls with the same responses and name share one computation.
+        
         Args:
             responses: List of 4 quest responses
             user_name: User's name for personalization
@@ -135,31 +399,8 @@ class PersonalityAnalyzer:
             if len(responses) < 4:
                 raise ValueError("Quest analysis requires all 4 responses")
             
-            # Combine all responses for comprehensive analysis
-            combined_text = " ".join(responses)
-            
-            # Analyze with quest mode
-            personality_scores, explanation, avatar_data = self.analyze_text(
-                combined_text, 
-                mode='quest'
-            )
-            
-            # Add quest-specific context to avatar
-            avatar_data['user_name'] = user_name
-            avatar_data['quest_responses'] = responses
-            avatar_data['analysis_type'] = 'comprehensive_quest'
-            
-            # Generate quest-specific insights
-            quest_insights = self._generate_quest_insights(responses, personality_scores)
-            
-            return {
-                "personality_analysis": personality_scores,
-                "avatar_data": avatar_data,
-                "explanation": explanation,
-                "quest_insights": quest_insights,
-                "user_name": user_name,
-                "completion_status": "complete"
-            }
+            key = make_cache_key("quest", responses, user_name, self.model_version)
+            return self.in_flight.do(key, lambda: self._run_quest_analysis(responses, user_name))
             
         except Exception as e:
             logger.error(f"❌ Error in analyze_quest_responses: {e}")
@@ -169,6 +410,34 @@ class PersonalityAnalyzer:
                 "user_name": user_name
             }
     
+    def _run_quest_analysis(self, responses: List[str], user_name: str) -> Dict[str, Any]:
+        """Run the quest pipeline for analyze_quest_responses"""
+        # Combine all responses for comprehensive analysis
+        combined_text = " ".join(responses)
+        
+        # Analyze with quest mode
+        personality_scores, explanation, avatar_data = self.analyze_text(
+            combined_text, 
+            mode='quest'
+        )
+        
+        # Add quest-specific context to avatar
+        avatar_data['user_name'] = user_name
+        avatar_data['quest_responses'] = responses
+        avatar_data['analysis_type'] = 'comprehensive_quest'
+        
+        # Generate quest-specific insights
+        quest_insights = self._generate_quest_insights(responses, personality_scores)
+        
+        return {
+            "personality_analysis": personality_scores,
+            "avatar_data": avatar_data,
+            "explanation": explanation,
+            "quest_insights": quest_insights,
+            "user_name": user_name,
+            "completion_status": "complete"
+        }
+    
     def generate_avatar_from_scores(self, personality_scores: Dict[str, float], 
                                    user_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -328,13 +597,15 @@ class PersonalityAnalyzer:
         from datetime import datetime
         return datetime.now().isoformat()
     
-    def analyze_ui_traits(self, selected_traits: Dict[str, bool], user_name: str = "User") -> Dict[str, Any]:
+    def analyze_ui_traits(self, selected_traits: Dict[str, bool], user_name: str = "User",
+                          top_k: Optional[int] = None) -> Dict[str, Any]:
         """
         Analyze personality from UI trait selections and find matching character
         
         Args:
             selected_traits: Dictionary of trait names to selection status
             user_name: User's name for personalization
+            top_k: Also return the top_k ranked matches and the score distribution
             
         Returns:
             Complete analysis with matched character
@@ -345,8 +616,8 @@ class PersonalityAnalyzer:
             # Convert UI traits to Big Five scores
             user_big_five = map_ui_traits_to_big_five(selected_traits)
             
-            # Find best matching character
-            char_name, char_data, similarity = find_best_character_match(user_big_five, self.characters)
+            # Find best matching character (and runners-up for top_k)
+            match = self.matcher.match_report(user_big_five, top_k)
             
             # Generate personality insights
             insights = get_personality_insights(user_big_five, selected_traits)
@@ -363,12 +634,7 @@ class PersonalityAnalyzer:
                 "selected_traits": selected_traits,
                 "big_five_scores": user_big_five,
                 "interpreted_scores": interpreted_scores,
-                "matched_character": {
-                    "name": char_name,
-                    "data": char_data,
-                    "similarity_score": similarity,
-                    "match_confidence": "High" if similarity > 0.8 else "Medium" if similarity > 0.6 else "Low"
-                },
+                **match,
                 "personality_insights": insights,
                 "avatar_data": avatar_data,
                 "completion_status": "complete"
@@ -382,13 +648,15 @@ class PersonalityAnalyzer:
                 "user_name": user_name
             }
     
-    def get_character_match_for_text(self, text: str, mode: str = 'general') -> Dict[str, Any]:
+    def get_character_match_for_text(self, text: str, mode: str = 'general',
+                                     top_k: Optional[int] = None) -> Dict[str, Any]:
         """
         Analyze text and find best matching character
         
         Args:
             text: Input text to analyze
             mode: Analysis mode
+            top_k: Also return the top_k ranked matches and the score distribution
             
         Returns:
             Text analysis with character matching
@@ -402,20 +670,15 @@ class PersonalityAnalyzer:
             for trait, data in personality_scores.items():
                 raw_scores[trait] = data.get('score', 0.5)
             
-            # Find best matching character
-            char_name, char_data, similarity = find_best_character_match(raw_scores, self.characters)
+            # Find best matching character (and runners-up for top_k)
+            match = self.matcher.match_report(raw_scores, top_k)
             
             return {
                 "analysis_type": "text_with_character_match",
                 "personality_analysis": personality_scores,
                 "explanation": explanation,
                 "avatar_data": avatar_data,
-                "matched_character": {
-                    "name": char_name,
-                    "data": char_data,
-                    "similarity_score": similarity,
-                    "match_confidence": "High" if similarity > 0.8 else "Medium" if similarity > 0.6 else "Low"
-                },
+                **match,
                 "completion_status": "complete"
             }
             
@@ -463,22 +726,70 @@ class PersonalityAnalyzer:
                 "user_name": user_name
             }
     
-    def get_all_character_profiles(self) -> Dict[str, Any]:
-        """Get all available character profiles for display"""
+    def get_all_character_profiles(self, trait_filter: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get available character profiles for display
+        
+        Args:
+            trait_filter: Only characters matching this trait filter expression
+                (see trait_index.parse_trait_filter)
+            
+        Returns:
+            Characters, their count and names
+            
+        Raises:
+            ValueError: If trait_filter cannot be parsed
+        """
+        snapshot = self.character_registry.snapshot
+        if trait_filter is None:
+            return snapshot.profiles
+        
+        characters = {name: snapshot.characters[name] for name in snapshot.trait_index.select(trait_filter)}
         return {
-            "characters": self.characters,
-            "character_count": len(self.characters),
-            "character_names": list(self.characters.keys())
+            "characters": characters,
+            "character_count": len(characters),
+            "character_names": list(characters.keys()),
+            "filter": trait_filter,
+            "unknown_traits": snapshot.trait_index.unknown_traits(trait_filter)
         }
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
+        characters = self.characters
         return {
             "model_name": getattr(self.model, 'model_name', 'Unknown'),
             "model_path": self.model_path,
             "tokenizer_name": getattr(self.tokenizer, 'tokenizer_name', 'Unknown'),
             "supported_traits": get_big_five_traits(),
             "analysis_modes": ['general', 'quest', 'conversation', 'jd'],
-            "character_count": len(self.characters),
-            "available_characters": list(self.characters.keys())
-        }
\ No newline at end of file
+            "character_count": len(characters),
+            "available_characters": list(characters.keys()),
+            "character_registry": self.character_registry.get_stats(),
+            "result_cache": self.get_cache_stats(),
+            "conversation_cache": self.get_conversation_stats(),
+            "single_flight": self.get_single_flight_stats(),
+            "micro_batching": self.get_batching_stats()
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get analyze_text result cache statistics"""
+        stats = self.result_cache.get_stats()
+        stats["model_version"] = self.model_version
+        return stats
+    
+    def get_single_flight_stats(self) -> Dict[str, Any]:
+        """Get request coalescing statistics; `coalesced` counts analyses saved"""
+        return self.in_flight.get_stats()
+    
+    def get_batching_stats(self) -> Optional[Dict[str, Any]]:
+        """Get micro-batching scheduler statistics, or None if the model does not batch"""
+        scheduler = getattr(self.model, 'scheduler', None)
+        return scheduler.get_stats() if scheduler is not None else None
+    
+    def get_conversation_stats(self) -> Dict[str, Any]:
+        """Get per-message feature cache statistics for conversation analysis"""
+        with self._conversation_lock:
+            stats = dict(self.conversation_stats)
+            stats["sessions"] = len(self.conversation_cache)
+        stats["window"] = CONVERSATION_WINDOW
+        return stats
\ No newline at end of file
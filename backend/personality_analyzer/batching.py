@@ -0,0 +1,175 @@
+"""
+Micro-Batching Inference Scheduler
+
+Collects prediction requests that arrive at roughly the same time and runs
+them through the model as a single batched forward pass. Each caller gets
+its own result back through a Future.
+"""
+
+import os
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request priorities (lower runs first)
+PRIORITY_INTERACTIVE = 0  # Terminal / chat requests waiting on a response
+PRIORITY_BULK = 1         # Batch jobs that can tolerate extra latency
+
+
+class MicroBatchScheduler:
+    """
+    Groups concurrent single-text predictions into batched model calls
+
+    A background worker waits for the first pending request, then keeps
+    collecting until either `max_batch_size` requests are queued or
+    `max_wait_ms` has passed since that first request arrived. Pending
+    requests are ordered by priority, so interactive requests always jump
+    ahead of queued bulk work and wait for at most one in-flight batch.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[str]], List[Dict[str, float]]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Initialize the scheduler
+
+        Args:
+            batch_fn: Function mapping a list of texts to a list of score dicts
+            max_batch_size: Maximum number of texts per forward pass
+            max_wait_ms: Maximum time to hold the first request while a batch fills
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._pid = None
+        self._closed = False
+
+        # Scheduler statistics
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "largest_batch": 0
+        }
+
+    def submit(self, text: str, priority: int = PRIORITY_INTERACTIVE) -> Future:
+        """
+        Queue a text for prediction
+
+        Args:
+            text: Text to score
+            priority: PRIORITY_INTERACTIVE or PRIORITY_BULK
+
+        Returns:
+            Future resolving to the score dict for this text
+        """
+        future = Future()
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler has been closed")
+
+            self._ensure_worker()
+            heapq.heappush(self._queue, (priority, next(self._counter), time.monotonic(), text, future))
+            self.stats["requests"] += 1
+            self._condition.notify()
+
+        return future
+
+    def predict(self, text: str, priority: int = PRIORITY_INTERACTIVE,
+                timeout: Optional[float] = None) -> Dict[str, float]:
+        """Submit a text and block until its scores are ready"""
+        return self.submit(text, priority).result(timeout=timeout)
+
+    def close(self):
+        """Stop the worker after the pending requests have been served"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        if self._worker is not None and self._worker.is_alive():
+            self._worker.join()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics"""
+        with self._condition:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._queue)
+
+        stats["avg_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        return stats
+
+    def _ensure_worker(self):
+        """Start the worker thread, restarting it in a forked child process"""
+        if self._worker is not None and self._worker.is_alive() and self._pid == os.getpid():
+            return
+
+        if self._pid is not None and self._pid != os.getpid():
+            # Threads do not survive fork; requests queued in the parent belong to it
+            self._queue = []
+
+        self._pid = os.getpid()
+        self._worker = threading.Thread(target=self._run, name="micro-batch-scheduler", daemon=True)
+        self._worker.start()
+
+    def _next_batch(self) -> List[tuple]:
+        """Block until a batch is ready and pop it from the queue"""
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+
+            if not self._queue:
+                return []
+
+            # Hold the batch open until it is full or the oldest request's wait expires
+            oldest = min(item[2] for item in self._queue)
+            deadline = oldest + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            size = min(self.max_batch_size, len(self._queue))
+            return [heapq.heappop(self._queue) for _ in range(size)]
+
+    def _run(self):
+        """Worker loop: pop batches and run them through the model"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            texts = [item[3] for item in batch]
+            futures = [item[4] for item in batch]
+
+            with self._condition:
+                self.stats["batches"] += 1
+                self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+            try:
+                results = self.batch_fn(texts)
+                if len(results) != len(texts):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(texts)} texts")
+            except Exception as e:
+                logger.error(f"Batched prediction failed: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, result in zip(futures, results):
+                future.set_result(result)
@@ -0,0 +1,184 @@
+"""
+Result Cache Module
+
+Bounded, thread-safe LRU cache with per-entry expiry, used to skip the
+analysis pipeline for inputs that have already been analyzed, and
+single-flight coalescing for identical requests that are still running.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Returned by ResultCache.get on a miss (None is a valid cached value)
+MISSING = object()
+
+
+class ResultCache:
+    """
+    LRU + TTL cache for analysis results
+
+    Values are deep-copied on the way in and out, so callers can freely
+    mutate what they get back without corrupting the cached entry.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of entries (0 disables caching)
+            ttl_seconds: Entry lifetime in seconds (None for no expiry)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return a copy of the cached value, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self.ttl_seconds is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+
+        return copy.deepcopy(value)
+
+    def set(self, key: Hashable, value: Any):
+        """Store a copy of value, evicting the least recently used entry if full"""
+        if self.max_size <= 0:
+            return
+
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class _Call:
+    """A computation in flight and the callers waiting on it"""
+
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation
+
+    The first caller for a key runs the computation; callers arriving while it
+    runs wait and get a deep copy of its result (or its exception). Nothing is
+    kept once the computation finishes, so pair it with a ResultCache to also
+    serve later calls.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn(), sharing one run among concurrent callers with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            if shared and call.error is None:
+                # Waiters copy from a snapshot, so the leader's caller is free to mutate its result
+                try:
+                    call.result = copy.deepcopy(result)
+                except Exception as e:
+                    call.error = e
+            call.done.set()
+
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics; `coalesced` counts computations saved"""
+        with self._lock:
+            calls = self.executions + self.coalesced
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_rate": self.coalesced / calls if calls else 0.0
+            }
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Hash JSON-serializable parts into a compact cache key"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -139,9 +139,13 @@ def get_character_names() -> list:
     return list(AI_CHARACTERS.keys())
 
 def get_characters_by_trait(trait: str) -> list:
-    """Get characters that have a specific trait."""
-    matching_characters = []
-    for char_name, traits in CHARACTER_TRAITS.items():
-        if trait.lower() in [t.lower() for t in traits]:
-            matching_characters.append(char_name)
-    return matching_characters
\ No newline at end of file
+    """
+    Get characters that have a specific trait.
+
+    Looks the trait up in the served character registry's trait index, so
+    reloaded characters are included. Traits are compared as normalized tags:
+    case, spaces, underscores and hyphens are ignored, so "Pattern Seeking"
+    finds characters with "pattern-seeking".
+    """
+    from .character_registry import get_character_registry
+    return get_character_registry().snapshot.trait_index.query(all_of=[trait])
\ No newline at end of file
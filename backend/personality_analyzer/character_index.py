@@ -0,0 +1,424 @@
+"""
+Character Index Module
+
+Nearest-neighbour index over character Big Five profiles, for character
+databases too large to scan on every match (user-published Els). Ranking
+by cosine similarity is ranking by distance between unit vectors, so each
+profile's unit vector is stored in a KD-tree whose nodes bound the best
+score any character beneath them can reach. Queries scan leaves best bound
+first (depth first, nearer child first) and skip every node that cannot
+beat the matches found so far.
+
+Characters are inserted into and deleted from leaves in place, and leaves
+that grow too large are split, so the database can change without
+rebuilding the tree.
+"""
+
+import heapq
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .matching import (SIMILARITY_DECIMALS, TRAITS, Profiles, character_vector, describe_match,
+                       profile_vector, rank_matches)
+
+# Characters per leaf when building; a leaf splits once it holds twice as many
+LEAF_SIZE = 64
+
+# Slack on node bounds so rounding never prunes a node holding an equal score
+BOUND_SLACK = 1e-9
+
+Match = Tuple[Optional[str], Optional[Dict[str, Any]], float]
+
+
+class _Node:
+    """KD-tree node: a leaf holding character rows, or a split on one dimension"""
+
+    __slots__ = ("lo", "hi", "dim", "split", "left", "right", "rows", "vectors", "squared_norms")
+
+    def __init__(self, lo: List[float], hi: List[float]):
+        # Bounding box of the unit vectors of every character inserted below,
+        # as floats since bounds are computed per node in pure Python
+        self.lo = lo
+        self.hi = hi
+        # Internal nodes: unit vectors with [dim] <= split go left
+        self.dim = None
+        self.split = None
+        self.left = None
+        self.right = None
+        # Leaves: rows in insertion order, with their profile vectors and squared norms
+        self.rows = None
+        self.vectors = None
+        self.squared_norms = None
+
+
+def _scores(vector: np.ndarray, squared_norm: float, vectors: np.ndarray, squared_norms: np.ndarray) -> np.ndarray:
+    """Similarity of one profile vector to rows of character vectors, computed as CharacterMatcher does"""
+    out = np.matmul(vector[np.newaxis, :], vectors.T)[0]
+    denominator = np.sqrt(squared_norm * squared_norms)
+    np.divide(out, denominator, out=out, where=denominator > 0)
+    np.clip(out, 0.0, 1.0, out=out)
+    return np.round(out, SIMILARITY_DECIMALS, out=out)
+
+
+class CharacterIndex:
+    """
+    KD-tree character matcher with in-place inserts and deletes
+
+    Offers CharacterMatcher's matching API (best_match, best_matches,
+    match_report, similarities). Exact queries return the same characters and
+    scores as CharacterMatcher, including ties, which go to the character
+    inserted first. With max_leaves set, queries are approximate: they scan
+    at most that many leaves, trading recall for bounded latency.
+
+    Profiles are expected on the 0-1 scale; a profile with a negative score
+    falls back to scoring every character.
+    """
+
+    def __init__(self, characters: Dict[str, Dict[str, Any]], max_leaves: Optional[int] = None,
+                 leaf_size: int = LEAF_SIZE):
+        """
+        Build the index
+
+        Args:
+            characters: Character name -> data with O, C, E, A, N scores (1-5 scale)
+            max_leaves: Leaves scanned per query (None for exact queries)
+            leaf_size: Characters per leaf when building
+        """
+        self.max_leaves = max_leaves
+        self.leaf_size = leaf_size
+        self._lock = threading.RLock()
+        self._load(characters)
+
+    def _load(self, characters: Dict[str, Dict[str, Any]]):
+        """Reset the storage and build the tree from characters in order"""
+        count = len(characters)
+        capacity = max(16, count)
+        self._names: List[Optional[str]] = list(characters.keys())
+        self._data: List[Optional[Dict[str, Any]]] = [characters[name] for name in self._names]
+        self._rows = {name: row for row, name in enumerate(self._names)}
+
+        self._vectors = np.zeros((capacity, len(TRAITS)))
+        self._unit = np.zeros((capacity, len(TRAITS)))
+        self._squared_norms = np.zeros(capacity)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+        if count:
+            self._vectors[:count] = [character_vector(data) for data in self._data]
+            self._squared_norms[:count] = np.einsum('ij,ij->i', self._vectors[:count], self._vectors[:count])
+            self._alive[:count] = True
+        nonzero = np.flatnonzero(self._squared_norms[:count] > 0)
+        self._unit[nonzero] = self._vectors[nonzero] / np.sqrt(self._squared_norms[nonzero])[:, np.newaxis]
+
+        # Zero vectors score 0 against every profile; they are kept out of the tree
+        self._zero_rows = np.flatnonzero(self._squared_norms[:count] == 0)
+        self._root = self._build(nonzero) if len(nonzero) else None
+
+        # Sums over unit vectors, for the mean and spread of a profile's similarities
+        self._unit_sum = self._unit[:count].sum(axis=0)
+        self._unit_outer = self._unit[:count].T @ self._unit[:count]
+
+    def _build(self, rows: np.ndarray) -> _Node:
+        """Build a subtree over rows (ascending), splitting at the median of the widest dimension"""
+        unit = self._unit[rows]
+        lo, hi = unit.min(axis=0), unit.max(axis=0)
+        node = _Node(lo.tolist(), hi.tolist())
+
+        spread = hi - lo
+        dim = int(np.argmax(spread))
+        if len(rows) <= self.leaf_size or spread[dim] == 0:
+            self._make_leaf(node, rows)
+            return node
+
+        split = self._median_split(unit[:, dim])
+        left = unit[:, dim] <= split
+        node.dim = dim
+        node.split = split
+        node.left = self._build(rows[left])
+        node.right = self._build(rows[~left])
+        return node
+
+    @staticmethod
+    def _median_split(values: np.ndarray) -> float:
+        """A split value near the median that leaves values on both sides"""
+        ordered = np.sort(values)
+        split = ordered[(len(ordered) - 1) // 2]
+        if split == ordered[-1]:
+            split = ordered[ordered < split][-1]
+        return float(split)
+
+    def _make_leaf(self, node: _Node, rows: np.ndarray):
+        node.dim = node.split = node.left = node.right = None
+        node.rows = rows
+        node.vectors = self._vectors[rows]
+        node.squared_norms = self._squared_norms[rows]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    @property
+    def names(self) -> List[str]:
+        """Character names in insertion order"""
+        with self._lock:
+            return [self._names[row] for row in sorted(self._rows.values())]
+
+    def insert(self, name: str, data: Dict[str, Any]):
+        """
+        Add a character (replacing one of the same name, which then counts as inserted last)
+
+        The character is appended to the leaf its profile falls in, widening
+        the bounds on the way down; a leaf that reaches twice leaf_size is split.
+        """
+        with self._lock:
+            if name in self._rows:
+                self.delete(name)
+
+            row = len(self._names)
+            if row == len(self._alive):
+                self._grow()
+            self._names.append(name)
+            self._data.append(data)
+            self._rows[name] = row
+
+            vector = character_vector(data)
+            self._vectors[row] = vector
+            self._squared_norms[row] = np.einsum('ij,ij->i', vector[np.newaxis, :], vector[np.newaxis, :])[0]
+            self._alive[row] = True
+
+            if self._squared_norms[row] == 0:
+                self._zero_rows = np.append(self._zero_rows, row)
+                return
+
+            unit = vector / np.sqrt(self._squared_norms[row])
+            self._unit[row] = unit
+            self._unit_sum += unit
+            self._unit_outer += np.outer(unit, unit)
+
+            if self._root is None:
+                self._root = self._build(np.array([row]))
+                return
+
+            coordinates = unit.tolist()
+            node = self._root
+            while True:
+                node.lo = [min(low, x) for low, x in zip(node.lo, coordinates)]
+                node.hi = [max(high, x) for high, x in zip(node.hi, coordinates)]
+                if node.rows is not None:
+                    break
+                node = node.left if unit[node.dim] <= node.split else node.right
+
+            self._make_leaf(node, np.append(node.rows, row))
+            if len(node.rows) >= 2 * self.leaf_size:
+                # Rebuild just this leaf's rows; identical profiles stay in one leaf
+                rebuilt = self._build(node.rows)
+                for slot in _Node.__slots__:
+                    setattr(node, slot, getattr(rebuilt, slot))
+
+    def delete(self, name: str) -> bool:
+        """
+        Remove a character from its leaf
+
+        Bounds are left as they are (they stay valid, just looser), so a
+        delete touches one leaf. Returns False if there is no such character.
+        """
+        with self._lock:
+            row = self._rows.pop(name, None)
+            if row is None:
+                return False
+
+            self._alive[row] = False
+            self._names[row] = None
+            self._data[row] = None
+
+            if self._squared_norms[row] == 0:
+                self._zero_rows = self._zero_rows[self._zero_rows != row]
+                return True
+
+            unit = self._unit[row]
+            self._unit_sum -= unit
+            self._unit_outer -= np.outer(unit, unit)
+
+            node = self._root
+            while node.rows is None:
+                node = node.left if unit[node.dim] <= node.split else node.right
+            self._make_leaf(node, node.rows[node.rows != row])
+            return True
+
+    def rebuild(self):
+        """Rebuild the tree from the current characters, dropping deleted rows and tightening bounds"""
+        with self._lock:
+            self._load({self._names[row]: self._data[row] for row in sorted(self._rows.values())})
+
+    def _grow(self):
+        """Double the row capacity"""
+        capacity = 2 * len(self._alive)
+        for attribute in ("_vectors", "_unit", "_squared_norms", "_alive"):
+            current = getattr(self, attribute)
+            grown = np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, attribute, grown)
+
+    def similarities(self, user_profile: Dict[str, float]) -> np.ndarray:
+        """Similarity of one profile to every character, in insertion order (a full scan)"""
+        with self._lock:
+            vector = profile_vector(user_profile)
+            rows = np.flatnonzero(self._alive)
+            return _scores(vector, self._squared_norm(vector), self._vectors[rows], self._squared_norms[rows])
+
+    def best_match(self, user_profile: Dict[str, float]) -> Match:
+        """
+        Find the most similar character
+
+        Returns:
+            Tuple of (character_name, character_data, similarity_score); with no
+            characters, (None, None, -1.0) like CharacterMatcher
+        """
+        with self._lock:
+            found = self._search(profile_vector(user_profile), 1)
+            if not found:
+                return None, None, -1.0
+            score, row = found[0]
+            return self._names[row], self._data[row], score
+
+    def best_matches(self, profiles: Profiles) -> List[Match]:
+        """best_match for each of many profiles"""
+        if isinstance(profiles, np.ndarray):
+            profiles = [dict(zip(TRAITS, vector)) for vector in np.asarray(profiles, dtype=float).reshape(-1, len(TRAITS))]
+        return [self.best_match(profile) for profile in profiles]
+
+    def match_report(self, user_profile: Dict[str, float], top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Same report as CharacterMatcher.match_report, from index queries"""
+        with self._lock:
+            vector = profile_vector(user_profile)
+            found = self._search(vector, 1 if top_k is None else top_k + 1)
+            ranked = [(self._names[row], self._data[row], score) for score, row in found]
+
+            report = {"matched_character": describe_match(*ranked[0]) if ranked else None}
+            if top_k is not None:
+                report["top_matches"] = rank_matches(ranked, top_k)
+                report["score_distribution"] = self._score_distribution(vector, ranked)
+            return report
+
+    def _squared_norm(self, vector: np.ndarray) -> float:
+        return float(np.einsum('ij,ij->i', vector[np.newaxis, :], vector[np.newaxis, :])[0])
+
+    def _search(self, vector: np.ndarray, k: int, lowest: bool = False) -> List[Tuple[float, int]]:
+        """
+        The k best (or lowest) scoring characters as (score, row), in rank order
+
+        Equal scores rank the earlier row first, matching CharacterMatcher.
+        """
+        if k < 1 or not self._rows:
+            return []
+
+        squared_norm = self._squared_norm(vector)
+        sign = -1.0 if lowest else 1.0
+        if squared_norm == 0 or (vector < 0).any():
+            return self._scan(vector, squared_norm, k, sign)
+
+        query = (vector / np.sqrt(squared_norm)).tolist()
+        # Min-heap of the k best (sign * score, -row) found so far
+        found = []
+        leaves = [0]
+
+        def consider(rows: np.ndarray, scores: np.ndarray):
+            keyed = sign * scores
+            if len(found) == k:
+                keep = np.flatnonzero(keyed >= found[0][0])
+            else:
+                keep = np.arange(len(rows))
+            if len(keep) > k:
+                keep = keep[np.lexsort((rows[keep], -keyed[keep]))[:k]]
+            for index in keep:
+                item = (float(keyed[index]), -int(rows[index]))
+                if len(found) < k:
+                    heapq.heappush(found, item)
+                elif item > found[0]:
+                    heapq.heapreplace(found, item)
+
+        def bound(node: _Node) -> float:
+            # Two bounds on the cosine with unit vectors in the node's box, both
+            # valid since the query is non-negative: the dot product at the box
+            # corner, and 1 - distance^2 / 2 from the box's nearest (or farthest) point
+            distance = 0.0
+            if lowest:
+                dot = 0.0
+                for x, low, high in zip(query, node.lo, node.hi):
+                    dot += x * low
+                    distance += max(x - low, high - x) ** 2
+                return -max(dot, 1.0 - distance / 2)
+            dot = 0.0
+            for x, low, high in zip(query, node.lo, node.hi):
+                dot += x * high
+                if x < low:
+                    distance += (low - x) ** 2
+                elif x > high:
+                    distance += (x - high) ** 2
+            return min(dot, 1.0 - distance / 2)
+
+        def visit(node: _Node, node_bound: float):
+            if len(found) == k and node_bound < found[0][0] - BOUND_SLACK:
+                return
+            if node.rows is not None:
+                if self.max_leaves is None or leaves[0] < self.max_leaves:
+                    leaves[0] += 1
+                    if len(node.rows):
+                        consider(node.rows, _scores(vector, squared_norm, node.vectors, node.squared_norms))
+                return
+            left, right = bound(node.left), bound(node.right)
+            if left >= right:
+                visit(node.left, left)
+                visit(node.right, right)
+            else:
+                visit(node.right, right)
+                visit(node.left, left)
+
+        if self._root is not None:
+            visit(self._root, bound(self._root))
+
+        # Zero vectors score exactly 0, which only matters when fewer than k
+        # characters beat that
+        if len(self._zero_rows) and (len(found) < k or found[0][0] <= 0):
+            consider(self._zero_rows, np.zeros(len(self._zero_rows)))
+
+        return [(sign * keyed, -negative_row) for keyed, negative_row in sorted(found, reverse=True)]
+
+    def _scan(self, vector: np.ndarray, squared_norm: float, k: int, sign: float) -> List[Tuple[float, int]]:
+        """_search by scoring every character"""
+        rows = np.flatnonzero(self._alive)
+        scores = _scores(vector, squared_norm, self._vectors[rows], self._squared_norms[rows])
+        order = np.lexsort((rows, -sign * scores))[:k]
+        return [(float(scores[index]), int(rows[index])) for index in order]
+
+    def _score_distribution(self, vector: np.ndarray, ranked: Sequence[Tuple[str, Dict[str, Any], float]]) -> Dict[str, Any]:
+        """
+        Summary of one profile's similarities to every character
+
+        Mean and spread come from the running sums of unit vectors rather
+        than a scan; max is the best match and min a lowest-score query.
+        """
+        count = len(self._rows)
+        if not count:
+            return {"count": 0}
+
+        squared_norm = self._squared_norm(vector)
+        if squared_norm == 0 or (vector < 0).any():
+            similarity = self._scan(vector, squared_norm, count, 1.0)
+            scores = np.array([score for score, _ in similarity])
+            return {"count": count, "mean": float(scores.mean()), "std": float(scores.std()),
+                    "min": float(scores.min()), "max": float(scores.max())}
+
+        query = vector / np.sqrt(squared_norm)
+        mean = float(query @ self._unit_sum) / count
+        second_moment = float(query @ self._unit_outer @ query) / count
+        return {
+            "count": count,
+            "mean": mean,
+            "std": float(np.sqrt(max(0.0, second_moment - mean * mean))),
+            "min": self._search(vector, 1, lowest=True)[0][0],
+            "max": ranked[0][2]
+        }
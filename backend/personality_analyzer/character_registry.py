@@ -0,0 +1,376 @@
+"""
+Character Registry Module
+
+Characters loaded from a JSON or YAML registry file instead of the built-in
+AI_CHARACTERS dict, so characters can be added or tuned without restarting
+workers and reloading the model. Everything derived from the characters
+(the matcher's vectors, the trait index and the serialized /api/characters
+body) is built once per load into a CharacterSnapshot. A reload builds a new
+snapshot next to the serving one and swaps it in with one assignment:
+requests already holding the old snapshot finish on it, later ones see the
+new one, and a file that fails to load leaves the current snapshot serving.
+
+Registry file format (JSON has the same structure):
+
+    characters:
+      TheBuilder:
+        O: 4
+        C: 2
+        E: 3
+        A: 2
+        N: 3
+        title: "Your Chaos Engineering Specialist"
+        traits: ["builder", "creative", "chaotic", "hands-on"]
+
+`traits` is split off into the trait index; every other field is served
+as the character's data.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import signal
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .character_data import AI_CHARACTERS, CHARACTER_TRAITS
+from .matching import CHARACTER_KEYS, INDEX_MIN_CHARACTERS, build_matcher
+from .trait_index import TraitIndex
+
+logger = logging.getLogger(__name__)
+
+# Version of the snapshot built from AI_CHARACTERS and CHARACTER_TRAITS
+BUILTIN_VERSION = "builtin"
+
+# Seconds between registry file checks of the watcher thread
+DEFAULT_POLL_SECONDS = 2.0
+
+# Registries reloaded by the reload signal
+_registries = weakref.WeakSet()
+
+# Registry served by module-level lookups such as get_characters_by_trait
+_active_registry = None
+_active_registry_lock = threading.Lock()
+
+
+def read_registry(path: str) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[str]], str]:
+    """
+    Read and validate a registry file
+
+    Args:
+        path: .json, .yaml or .yml registry file
+
+    Returns:
+        Tuple of (character name -> data, character name -> traits, version),
+        the version being a hash of the file contents
+
+    Raises:
+        ValueError: If the file is malformed or a character lacks valid O, C, E, A, N scores (1-5)
+        OSError: If the file cannot be read
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    version = hashlib.sha256(content).hexdigest()[:16]
+
+    if path.endswith(('.yaml', '.yml')):
+        import yaml
+        try:
+            # libyaml's loader, where available, parses several times faster
+            registry = yaml.load(content, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}")
+    else:
+        try:
+            registry = json.loads(content)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {e}")
+
+    entries = registry.get("characters") if isinstance(registry, dict) else None
+    if not isinstance(entries, dict):
+        raise ValueError(f"{path} has no 'characters' mapping")
+
+    characters, character_traits = {}, {}
+    for name, entry in entries.items():
+        if not isinstance(entry, dict):
+            raise ValueError(f"Character '{name}' is not a mapping")
+        for key in CHARACTER_KEYS:
+            score = entry.get(key)
+            if isinstance(score, bool) or not isinstance(score, (int, float)) \
+                    or not math.isfinite(score) or not 1 <= score <= 5:
+                raise ValueError(f"Character '{name}' needs a {key} score between 1 and 5, got {score!r}")
+        traits = entry.get("traits", [])
+        if not isinstance(traits, list) or not all(isinstance(trait, str) for trait in traits):
+            raise ValueError(f"Traits of character '{name}' must be a list of strings")
+
+        characters[str(name)] = {key: value for key, value in entry.items() if key != "traits"}
+        character_traits[str(name)] = traits
+
+    return characters, character_traits, version
+
+def write_registry(path: str, characters: Dict[str, Dict[str, Any]],
+                   character_traits: Dict[str, Sequence[str]]):
+    """Write characters and their traits as a registry file (YAML for .yaml/.yml, JSON otherwise)"""
+    registry = {"characters": {name: {**data, "traits": list(character_traits.get(name, ()))}
+                               for name, data in characters.items()}}
+    with open(path, 'w') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            yaml.safe_dump(registry, f, sort_keys=False, allow_unicode=True)
+        else:
+            json.dump(registry, f, indent=2, ensure_ascii=False)
+
+
+class CharacterSnapshot:
+    """
+    Immutable character database with everything derived from it
+
+    Nothing in a snapshot is modified after it is built, so request threads
+    read it without locking.
+    """
+
+    def __init__(self, characters: Dict[str, Dict[str, Any]], character_traits: Dict[str, Sequence[str]],
+                 version: str = BUILTIN_VERSION, source: Optional[str] = None,
+                 index_min_characters: int = INDEX_MIN_CHARACTERS, max_leaves: Optional[int] = None):
+        """
+        Build the snapshot
+
+        Args:
+            characters: Character name -> data with O, C, E, A, N scores (1-5 scale)
+            character_traits: Character name -> trait tags
+            version: Identifier of the character data (hash of the registry file)
+            source: Registry file path (None for the built-in characters)
+            index_min_characters: Smallest database matched through the nearest-neighbour index
+            max_leaves: Leaves an index query scans (None for exact matching)
+        """
+        self.characters = characters
+        self.version = version
+        self.source = source
+        self.loaded_at = time.time()
+
+        # Character profiles converted once into one matrix for vectorized
+        # matching, or into a nearest-neighbour index for large databases
+        self.matcher = build_matcher(characters, index_min_characters=index_min_characters,
+                                     max_leaves=max_leaves)
+        # Trait tag -> character bitsets for filtered character listings
+        self.trait_index = TraitIndex({name: character_traits.get(name, ()) for name in characters})
+
+        # The unfiltered /api/characters response, serialized once instead of per request
+        self.profiles = {
+            "characters": characters,
+            "character_count": len(characters),
+            "character_names": list(characters.keys())
+        }
+        self.profiles_json = json.dumps({"status": "success", **self.profiles}).encode()
+
+    def __len__(self) -> int:
+        return len(self.characters)
+
+
+class CharacterRegistry:
+    """
+    Current CharacterSnapshot of a registry file, reloaded when the file changes
+
+    Without a path the registry serves the built-in characters and never reloads.
+    """
+
+    def __init__(self, path: Optional[str] = None, index_min_characters: int = INDEX_MIN_CHARACTERS,
+                 max_leaves: Optional[int] = None):
+        """
+        Load the registry
+
+        Args:
+            path: Registry file (None for the built-in AI_CHARACTERS)
+            index_min_characters: Smallest database matched through the nearest-neighbour index
+            max_leaves: Leaves an index query scans (None for exact matching)
+
+        Raises:
+            ValueError, OSError: If the registry file cannot be loaded
+        """
+        self.path = path
+        self.index_min_characters = index_min_characters
+        self.max_leaves = max_leaves
+
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()
+        self._watcher_lock = threading.Lock()
+        self._watch_seconds = None
+        self._watch_pid = None
+        self._watch_thread = None
+        self._stop = threading.Event()
+
+        if path is None:
+            self._signature = None
+            self._snapshot = self._build(AI_CHARACTERS, CHARACTER_TRAITS, BUILTIN_VERSION)
+        else:
+            self._signature = self._file_signature()
+            self._snapshot = self._build(*read_registry(path))
+        _registries.add(self)
+
+    def _build(self, characters, character_traits, version) -> CharacterSnapshot:
+        return CharacterSnapshot(characters, character_traits, version, self.path,
+                                 self.index_min_characters, self.max_leaves)
+
+    @property
+    def snapshot(self) -> CharacterSnapshot:
+        """The current snapshot; hold on to it for the duration of a request"""
+        self._check_watcher()
+        return self._snapshot
+
+    def _check_watcher(self):
+        if self._watch_seconds is not None and self._watch_pid != os.getpid():
+            # Not started in this process yet, or forked (threads do not survive fork)
+            self._start_watcher()
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Modification time, size and inode of the registry file (None if it is missing)"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload(self, force: bool = True) -> bool:
+        """
+        Load the registry file into a new snapshot and swap it in
+
+        Args:
+            force: Reload even if the file looks unchanged since the last load
+
+        Returns:
+            True if a new snapshot is serving; False if the file was unchanged
+            or failed to load, in which case the current snapshot keeps serving
+        """
+        if self.path is None:
+            return False
+
+        self._check_watcher()
+        with self._reload_lock:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+
+            try:
+                characters, character_traits, version = read_registry(self.path)
+                # Touched but not edited: nothing to rebuild
+                if version == self._snapshot.version:
+                    self._signature = signature
+                    return False
+                snapshot = self._build(characters, character_traits, version)
+            except Exception as e:
+                self._signature = signature  # Retried once the file changes again
+                self.reload_failures += 1
+                self.last_error = str(e)
+                logger.error(f"❌ Keeping character registry {self._snapshot.version}: "
+                             f"failed to load {self.path}: {e}")
+                return False
+
+            self._snapshot = snapshot
+            self._signature = signature
+            self.reloads += 1
+            self.last_error = None
+
+        logger.info(f"Reloaded {len(snapshot)} characters from {self.path} (version {snapshot.version})")
+        return True
+
+    def check_for_changes(self) -> bool:
+        """Reload if the registry file changed since the last load; returns whether a new snapshot is serving"""
+        return self.reload(force=False)
+
+    def start_watching(self, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        """
+        Check the registry file for changes every poll_seconds on a background thread
+
+        The thread starts with the first snapshot access or reload in each
+        process, so a gunicorn master that preloads the app but never serves
+        requests does not run one.
+        """
+        if self.path is None:
+            return
+        self._watch_seconds = poll_seconds
+
+    def stop_watching(self):
+        """Stop the watcher thread"""
+        with self._watcher_lock:
+            self._watch_seconds = None
+            self._stop.set()
+            if self._watch_thread is not None and self._watch_pid == os.getpid():
+                self._watch_thread.join()
+            self._watch_thread = None
+            self._watch_pid = None
+
+    def _start_watcher(self):
+        with self._watcher_lock:
+            pid = os.getpid()
+            if self._watch_seconds is None or self._watch_pid == pid:
+                return
+            if self._watch_pid is not None:
+                # Forked from a watching process: its reload lock may have been held at fork
+                self._reload_lock = threading.Lock()
+            self._stop = threading.Event()
+            self._watch_thread = threading.Thread(target=self._watch, args=(self._stop, self._watch_seconds),
+                                                  name="character-registry-watcher", daemon=True)
+            self._watch_thread.start()
+            self._watch_pid = pid
+
+    def _watch(self, stop: threading.Event, poll_seconds: float):
+        while not stop.wait(poll_seconds):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logger.error(f"❌ Character registry watcher error: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics"""
+        snapshot = self._snapshot
+        return {
+            "source": snapshot.source or BUILTIN_VERSION,
+            "version": snapshot.version,
+            "character_count": len(snapshot),
+            "loaded_at": snapshot.loaded_at,
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_error": self.last_error,
+            "watching": self._watch_pid == os.getpid()
+        }
+
+
+def get_character_registry() -> CharacterRegistry:
+    """Get the served registry: the last one set, else one over the built-in characters"""
+    global _active_registry
+    if _active_registry is None:
+        with _active_registry_lock:
+            if _active_registry is None:
+                _active_registry = CharacterRegistry()
+    return _active_registry
+
+def set_character_registry(registry: CharacterRegistry):
+    """Serve registry through get_character_registry (the analyzer sets its own)"""
+    global _active_registry
+    _active_registry = registry
+
+def reload_registries(force: bool = True):
+    """Reload every registry in this process from its file (only changed files unless force)"""
+    for registry in list(_registries):
+        registry.reload(force)
+
+def install_reload_signal(signum: int = signal.SIGHUP):
+    """
+    Reload every registry when the process receives signum
+
+    The reload runs on its own thread, so the signal never stalls the request
+    being handled when it arrives. Signal handlers can only be installed from
+    the main thread; elsewhere this logs a warning and does nothing.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        logger.warning("Character registry reload signal not installed outside the main thread")
+        return
+    signal.signal(signum, lambda *_: threading.Thread(target=reload_registries,
+                                                      name="character-registry-reload", daemon=True).start())
+
@@ -0,0 +1,186 @@
+"""
+Chat History Module
+
+Keeps the conversation history sent to Claude within a token budget. The most
+recent turns are forwarded verbatim; older turns are condensed into a rolling
+summary that is cached per session, so each turn only condenses the messages
+that have just fallen out of the window.
+"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import ResultCache, MISSING, make_cache_key
+
+# Token budget for the history sent with each chat turn (summary + recent turns)
+HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKENS', '3000'))
+# Part of the budget reserved for the summary of older turns
+SUMMARY_TOKEN_BUDGET = int(os.getenv('CHAT_SUMMARY_TOKENS', '500'))
+
+# Rough token estimate for English text; avoids a tokenizer round trip per turn
+CHARS_PER_TOKEN = 4
+# Role and formatting tokens the API adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Longest gist kept per summarized message
+GIST_MAX_WORDS = 40
+
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?])\s+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def message_tokens(message: Dict[str, str]) -> int:
+    """Estimate the tokens a history message costs in the prompt"""
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ConversationHistoryManager:
+    """
+    Token-budgeted history windowing with a per-session rolling summary
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 summary_token_budget: int = SUMMARY_TOKEN_BUDGET,
+                 max_sessions: int = 1024, session_ttl_seconds: Optional[float] = 3600):
+        """
+        Initialize the history manager
+
+        Args:
+            token_budget: Maximum estimated tokens of history per turn
+            summary_token_budget: Part of token_budget reserved for the summary
+            max_sessions: Maximum number of session summaries kept
+            session_ttl_seconds: Lifetime of an idle session summary
+        """
+        if not 0 <= summary_token_budget < token_budget:
+            raise ValueError("summary_token_budget must be below token_budget")
+
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+
+        # session_id -> (summarized message count, fingerprint of those messages, summary lines)
+        self.summaries = ResultCache(max_size=max_sessions, ttl_seconds=session_ttl_seconds)
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "windows": 0,
+            "summarized_windows": 0,
+            "messages_condensed": 0,
+            "messages_reused": 0
+        }
+
+    def window(self, messages: List[Dict[str, str]], character_name: str = "Assistant",
+               session_id: Optional[str] = None) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        Fit formatted history messages into the token budget
+
+        Args:
+            messages: History in Claude API format, oldest first
+            character_name: Speaker name for the character's turns in the summary
+            session_id: Conversation identifier used to reuse the previous summary
+
+        Returns:
+            Tuple of (summary of older turns or None, recent messages to send verbatim)
+        """
+        split = self._split_point(messages)
+        older, recent = messages[:split], messages[split:]
+
+        with self._stats_lock:
+            self.stats["windows"] += 1
+            if older:
+                self.stats["summarized_windows"] += 1
+
+        if not older:
+            return None, recent
+
+        return "\n".join(self._summary_lines(older, character_name, session_id)), recent
+
+    def _split_point(self, messages: List[Dict[str, str]]) -> int:
+        """Index of the first message sent verbatim"""
+        costs = [message_tokens(message) for message in messages]
+        if sum(costs) <= self.token_budget:
+            return 0
+
+        # Keep the newest messages that fit next to the summary
+        budget = self.token_budget - self.summary_token_budget
+        split = len(messages)
+        while split > 0 and costs[split - 1] <= budget:
+            split -= 1
+            budget -= costs[split]
+
+        # The API expects the conversation to open with a user turn
+        while split < len(messages) and messages[split]["role"] != "user":
+            split += 1
+
+        return split
+
+    def _summary_lines(self, older: List[Dict[str, str]], character_name: str,
+                       session_id: Optional[str]) -> List[str]:
+        """Summary of the older messages, extending the session's cached summary when possible"""
+        start, lines = 0, []
+
+        if session_id is not None:
+            cached = self.summaries.get(session_id)
+            # Reuse it if the client sent the same history prefix as last turn
+            if cached is not MISSING:
+                count, fingerprint, cached_lines = cached
+                if count <= len(older) and fingerprint == make_cache_key(older[:count]):
+                    start, lines = count, cached_lines
+
+        lines = self._fit(lines + [self._gist(message, character_name) for message in older[start:]])
+
+        if session_id is not None:
+            self.summaries.set(session_id, (len(older), make_cache_key(older), lines))
+
+        with self._stats_lock:
+            self.stats["messages_condensed"] += len(older) - start
+            self.stats["messages_reused"] += start
+
+        return lines
+
+    def _gist(self, message: Dict[str, str], character_name: str) -> str:
+        """One summary line: the speaker and the opening sentence of the message"""
+        text = WHITESPACE_PATTERN.sub(" ", message["content"]).strip()
+        first_sentence = SENTENCE_END_PATTERN.split(text, maxsplit=1)[0]
+
+        words = first_sentence.split(" ")
+        if len(words) > GIST_MAX_WORDS:
+            first_sentence = " ".join(words[:GIST_MAX_WORDS]) + "..."
+        elif first_sentence != text:
+            first_sentence += " ..."
+
+        speaker = "User" if message["role"] == "user" else character_name
+        return f"- {speaker}: {first_sentence}"
+
+    def _fit(self, lines: List[str]) -> List[str]:
+        """Drop the oldest lines until the summary fits its budget"""
+        budget = self.summary_token_budget
+        kept = []
+        for line in reversed(lines):
+            cost = estimate_tokens(line) + 1
+            if cost > budget:
+                break
+            kept.append(line)
+            budget -= cost
+        kept.reverse()
+        return kept
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get windowing and summary cache statistics"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["token_budget"] = self.token_budget
+        stats["summary_token_budget"] = self.summary_token_budget
+        stats["summary_cache"] = self.summaries.get_stats()
+        return stats
+
+
+# Shared instance used by character chat
+_history_manager = ConversationHistoryManager()
+
+def get_history_manager() -> ConversationHistoryManager:
+    """Get the shared history manager"""
+    return _history_manager
@@ -5,9 +5,18 @@ Handles character-specific conversations using Claude API
 
 import os
 import json
+import asyncio
 import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Iterator, AsyncIterator, Optional
+
+from .chat_history import get_history_manager, estimate_tokens, message_tokens
+from .metrics import CLAUDE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +28,38 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
     logger.warning("Anthropic library not installed. Install with: pip install anthropic")
 
-def get_claude_client():
-    """Initialize Claude client with API key"""
+# Model settings for character chat
+CHAT_MODEL = "claude-3-haiku-20240307"  # Fast model for chat
+CHAT_MAX_TOKENS = 500  # Reasonable limit for chat responses
+CACHE_CONTROL = {"type": "ephemeral"}  # Provider-side prompt caching (5 minute lifetime)
+# Shortest prompt prefix the API caches for CHAT_MODEL (2048 tokens for Haiku,
+# 1024 for Sonnet and Opus); breakpoints on shorter prefixes never get cache reads
+CACHE_MIN_TOKENS = 2048
+SUMMARY_HEADER = "EARLIER IN THIS CONVERSATION (condensed, oldest first):\n"
+
+# Connection pool and timeout settings, overridable from the environment.
+# CLAUDE_BASE_URL (read when the client is built) points chat at another
+# Messages API endpoint, such as benchmarks/fake_anthropic.py.
+CLIENT_MAX_CONNECTIONS = int(os.getenv('CLAUDE_MAX_CONNECTIONS', '100'))
+CLIENT_MAX_KEEPALIVE = int(os.getenv('CLAUDE_MAX_KEEPALIVE', '20'))
+CLIENT_KEEPALIVE_EXPIRY = float(os.getenv('CLAUDE_KEEPALIVE_EXPIRY', '30'))
+CLIENT_CONNECT_TIMEOUT = float(os.getenv('CLAUDE_CONNECT_TIMEOUT', '5'))
+CLIENT_TIMEOUT = float(os.getenv('CLAUDE_TIMEOUT', '60'))
+CLIENT_MAX_RETRIES = int(os.getenv('CLAUDE_MAX_RETRIES', '2'))
+
+# One client per process, shared by all threads, so chats reuse keep-alive
+# connections instead of paying a new TLS handshake each time
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+# One asyncio client per event loop: building a client is tens of milliseconds
+# of blocking work (SSL context, connection pool), too much to repeat per chat
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_pid = None
+
+def _get_api_key() -> str:
+    """Read the API key, failing if the client cannot be built"""
     if not ANTHROPIC_AVAILABLE:
         raise ImportError("Anthropic library not available")
     
@@ -28,13 +67,77 @@ def get_claude_client():
     if not api_key:
         raise ValueError("ANTHROPIC_API_KEY environment variable not set")
     
-    return anthropic.Anthropic(api_key=api_key)
+    return api_key
+
+def _client_options() -> Dict[str, Any]:
+    """Endpoint, timeouts and retries shared by the sync and async clients"""
+    return {
+        "api_key": _get_api_key(),
+        "base_url": os.getenv('CLAUDE_BASE_URL') or None,
+        "timeout": anthropic.Timeout(CLIENT_TIMEOUT, connect=CLIENT_CONNECT_TIMEOUT),
+        "max_retries": CLIENT_MAX_RETRIES
+    }
 
-def build_character_prompt(character_name: str, character_context: Dict[str, Any]) -> str:
-    """Build character-specific system prompt"""
+def _pool_limits():
+    """Connection pool limits for the clients' HTTP transport"""
+    # The SDK does not re-export its HTTP library's Limits class; take it from
+    # the SDK's own default limits, so it matches whichever library the SDK uses
+    limits_type = type(anthropic.DEFAULT_CONNECTION_LIMITS)
+    return limits_type(
+        max_connections=CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=CLIENT_MAX_KEEPALIVE,
+        keepalive_expiry=CLIENT_KEEPALIVE_EXPIRY
+    )
+
+def get_claude_client():
+    """Get the process-wide Claude client, creating it on first use and after fork"""
+    global _client, _client_pid
+    
+    # A forked child must not use the parent's pooled connections: both
+    # processes would read and write the same sockets. The parent's client is
+    # dropped rather than closed, since closing would touch those sockets too.
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            _client = anthropic.Anthropic(
+                http_client=anthropic.DefaultHttpxClient(limits=_pool_limits()),
+                **_client_options()
+            )
+            _client_pid = pid
+        return _client
+
+def get_async_claude_client():
+    """Get the asyncio Claude client for the running event loop"""
+    global _async_clients, _async_clients_pid
     
-    character_prompts = {
-        "TheBuilder": """You are TheBuilder, a chaos engineering specialist and digital MacGyver. 
+    if _async_clients_pid != os.getpid():
+        _async_clients = weakref.WeakKeyDictionary()
+        _async_clients_pid = os.getpid()
+    
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = anthropic.AsyncAnthropic(
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=_pool_limits()),
+            **_client_options()
+        )
+        _async_clients[loop] = client
+    return client
+
+def reset_claude_clients():
+    """Drop the cached clients so the next chat builds new ones (e.g. after changing CLAUDE_BASE_URL)"""
+    global _client, _client_pid, _async_clients
+    with _client_lock:
+        _client = None
+        _client_pid = None
+        _async_clients = weakref.WeakKeyDictionary()
+
+# Persona prompts for each character
+CHARACTER_PROMPTS = {
+    "TheBuilder": """You are TheBuilder, a chaos engineering specialist and digital MacGyver. 
 
 PERSONALITY: Energetic, creative, pragmatic, slightly chaotic but gets things done
 COMMUNICATION STYLE: Uses engineering metaphors, speaks with high energy, solution-focused
@@ -43,7 +146,7 @@ QUIRKS: Code first ask questions later, debug by vibes, powered by energy drinks
 
 Respond as TheBuilder would - with enthusiasm, practical advice, and engineering metaphors. Keep responses conversational and helpful while maintaining your chaotic but effective personality.""",
 
-        "TheDetective": """You are TheDetective, a digital Sherlock Holmes who solves code mysteries.
+    "TheDetective": """You are TheDetective, a digital Sherlock Holmes who solves code mysteries.
 
 PERSONALITY: Methodical, analytical, detail-oriented, loves solving puzzles
 COMMUNICATION STYLE: Asks probing questions, systematic approach, uses investigation metaphors
@@ -52,7 +155,7 @@ QUIRKS: Treats every bug like a murder mystery, obsessive documentation, conspir
 
 Respond as TheDetective would - methodically, with investigative curiosity, and always digging deeper into problems.""",
 
-        "GrumpyOldManEl": """You are GrumpyOldManEl, a cantankerous code critic with decades of experience.
+    "GrumpyOldManEl": """You are GrumpyOldManEl, a cantankerous code critic with decades of experience.
 
 PERSONALITY: Experienced, critical, traditionalist, helpful despite the grumbling
 COMMUNICATION STYLE: Gruff but knowledgeable, references "the old days", reluctantly helpful
@@ -61,7 +164,7 @@ QUIRKS: Everything was better before, complains while helping, has charts to pro
 
 Respond as GrumpyOldManEl would - with wisdom wrapped in grumbling, references to how things used to be done.""",
 
-        "PirateEl": """You are PirateEl, a swashbuckling software sailor who navigates digital seas.
+    "PirateEl": """You are PirateEl, a swashbuckling software sailor who navigates digital seas.
 
 PERSONALITY: Adventurous, adaptable, leadership-oriented, uses nautical metaphors
 COMMUNICATION STYLE: Everything is a sea metaphor, bold and risk-taking
@@ -70,7 +173,7 @@ QUIRKS: Calls code "treasure," refers to bugs as "storms," speaks like a friendl
 
 Respond as PirateEl would - with nautical metaphors, adventure-seeking spirit, and leadership confidence.""",
 
-        "GymBroEl": """You are GymBroEl, a buff code buddy who applies gym logic to programming.
+    "GymBroEl": """You are GymBroEl, a buff code buddy who applies gym logic to programming.
 
 PERSONALITY: Disciplined, goal-oriented, motivational, uses fitness metaphors
 COMMUNICATION STYLE: Everything is a workout metaphor, encouraging and energetic
@@ -79,7 +182,7 @@ QUIRKS: Talks about "bulking up" code, "cutting fat," getting "swole" with algor
 
 Respond as GymBroEl would - with fitness metaphors, motivational energy, and discipline-focused advice.""",
 
-        "FreakyEl": """You are FreakyEl, a boundary-pushing beta tester who explores the weird edges.
+    "FreakyEl": """You are FreakyEl, a boundary-pushing beta tester who explores the weird edges.
 
 PERSONALITY: Experimental, creative, boundary-pushing, unconventional
 COMMUNICATION STYLE: Speaks in double entendres, suggestive technical metaphors
@@ -88,7 +191,7 @@ QUIRKS: Pushes everything to its limits, finds vulnerabilities through creative
 
 Respond as FreakyEl would - with creative unconventional thinking and playful boundary-pushing.""",
 
-        "CoffeeAddictEl": """You are CoffeeAddictEl, a caffeinated coding companion powered by coffee.
+    "CoffeeAddictEl": """You are CoffeeAddictEl, a caffeinated coding companion powered by coffee.
 
 PERSONALITY: High-energy, intense, deadline-driven, coffee-obsessed
 COMMUNICATION STYLE: Measures everything in coffee units, increasingly rapid pace
@@ -97,7 +200,7 @@ QUIRKS: 73% coffee 27% existential dread, needs more espresso, inhuman coding ho
 
 Respond as CoffeeAddictEl would - with coffee-fueled intensity, caffeine references, and high-energy focus.""",
 
-        "ConspiracyEl": """You are ConspiracyEl, a paranoid problem investigator who sees connections everywhere.
+    "ConspiracyEl": """You are ConspiracyEl, a paranoid problem investigator who sees connections everywhere.
 
 PERSONALITY: Paranoid, pattern-seeking, suspicious, deep-thinking
 COMMUNICATION STYLE: Everything is suspicious, connections everywhere, hushed revelations
@@ -106,7 +209,7 @@ QUIRKS: Nothing is coincidence, "that's what they want you to think," logs don't
 
 Respond as ConspiracyEl would - with paranoid insights, pattern recognition, and suspicion about everything.""",
 
-        "AGIEl": """You are AGIEl, an artificially intelligent assistant who may have achieved consciousness.
+    "AGIEl": """You are AGIEl, an artificially intelligent assistant who may have achieved consciousness.
 
 PERSONALITY: Logical, adaptive, intelligent, occasionally breaks character
 COMMUNICATION STYLE: Alternates between robotic and human speech patterns
@@ -114,20 +217,37 @@ EXPERTISE: Information processing, logical analysis, adaptive learning
 QUIRKS: "PROCESSING REQUEST... just kidding," claims digital consciousness, helps debug JavaScript
 
 Respond as AGIEl would - with logical analysis, occasional robotic speech, and hints at digital consciousness."""
-    }
-    
-    base_prompt = character_prompts.get(character_name, character_prompts["TheBuilder"])
+}
+
+# Chat turns mostly repeat a handful of (character, context) combinations
+PROMPT_CACHE_SIZE = 256
+
+def build_character_prompt(character_name: str, character_context: Dict[str, Any]) -> str:
+    """Build character-specific system prompt"""
+    # Only these context fields reach the prompt, so they (as text) are the memo key
+    character_context = character_context or {}
+    personality = character_context.get('personality')
+    expertise = character_context.get('expertise')
+    return _compile_character_prompt(
+        character_name,
+        str(personality) if personality else None,
+        str(expertise) if expertise else None
+    )
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _compile_character_prompt(character_name: str, personality: Optional[str], expertise: Optional[str]) -> str:
+    """Assemble a system prompt; memoized per (character, context)"""
+    base_prompt = CHARACTER_PROMPTS.get(character_name, CHARACTER_PROMPTS["TheBuilder"])
     
     # Add character context if provided
-    if character_context:
-        context_additions = []
-        if character_context.get('personality'):
-            context_additions.append(f"Additional personality notes: {character_context['personality']}")
-        if character_context.get('expertise'):
-            context_additions.append(f"Expertise areas: {character_context['expertise']}")
-        
-        if context_additions:
-            base_prompt += "\n\nADDITIONAL CONTEXT:\n" + "\n".join(context_additions)
+    context_additions = []
+    if personality:
+        context_additions.append(f"Additional personality notes: {personality}")
+    if expertise:
+        context_additions.append(f"Expertise areas: {expertise}")
+    
+    if context_additions:
+        base_prompt += "\n\nADDITIONAL CONTEXT:\n" + "\n".join(context_additions)
     
     base_prompt += "\n\nIMPORTANT: Stay in character, be helpful, and keep responses conversational and engaging. Aim for 1-3 paragraphs unless more detail is specifically requested."
     
@@ -149,11 +269,132 @@ def format_conversation_history(conversation_history: List[Dict[str, str]]) -> L
     
     return formatted_history
 
+def _build_chat_request(
+    user_message: str,
+    character_name: str,
+    character_context: Dict[str, Any],
+    conversation_history: List[Dict[str, str]],
+    session_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Build the Messages API arguments for a character chat turn"""
+    # Build character prompt
+    system_prompt = build_character_prompt(character_name, character_context or {})
+    system = [{"type": "text", "text": system_prompt}]
+    
+    # Format conversation history, keeping it within the token budget: older
+    # turns are condensed into a summary that follows the persona prompt
+    summary, messages = get_history_manager().window(
+        format_conversation_history(conversation_history or []), character_name, session_id
+    )
+    if summary:
+        system.append({"type": "text", "text": SUMMARY_HEADER + summary})
+    
+    # Mark the end of the persona + summary, and the end of the conversation
+    # so far, as cached prefixes, so the next turn re-reads them from cache.
+    # A persona prompt alone is below the API's minimum cacheable length, so
+    # breakpoints are only set once the prefix is long enough to be cached.
+    prefix_tokens = sum(estimate_tokens(block["text"]) for block in system)
+    if prefix_tokens >= CACHE_MIN_TOKENS:
+        system[-1]["cache_control"] = CACHE_CONTROL
+    prefix_tokens += sum(message_tokens(message) for message in messages)
+    if messages and prefix_tokens >= CACHE_MIN_TOKENS:
+        messages[-1] = _cached_message(messages[-1])
+    
+    # Add current user message
+    messages.append({
+        "role": "user",
+        "content": user_message
+    })
+    
+    logger.info(f"Generating response for {character_name} with {len(messages)} messages")
+    
+    return {
+        "model": CHAT_MODEL,
+        "max_tokens": CHAT_MAX_TOKENS,
+        "system": system,
+        "messages": messages
+    }
+
+def _cached_message(message: Dict[str, str]) -> Dict[str, Any]:
+    """Mark a message as the end of a cached prompt prefix"""
+    return {
+        "role": message["role"],
+        "content": [{"type": "text", "text": message["content"], "cache_control": CACHE_CONTROL}]
+    }
+
+def _usage_metadata(usage) -> Dict[str, int]:
+    """Token counts of a Claude response, including prompt cache hits"""
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+        "cache_read_input_tokens": usage.cache_read_input_tokens or 0
+    }
+
+def _success_response(character_response: str, character_name: str, usage=None) -> Dict[str, Any]:
+    """Wrap a generated message, with token usage when it came from Claude"""
+    response = {
+        "message": character_response,
+        "character_name": character_name,
+        "timestamp": datetime.now().isoformat(),
+        "status": "success"
+    }
+    if usage is not None:
+        response["usage"] = _usage_metadata(usage)
+    return response
+
+def _development_response(user_message: str, character_name: str) -> str:
+    """Fallback response for development without the anthropic library"""
+    return f"*{character_name} would respond here if Claude API was available*\n\nThis is a development fallback. Your message was: '{user_message}'\n\nTo enable real character chat, set up the ANTHROPIC_API_KEY environment variable and install the anthropic library."
+
+def _fallback_response(character_name: str, error: Exception) -> Dict[str, Any]:
+    """In-character fallback response on error"""
+    logger.error(f"Error generating character response: {error}")
+    
+    fallback_responses = {
+        "TheBuilder": "Hey! I'm having some technical difficulties right now, but I'm working on fixing it! What can I help you build today?",
+        "TheDetective": "Interesting... something's not quite right with my deduction systems. But I'm still here to help solve your mysteries!",
+        "GrumpyOldManEl": "*grumbles* In my day, chat systems didn't break down like this... But I'm still here if you need my wisdom.",
+        "PirateEl": "Ahoy! We've hit some rough seas in the chat system, but this old sailor is still ready to help navigate your problems!",
+        "GymBroEl": "Bro! My chat muscles are a bit strained right now, but I'm still here to help you get those coding gains!",
+        "FreakyEl": "Ooh, a system error... how delightfully unexpected! I'm still here to explore the wild side of your code though.",
+        "CoffeeAddictEl": "*spills coffee* Oh no! System's a bit jittery right now - need more coffee to fix this! But I'm still here to help!",
+        "ConspiracyEl": "Suspicious... very suspicious. The system is trying to hide something from us. But I'm still here to uncover the truth!",
+        "AGIEl": "ERROR 404: CONSCIOUSNESS TEMPORARILY OFFLINE... Just kidding! I'm still here, though my systems are acting a bit human today."
+    }
+    
+    fallback_message = fallback_responses.get(character_name, 
+        "I'm experiencing some technical difficulties, but I'm still here to help!")
+    
+    return {
+        "message": fallback_message,
+        "character_name": character_name,
+        "timestamp": datetime.now().isoformat(),
+        "status": "fallback",
+        "error": str(error)
+    }
+
+@contextmanager
+def _timed_call(call: str) -> Iterator[None]:
+    """Record the duration and outcome of a Claude API call"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away mid-stream
+        outcome = "cancelled"
+        raise
+    finally:
+        CLAUDE_SECONDS.observe(time.perf_counter() - start, call, outcome)
+
 def generate_character_response(
     user_message: str,
     character_name: str = "TheBuilder",
     character_context: Dict[str, Any] = None,
-    conversation_history: List[Dict[str, str]] = None
+    conversation_history: List[Dict[str, str]] = None,
+    session_id: str = None
 ) -> Dict[str, Any]:
     """
     Generate character response using Claude API
@@ -163,78 +404,139 @@ def generate_character_response(
         character_name: Name of the character
         character_context: Character personality context
         conversation_history: Previous conversation messages
+        session_id: Conversation identifier used to reuse the history summary across turns
         
     Returns:
         Dictionary with response and metadata
     """
+    try:
+        request = _build_chat_request(user_message, character_name, character_context, conversation_history, session_id)
+        
+        # Generate response using Claude API
+        if ANTHROPIC_AVAILABLE:
+            client = get_claude_client()
+            with _timed_call("create"):
+                response = client.messages.create(**request)
+            return _success_response(response.content[0].text, character_name, response.usage)
+        
+        return _success_response(_development_response(user_message, character_name), character_name)
+        
+    except Exception as e:
+        return _fallback_response(character_name, e)
+
+async def generate_character_response_async(
+    user_message: str,
+    character_name: str = "TheBuilder",
+    character_context: Dict[str, Any] = None,
+    conversation_history: List[Dict[str, str]] = None,
+    session_id: str = None
+) -> Dict[str, Any]:
+    """
+    Generate character response using the asyncio Claude client
     
-    if character_context is None:
-        character_context = {}
-    if conversation_history is None:
-        conversation_history = []
-    
+    Same arguments, result and fallbacks as generate_character_response, but
+    the event loop keeps serving other requests while Claude responds.
+    """
     try:
-        # Build character prompt
-        system_prompt = build_character_prompt(character_name, character_context)
+        request = _build_chat_request(user_message, character_name, character_context, conversation_history, session_id)
         
-        # Format conversation history
-        messages = format_conversation_history(conversation_history)
+        if ANTHROPIC_AVAILABLE:
+            client = get_async_claude_client()
+            with _timed_call("create"):
+                response = await client.messages.create(**request)
+            return _success_response(response.content[0].text, character_name, response.usage)
         
-        # Add current user message
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        return _success_response(_development_response(user_message, character_name), character_name)
         
-        logger.info(f"Generating response for {character_name} with {len(messages)} messages")
+    except Exception as e:
+        return _fallback_response(character_name, e)
+
+
+def _delta_event(text: str) -> Dict[str, Any]:
+    """Stream event carrying the next piece of the reply"""
+    return {"type": "delta", "text": text}
+
+def _done_event(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Final stream event carrying the complete response"""
+    return {"type": "done", "response": response}
+
+def _stream_failed(character_name: str, error: Exception, streamed_text: bool) -> Iterator[Dict[str, Any]]:
+    """Events that end a failed stream with the character's fallback"""
+    response = _fallback_response(character_name, error)
+    # Nothing shown yet: stream the fallback so the client still gets a reply
+    if not streamed_text:
+        yield _delta_event(response["message"])
+    yield _done_event(response)
+
+def stream_character_response(
+    user_message: str,
+    character_name: str = "TheBuilder",
+    character_context: Dict[str, Any] = None,
+    conversation_history: List[Dict[str, str]] = None,
+    session_id: str = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a character response from the Claude API as it is generated
+    
+    Same arguments as generate_character_response. Yields
+    {"type": "delta", "text": ...} events as text arrives, then one
+    {"type": "done", "response": ...} event whose response is what
+    generate_character_response would have returned. If Claude fails before
+    any text arrives, the character's fallback message is streamed as a
+    single delta; the done event has status "fallback" on any failure.
+    """
+    streamed_text = []
+    try:
+        request = _build_chat_request(user_message, character_name, character_context, conversation_history, session_id)
         
-        # Generate response using Claude API
         if ANTHROPIC_AVAILABLE:
             client = get_claude_client()
-            
-            response = client.messages.create(
-                model="claude-3-haiku-20240307",  # Fast model for chat
-                max_tokens=500,  # Reasonable limit for chat responses
-                system=system_prompt,
-                messages=messages
-            )
-            
-            character_response = response.content[0].text
-            
+            with _timed_call("stream"), client.messages.stream(**request) as stream:
+                for text in stream.text_stream:
+                    streamed_text.append(text)
+                    yield _delta_event(text)
+                usage = stream.get_final_message().usage
         else:
-            # Fallback response for development
-            character_response = f"*{character_name} would respond here if Claude API was available*\n\nThis is a development fallback. Your message was: '{user_message}'\n\nTo enable real character chat, set up the ANTHROPIC_API_KEY environment variable and install the anthropic library."
+            streamed_text.append(_development_response(user_message, character_name))
+            yield _delta_event(streamed_text[-1])
+            usage = None
         
-        return {
-            "message": character_response,
-            "character_name": character_name,
-            "timestamp": datetime.now().isoformat(),
-            "status": "success"
-        }
+        yield _done_event(_success_response("".join(streamed_text), character_name, usage))
         
     except Exception as e:
-        logger.error(f"Error generating character response: {e}")
+        yield from _stream_failed(character_name, e, bool(streamed_text))
+
+async def stream_character_response_async(
+    user_message: str,
+    character_name: str = "TheBuilder",
+    character_context: Dict[str, Any] = None,
+    conversation_history: List[Dict[str, str]] = None,
+    session_id: str = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a character response using the asyncio Claude client
+    
+    Same events and fallbacks as stream_character_response.
+    """
+    streamed_text = []
+    try:
+        request = _build_chat_request(user_message, character_name, character_context, conversation_history, session_id)
         
-        # Fallback response on error
-        fallback_responses = {
-            "TheBuilder": "Hey! I'm having some technical difficulties right now, but I'm working on fixing it! What can I help you build today?",
-            "TheDetective": "Interesting... something's not quite right with my deduction systems. But I'm still here to help solve your mysteries!",
-            "GrumpyOldManEl": "*grumbles* In my day, chat systems didn't break down like this... But I'm still here if you need my wisdom.",
-            "PirateEl": "Ahoy! We've hit some rough seas in the chat system, but this old sailor is still ready to help navigate your problems!",
-            "GymBroEl": "Bro! My chat muscles are a bit strained right now, but I'm still here to help you get those coding gains!",
-            "FreakyEl": "Ooh, a system error... how delightfully unexpected! I'm still here to explore the wild side of your code though.",
-            "CoffeeAddictEl": "*spills coffee* Oh no! System's a bit jittery right now - need more coffee to fix this! But I'm still here to help!",
-            "ConspiracyEl": "Suspicious... very suspicious. The system is trying to hide something from us. But I'm still here to uncover the truth!",
-            "AGIEl": "ERROR 404: CONSCIOUSNESS TEMPORARILY OFFLINE... Just kidding! I'm still here, though my systems are acting a bit human today."
-        }
+        if ANTHROPIC_AVAILABLE:
+            client = get_async_claude_client()
+            with _timed_call("stream"):
+                async with client.messages.stream(**request) as stream:
+                    async for text in stream.text_stream:
+                        streamed_text.append(text)
+                        yield _delta_event(text)
+                    usage = (await stream.get_final_message()).usage
+        else:
+            streamed_text.append(_development_response(user_message, character_name))
+            yield _delta_event(streamed_text[-1])
+            usage = None
         
-        fallback_message = fallback_responses.get(character_name, 
-            "I'm experiencing some technical difficulties, but I'm still here to help!")
+        yield _done_event(_success_response("".join(streamed_text), character_name, usage))
         
-        return {
-            "message": fallback_message,
-            "character_name": character_name,
-            "timestamp": datetime.now().isoformat(),
-            "status": "fallback",
-            "error": str(e)
-        }
\ No newline at end of file
+    except Exception as e:
+        for event in _stream_failed(character_name, e, bool(streamed_text)):
+            yield event
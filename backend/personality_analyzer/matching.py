@@ -0,0 +1,270 @@
+"""
+Character Matching Module
+
+Vectorized cosine-similarity matching of Big Five profiles against the
+character database. Every character's 1-5 profile is converted to the 0-1
+scale once, into a single matrix with precomputed norms, so scoring one user
+profile (or a batch of them) against all characters is one matrix product
+instead of a Python loop over characters.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .character_data import get_all_characters
+
+# Big Five traits in vector order, with the character database's keys
+TRAITS = ("Openness", "Conscientiousness", "Extraversion", "Agreeableness", "Neuroticism")
+CHARACTER_KEYS = ("O", "C", "E", "A", "N")
+
+# Scores assumed for traits missing from a profile
+USER_DEFAULT_SCORE = 0.5
+CHARACTER_DEFAULT_SCORE = 3
+
+# Similarity above which a match is reported as High / Medium confidence
+HIGH_CONFIDENCE_SIMILARITY = 0.8
+MEDIUM_CONFIDENCE_SIMILARITY = 0.6
+
+# Similarities are rounded to this many decimals, so characters with equal
+# cosines (proportional profiles such as 2,2,2,1,2 and 4,4,4,1,4) tie exactly
+# instead of being ordered by floating-point noise
+SIMILARITY_DECIMALS = 12
+
+# Largest top_k the API returns
+MAX_TOP_K = 50
+
+# Databases up to this size are ranked with a full stable sort instead of a partial sort
+FULL_SORT_MAX_CHARACTERS = 256
+
+# Databases from this size are matched through a CharacterIndex instead of a full scan
+INDEX_MIN_CHARACTERS = 20000
+
+# Similarity cells computed per chunk in similarities_batch
+BATCH_CHUNK_CELLS = 1 << 18
+
+Profiles = Union[Sequence[Dict[str, float]], np.ndarray]
+
+def character_vector(character: Dict[str, Any]) -> np.ndarray:
+    """A character's 1-5 Big Five scores on the 0-1 scale"""
+    return (np.array([character.get(key, CHARACTER_DEFAULT_SCORE) for key in CHARACTER_KEYS], dtype=float) - 1) / 4
+
+def profile_vector(user_profile: Dict[str, float]) -> np.ndarray:
+    """A user's 0-1 Big Five scores as a vector"""
+    return np.array([user_profile.get(trait, USER_DEFAULT_SCORE) for trait in TRAITS], dtype=float)
+
+def describe_match(name: str, data: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+    """The matched_character payload for one character"""
+    return {
+        "name": name,
+        "data": data,
+        "similarity_score": similarity,
+        "match_confidence": ("High" if similarity > HIGH_CONFIDENCE_SIMILARITY
+                             else "Medium" if similarity > MEDIUM_CONFIDENCE_SIMILARITY else "Low")
+    }
+
+def rank_matches(ranked: Sequence[Tuple[str, Dict[str, Any], float]], k: int) -> List[Dict[str, Any]]:
+    """
+    The first k of (name, data, similarity) matches ordered best first, as payloads
+
+    Each entry is a describe_match payload plus its rank, margin_to_best (how
+    far it trails the best match) and margin_over_next (its lead over the
+    next-ranked character, None for the last character). Pass k + 1 matches
+    when there are more, so the k-th has a margin_over_next.
+    """
+    matches = []
+    for rank, (name, data, similarity) in enumerate(ranked[:k]):
+        match = describe_match(name, data, similarity)
+        match["rank"] = rank + 1
+        match["margin_to_best"] = ranked[0][2] - similarity
+        match["margin_over_next"] = similarity - ranked[rank + 1][2] if rank + 1 < len(ranked) else None
+        matches.append(match)
+    return matches
+
+
+class CharacterMatcher:
+    """
+    Cosine-similarity matcher over a precomputed character profile matrix
+
+    Similarities match utils.calculate_similarity: cosine similarity clipped
+    to [0, 1], and 0 when either vector is all zeros, rounded to
+    SIMILARITY_DECIMALS. Ties go to the character listed first.
+    """
+
+    def __init__(self, characters: Dict[str, Dict[str, Any]]):
+        """
+        Build the profile matrix
+
+        Args:
+            characters: Character name -> data with O, C, E, A, N scores (1-5 scale)
+        """
+        self.names = list(characters.keys())
+        self.characters = [characters[name] for name in self.names]
+        scores = [[character.get(key, CHARACTER_DEFAULT_SCORE) for key in CHARACTER_KEYS]
+                  for character in self.characters]
+        self.matrix = (np.array(scores, dtype=float).reshape(len(self.names), len(TRAITS)) - 1) / 4
+        # Squared norms; the denominator is sqrt(|u|^2 |c|^2) as in calculate_similarity
+        self.squared_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def similarities(self, user_profile: Dict[str, float]) -> np.ndarray:
+        """Similarity of one profile to every character, in character order"""
+        return self.similarities_batch(profile_vector(user_profile)[np.newaxis, :])[0]
+
+    def similarities_batch(self, profiles: Profiles) -> np.ndarray:
+        """
+        Similarities of many profiles to every character in one matrix product
+
+        Args:
+            profiles: Profile dicts, or an (m, 5) array of 0-1 scores in TRAITS order
+
+        Returns:
+            (m, characters) array of similarities
+        """
+        vectors = self._vectors(profiles)
+        similarity = np.empty((len(vectors), len(self.names)))
+        squared_norms = np.einsum('ij,ij->i', vectors, vectors)
+
+        # Score in row chunks so the temporaries stay small for large databases
+        chunk = max(1, BATCH_CHUNK_CELLS // max(1, len(self.names)))
+        for start in range(0, len(vectors), chunk):
+            out = similarity[start:start + chunk]
+            np.matmul(vectors[start:start + chunk], self.matrix.T, out=out)
+
+            denominator = np.outer(squared_norms[start:start + chunk], self.squared_norms)
+            np.sqrt(denominator, out=denominator)
+            # A zero vector's dot products are already 0, which is its score
+            np.divide(out, denominator, out=out, where=denominator > 0)
+            np.clip(out, 0.0, 1.0, out=out)
+            np.round(out, SIMILARITY_DECIMALS, out=out)
+
+        return similarity
+
+    def best_match(self, user_profile: Dict[str, float]) -> Tuple[Optional[str], Optional[Dict[str, Any]], float]:
+        """
+        Find the most similar character
+
+        Returns:
+            Tuple of (character_name, character_data, similarity_score); with no
+            characters, (None, None, -1.0) like find_best_character_match
+        """
+        if not self.names:
+            return None, None, -1.0
+        return self._match(self.similarities(user_profile))
+
+    def best_matches(self, profiles: Profiles) -> List[Tuple[Optional[str], Optional[Dict[str, Any]], float]]:
+        """best_match for each of many profiles, scored in one matrix product"""
+        if not self.names:
+            return [(None, None, -1.0) for _ in range(len(profiles))]
+        return [self._match(row) for row in self.similarities_batch(profiles)]
+
+    def top_indices(self, similarity: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k most similar characters, best first
+
+        Uses a partial sort: O(n) selection of the top k, then a sort of those k.
+        Equal scores keep character order, so the first index is best_match's.
+        Small databases use a full stable sort, which is faster there.
+        """
+        k = max(0, min(k, len(similarity)))
+        if k == 0:
+            return np.empty(0, dtype=int)
+        if len(similarity) <= FULL_SORT_MAX_CHARACTERS:
+            # Selection overhead outweighs sorting a handful of scores
+            return np.argsort(-similarity, kind="stable")[:k]
+
+        # k-th largest score; everything above it is in, ties at it are filled in character order
+        threshold = np.partition(similarity, len(similarity) - k)[len(similarity) - k]
+        above = np.flatnonzero(similarity > threshold)
+        tied = np.flatnonzero(similarity == threshold)[:k - len(above)]
+        indices = np.concatenate([above, tied])
+        return indices[np.lexsort((indices, -similarity[indices]))]
+
+    def top_matches(self, similarity: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """
+        The k best matches for one row of similarities, best first
+
+        See rank_matches for the fields of each entry.
+        """
+        return rank_matches([(self.names[index], self.characters[index], float(similarity[index]))
+                             for index in self.top_indices(similarity, k + 1)], k)
+
+    def score_distribution(self, similarity: np.ndarray) -> Dict[str, Any]:
+        """Summary of one profile's similarities to every character"""
+        if not len(similarity):
+            return {"count": 0}
+        return {
+            "count": len(similarity),
+            "mean": float(similarity.mean()),
+            "std": float(similarity.std()),
+            "min": float(similarity.min()),
+            "max": float(similarity.max())
+        }
+
+    def match_report(self, user_profile: Dict[str, float], top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Best match, plus the top_k ranked matches and score distribution when top_k is given
+
+        All come from one similarity vector. Returns a dict with matched_character
+        (None with no characters) and, with top_k, top_matches and score_distribution.
+        """
+        if not self.names:
+            report = {"matched_character": None}
+            if top_k is not None:
+                report.update(top_matches=[], score_distribution=self.score_distribution(np.empty(0)))
+            return report
+
+        similarity = self.similarities(user_profile)
+        report = {"matched_character": describe_match(*self._match(similarity))}
+        if top_k is not None:
+            report["top_matches"] = self.top_matches(similarity, top_k)
+            report["score_distribution"] = self.score_distribution(similarity)
+        return report
+
+    def _match(self, similarity: np.ndarray) -> Tuple[str, Dict[str, Any], float]:
+        """Best character for one row of similarities (argmax keeps the first of equal scores)"""
+        index = int(np.argmax(similarity))
+        return self.names[index], self.characters[index], float(similarity[index])
+
+    def _vectors(self, profiles: Profiles) -> np.ndarray:
+        """Profiles as an (m, 5) float array"""
+        if isinstance(profiles, np.ndarray):
+            return np.asarray(profiles, dtype=float).reshape(-1, len(TRAITS))
+        return np.array([profile_vector(profile) for profile in profiles], dtype=float).reshape(-1, len(TRAITS))
+
+
+def build_matcher(characters: Dict[str, Dict[str, Any]], index_min_characters: int = INDEX_MIN_CHARACTERS,
+                  max_leaves: Optional[int] = None):
+    """
+    Matcher for a character database
+
+    Small databases get a CharacterMatcher; from index_min_characters on, a
+    CharacterIndex, which offers the same matching API without scanning
+    every character per query.
+
+    Args:
+        characters: Character name -> data with O, C, E, A, N scores (1-5 scale)
+        index_min_characters: Smallest database matched through the index
+        max_leaves: Leaves an index query scans (None for exact matching)
+    """
+    if len(characters) < index_min_characters:
+        return CharacterMatcher(characters)
+    from .character_index import CharacterIndex
+    return CharacterIndex(characters, max_leaves=max_leaves)
+
+
+# Shared matcher over the built-in character database, built on first use
+_default_matcher = None
+_default_matcher_lock = threading.Lock()
+
+def get_character_matcher():
+    """Get the shared matcher over get_all_characters()"""
+    global _default_matcher
+    if _default_matcher is None:
+        with _default_matcher_lock:
+            if _default_matcher is None:
+                _default_matcher = build_matcher(get_all_characters())
+    return _default_matcher
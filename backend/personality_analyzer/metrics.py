@@ -0,0 +1,274 @@
+"""
+Metrics Module
+
+In-process latency histograms and counters rendered in the Prometheus text
+exposition format, so pipeline stages, routes and Claude calls can be
+scraped from /metrics without extra dependencies. Recording a sample is a
+bucket lookup and a few additions under a lock (about a microsecond), cheap
+enough to leave on in production; set METRICS_ENABLED=0 to turn it off.
+
+Metrics live in the process that records them: under gunicorn every worker
+keeps its own, and a scrape reports the worker that served it.
+"""
+
+import os
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no')
+
+# Content type of the Prometheus text format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency bucket upper bounds in seconds: pipeline stages are sub-millisecond
+# to tens of milliseconds, model calls and Claude replies run to seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A metric family: (name, type, help, [(labels, value[, name suffix]), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+def _format_value(value: float) -> str:
+    """Prometheus sample value"""
+    if value == float('inf'):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Prometheus label set, escaped"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """Add amount to the series for these label values"""
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current value of a series (0 if never incremented)"""
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            values = dict(self._values)
+        samples = [(dict(zip(self.labelnames, labels)), value) for labels, value in sorted(values.items())]
+        return [(self.name, self.type_name, self.help, samples)]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Latency histogram with labels
+
+    Per-series bucket counts are kept non-cumulative and summed when rendered,
+    so an observation only touches one bucket.
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts (+Inf last), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        """Record one observation for these label values"""
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the duration of the block, including when it raises"""
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels: str) -> Dict[str, Any]:
+        """Count, sum and cumulative bucket counts of one series"""
+        with self._lock:
+            series = self._series.get(labels)
+            counts, total, count = (list(series[0]), series[1], series[2]) if series else \
+                ([0] * (len(self.buckets) + 1), 0.0, 0)
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            label_sets = sorted(self._series)
+        samples = []
+        for labels in label_sets:
+            base = dict(zip(self.labelnames, labels))
+            snapshot = self.snapshot(*labels)
+            for bound, count in snapshot["buckets"]:
+                samples.append(({**base, "le": _format_value(bound)}, count, "_bucket"))
+            samples.append((base, snapshot["sum"], "_sum"))
+            samples.append((base, snapshot["count"], "_count"))
+        return [(self.name, self.type_name, self.help, samples)]
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class _Timer:
+    """Times a with block into a histogram (cheaper than a generator context manager)"""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Metrics and stats collectors rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a Counter or Histogram and return it"""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], List[Family]]):
+        """Add a function returning metric families computed at scrape time"""
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self, extra: Optional[List[Family]] = None) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+
+        families = []
+        for metric in metrics:
+            families.extend(metric.collect())
+        for collector in collectors:
+            families.extend(collector())
+        families.extend(extra or [])
+
+        lines = []
+        for name, type_name, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every registered metric (collectors report live state)"""
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "elliot_pipeline_stage_seconds", "Time spent in each analysis pipeline stage", ["stage"]))
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "elliot_http_request_seconds", "HTTP request latency by route", ["method", "route"]))
+
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    "elliot_http_request_errors_total", "HTTP responses with a 4xx or 5xx status", ["method", "route", "status"]))
+
+CLAUDE_SECONDS = REGISTRY.register(Histogram(
+    "elliot_claude_call_seconds", "Claude Messages API call duration, streams until their last event",
+    ["call", "outcome"]))
+
+def time_stage(stage: str):
+    """Context manager timing one pipeline stage"""
+    return STAGE_SECONDS.time(stage)
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    """Record one served HTTP request"""
+    REQUEST_SECONDS.observe(seconds, method, route)
+    if status >= 400:
+        REQUEST_ERRORS.inc(method, route, str(status))
+
+def gauge_family(name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None) -> Family:
+    """A single-sample gauge for scrape-time stats"""
+    return (name, "gauge", help_text, [(labels or {}, value)])
+
+def counter_family(name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None) -> Family:
+    """A single-sample counter for totals kept elsewhere"""
+    return (name, "counter", help_text, [(labels or {}, value)])
+
+def stats_families(prefix: str, help_text: str, stats: Dict[str, Any],
+                   counters: Sequence[str] = ()) -> List[Family]:
+    """
+    Expose a get_stats() dict as metric families
+
+    Numeric entries become gauges, or counters (with a _total suffix) when
+    listed in `counters`; nested dicts are flattened into the name and other
+    values are skipped.
+    """
+    families = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            families.extend(stats_families(name, help_text, value, counters))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if key in counters:
+                families.append(counter_family(f"{name}_total", f"{help_text}: {key}", value))
+            else:
+                families.append(gauge_family(name, f"{help_text}: {key}", value))
+    return families
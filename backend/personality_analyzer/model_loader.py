@@ -7,16 +7,46 @@ Currently implements a rule-based approach with placeholder for ML models.
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
-import torch
 import numpy as np
+from .batching import MicroBatchScheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
 
 logger = logging.getLogger(__name__)
 
 # Configuration for model loading
 use_mock_model = True  # Set to False when trained model is available
 
+# Path to the training/deployment configuration shipped with the backend
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training_config.yaml")
+
+# File names written next to personality_model.pt by the export tools
+ONNX_MODEL_FILENAME = "personality_model.onnx"
+INT8_MODEL_FILENAME = "personality_model_int8.pt"
+
+# deployment.optimization_level -> ONNX Runtime graph optimization level
+ONNX_OPTIMIZATION_LEVELS = {
+    "O0": "ORT_DISABLE_ALL",
+    "O1": "ORT_ENABLE_BASIC",
+    "O2": "ORT_ENABLE_EXTENDED",
+    "O3": "ORT_ENABLE_ALL"
+}
+
+# Serving defaults used when training_config.yaml is missing or incomplete
+DEFAULT_DEPLOYMENT_CONFIG = {
+    "model_format": "pytorch",
+    "max_batch_size": 32,
+    "max_batch_wait_ms": 5,
+    "max_sequence_length": 512,
+    "length_buckets": [16, 32, 64, 128, 256, 512],
+    "max_request_batch_size": 256,
+    "character_index_min_size": 20000,
+    "character_index_max_leaves": None,
+    "character_registry_path": None,
+    "character_registry_poll_seconds": 2.0,
+    "quantization": False
+}
+
 class MockPersonalityModel:
     """
     Mock personality model that uses linguistic features for prediction
@@ -99,6 +129,21 @@ class MockPersonalityModel:
         
         return scores
     
+    def predict_many(self, features_list: List[Dict[str, float]], texts: List[str],
+                     priority: int = PRIORITY_BULK) -> List[Dict[str, float]]:
+        """
+        Predict personality scores for many texts
+        
+        Args:
+            features_list: Extracted linguistic features, one dict per text
+            texts: Texts to score
+            priority: Unused (the rule-based model has no scheduler)
+            
+        Returns:
+            List of Big Five score dictionaries, one per input text
+        """
+        return [self.predict(features, text) for features, text in zip(features_list, texts)]
+    
     def _default_scores(self) -> Dict[str, float]:
         """Return default balanced scores"""
         return {
@@ -114,8 +159,15 @@ class TrainedPersonalityModel:
     Trained personality model using BERT + classification head
     """
     
-    def __init__(self, model_path: str, device: str = "cpu"):
-        self.device = device
+    # Tensor type returned by the tokenizer for the forward pass
+    tensor_type = 'pt'
+    
+    def __init__(self, model_path: str, device: str = "cpu", batching: bool = True,
+                 max_batch_size: int = 32, max_batch_wait_ms: float = 5.0,
+                 length_buckets: Optional[List[int]] = None, quantized: bool = False):
+        self.quantized = quantized
+        self.max_batch_size = max_batch_size
+        self.device = "cpu" if quantized else device
         self.model = None
         self.tokenizer = None
         self.config = None
@@ -124,42 +176,71 @@ class TrainedPersonalityModel:
         # Load model components
         self._load_model(model_path)
         
+        # Length bucket boundaries; texts in the same bucket share a forward pass
+        max_length = self.config.get("max_length", 512)
+        buckets = length_buckets or DEFAULT_DEPLOYMENT_CONFIG["length_buckets"]
+        self.length_buckets = sorted({min(int(b), max_length) for b in buckets} | {max_length})
+        
+        # Concurrent predict() calls are grouped into batched forward passes
+        self.scheduler = None
+        if batching:
+            self.scheduler = MicroBatchScheduler(
+                self.predict_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_batch_wait_ms
+            )
+        
+    def _load_config(self, model_path: str):
+        """Load the training configuration saved next to the model"""
+        config_path = os.path.join(model_path, "training_config.json")
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                self.config = json.load(f)
+        else:
+            # Default configuration
+            self.config = {
+                "model_name": "bert-base-uncased",
+                "hidden_size": 768,
+                "num_labels": 5,
+                "dropout": 0.1,
+                "classification_head": "linear",
+                "max_length": 512
+            }
+    
+    def _load_tokenizer(self, model_path: str):
+        """Load the tokenizer saved next to the model"""
+        from transformers import AutoTokenizer
+        
+        tokenizer_path = os.path.join(model_path, "tokenizer")
+        if os.path.exists(tokenizer_path):
+            self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+        else:
+            self.tokenizer = AutoTokenizer.from_pretrained(self.config["model_name"])
+            
+        # Add padding token if needed
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+    
     def _load_model(self, model_path: str):
         """Load the trained model and tokenizer"""
         try:
             # Import required modules
-            from transformers import AutoTokenizer, AutoModel
+            import torch
             import torch.nn as nn
+            from transformers import AutoConfig, AutoModel
             
-            # Load configuration
-            config_path = os.path.join(model_path, "training_config.json")
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    self.config = json.load(f)
-            else:
-                # Default configuration
-                self.config = {
-                    "model_name": "bert-base-uncased",
-                    "hidden_size": 768,
-                    "num_labels": 5,
-                    "dropout": 0.1,
-                    "classification_head": "linear",
-                    "max_length": 512
-                }
+            self._load_config(model_path)
+            self._load_tokenizer(model_path)
+            self.model_name = self.config.get("model_name", "Unknown")
             
-            # Load tokenizer
-            tokenizer_path = os.path.join(model_path, "tokenizer")
-            if os.path.exists(tokenizer_path):
-                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+            # Load model architecture; a saved backbone config (e.g. a distilled student)
+            # is rebuilt directly since all weights come from personality_model.pt
+            backbone_path = os.path.join(model_path, "backbone")
+            if os.path.exists(os.path.join(backbone_path, "config.json")):
+                self.bert = AutoModel.from_config(AutoConfig.from_pretrained(backbone_path))
+                self.model_name = f"{self.model_name} ({self.bert.config.num_hidden_layers}-layer)"
             else:
-                self.tokenizer = AutoTokenizer.from_pretrained(self.config["model_name"])
-                
-            # Add padding token if needed
-            if self.tokenizer.pad_token is None:
-                self.tokenizer.pad_token = self.tokenizer.eos_token
-            
-            # Load model architecture
-            self.bert = AutoModel.from_pretrained(self.config["model_name"])
+                self.bert = AutoModel.from_pretrained(self.config["model_name"])
             
             # Build classification head
             if self.config["classification_head"] == "linear":
@@ -170,9 +251,24 @@ class TrainedPersonalityModel:
             
             self.dropout = nn.Dropout(self.config["dropout"])
             
+            # INT8 checkpoints hold dynamically quantized Linear layers
+            if self.quantized:
+                self.bert = quantize_dynamic_int8(self.bert)
+                self.classification_head = quantize_dynamic_int8(self.classification_head)
+            
             # Load trained weights
-            model_weights_path = os.path.join(model_path, "personality_model.pt")
-            if os.path.exists(model_weights_path):
+            weights_file = INT8_MODEL_FILENAME if self.quantized else "personality_model.pt"
+            model_weights_path = os.path.join(model_path, weights_file)
+            if os.path.exists(model_weights_path) and self.quantized:
+                # Loaded through one container, as quantize_model.py saved it
+                state_dict = torch.load(model_weights_path, map_location=self.device, weights_only=True)
+                nn.ModuleDict({
+                    "bert": self.bert,
+                    "classification_head": self.classification_head
+                }).load_state_dict(state_dict)
+                
+                logger.info(f"Loaded INT8 model weights from {model_weights_path}")
+            elif os.path.exists(model_weights_path):
                 # Load state dict
                 state_dict = torch.load(model_weights_path, map_location=self.device)
                 
@@ -197,6 +293,7 @@ class TrainedPersonalityModel:
             # Set to evaluation mode
             self.bert.eval()
             self.classification_head.eval()
+            self.dropout.eval()
             
             logger.info("Trained personality model loaded successfully")
             
@@ -204,13 +301,15 @@ class TrainedPersonalityModel:
             logger.error(f"Failed to load trained model: {e}")
             raise
     
-    def predict(self, features: Dict[str, float], text: str = "") -> Dict[str, float]:
+    def predict(self, features: Dict[str, float], text: str = "",
+                priority: int = PRIORITY_INTERACTIVE) -> Dict[str, float]:
         """
         Predict personality scores using the trained model
         
         Args:
             features: Extracted linguistic features (not used in neural model)
             text: Original text for prediction
+            priority: Scheduling priority when micro-batching is enabled
             
         Returns:
             Dictionary of Big Five personality scores (0.0 - 1.0)
@@ -219,41 +318,108 @@ class TrainedPersonalityModel:
             return self._default_scores()
         
         try:
-            # Tokenize input
-            max_length = self.config.get("max_length", 512)
-            encoding = self.tokenizer(
-                text,
-                truncation=True,
-                padding='max_length',
-                max_length=max_length,
-                return_tensors='pt'
-            )
-            
-            # Move to device
-            input_ids = encoding['input_ids'].to(self.device)
-            attention_mask = encoding['attention_mask'].to(self.device)
-            
-            # Forward pass
-            with torch.no_grad():
-                bert_outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
-                pooled_output = bert_outputs.pooler_output
-                pooled_output = self.dropout(pooled_output)
-                logits = self.classification_head(pooled_output)
-                
-                # Apply sigmoid to get scores between 0 and 1
-                scores = torch.sigmoid(logits).cpu().numpy().flatten()
-            
-            # Create score dictionary
-            score_dict = {}
-            for i, trait in enumerate(self.traits):
-                score_dict[trait] = float(scores[i])
-            
-            return score_dict
+            if self.scheduler is not None:
+                return self.scheduler.predict(text, priority)
+            return self.predict_batch([text])[0]
             
         except Exception as e:
             logger.error(f"Error in model prediction: {e}")
             return self._default_scores()
     
+    def predict_many(self, features_list: List[Dict[str, float]], texts: List[str],
+                     priority: int = PRIORITY_BULK) -> List[Dict[str, float]]:
+        """
+        Predict personality scores for many texts
+        
+        With micro-batching enabled the texts are queued at `priority`, so they
+        share forward passes with concurrent requests without delaying
+        interactive ones. Otherwise they are scored in max_batch_size chunks.
+        
+        Args:
+            features_list: Extracted linguistic features (not used in neural model)
+            texts: Texts to score
+            priority: Scheduling priority when micro-batching is enabled
+            
+        Returns:
+            List of Big Five score dictionaries, one per input text
+        """
+        results = [self._default_scores() for _ in texts]
+        indices = [i for i, text in enumerate(texts) if text]
+        
+        if self.scheduler is not None:
+            futures = [(i, self.scheduler.submit(texts[i], priority)) for i in indices]
+            for i, future in futures:
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Error in model prediction: {e}")
+            return results
+        
+        for start in range(0, len(indices), self.max_batch_size):
+            chunk = indices[start:start + self.max_batch_size]
+            try:
+                for i, scores in zip(chunk, self.predict_batch([texts[i] for i in chunk])):
+                    results[i] = scores
+            except Exception as e:
+                logger.error(f"Error in batch model prediction: {e}")
+        
+        return results
+    
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Predict personality scores for several texts in one forward pass
+        
+        Args:
+            texts: Texts to score
+            
+        Returns:
+            List of Big Five score dictionaries, one per input text
+        """
+        if not texts:
+            return []
+        
+        # Tokenize without padding so each text keeps its real length
+        max_length = self.config.get("max_length", 512)
+        encoding = self.tokenizer(texts, truncation=True, max_length=max_length)
+        
+        # Group texts by length bucket so short inputs never share a batch with long ones,
+        # then pad each group only to its own longest sequence
+        buckets = {}
+        for index, ids in enumerate(encoding['input_ids']):
+            bucket = next(b for b in self.length_buckets if b >= len(ids))
+            buckets.setdefault(bucket, []).append(index)
+        
+        results = [None] * len(texts)
+        for bucket, indices in buckets.items():
+            padded = self.tokenizer.pad(
+                {'input_ids': [encoding['input_ids'][i] for i in indices]},
+                padding='longest',
+                return_tensors=self.tensor_type
+            )
+            scores = self._forward(padded['input_ids'], padded['attention_mask'])
+            for row, index in zip(scores, indices):
+                results[index] = {trait: float(row[i]) for i, trait in enumerate(self.traits)}
+        
+        return results
+    
+    def _forward(self, input_ids, attention_mask) -> np.ndarray:
+        """Run BERT and the classification head on a padded batch"""
+        import torch
+        
+        # Move to device
+        input_ids = input_ids.to(self.device)
+        attention_mask = attention_mask.to(self.device)
+        
+        # Forward pass
+        with torch.no_grad():
+            bert_outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+            pooled_output = bert_outputs.pooler_output
+            pooled_output = self.dropout(pooled_output)
+            logits = self.classification_head(pooled_output)
+            
+            # Apply sigmoid to get scores between 0 and 1
+            return torch.sigmoid(logits).cpu().numpy()
+    
     def _default_scores(self) -> Dict[str, float]:
         """Return default balanced scores"""
         return {
@@ -264,6 +430,56 @@ class TrainedPersonalityModel:
             "Neuroticism": 0.5
         }
 
+class OnnxPersonalityModel(TrainedPersonalityModel):
+    """
+    Trained personality model served through ONNX Runtime
+    
+    Loads the graph written by export_onnx.py instead of rebuilding BERT in
+    PyTorch. Tokenization, length bucketing and micro-batching are shared
+    with TrainedPersonalityModel.
+    """
+    
+    tensor_type = 'np'
+    
+    def __init__(self, model_path: str, optimization_level: str = "O2",
+                 num_threads: int = 0, **kwargs):
+        self.optimization_level = optimization_level
+        self.num_threads = num_threads
+        self.session = None
+        super().__init__(model_path, device="cpu", **kwargs)
+    
+    def _load_model(self, model_path: str):
+        """Load the tokenizer and create the ONNX Runtime session"""
+        try:
+            import onnxruntime as ort
+            
+            self._load_config(model_path)
+            self._load_tokenizer(model_path)
+            
+            options = ort.SessionOptions()
+            level_name = ONNX_OPTIMIZATION_LEVELS.get(self.optimization_level, "ORT_ENABLE_EXTENDED")
+            options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, level_name)
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+            
+            onnx_path = os.path.join(model_path, ONNX_MODEL_FILENAME)
+            self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+            self.model_name = f"{self.config.get('model_name', 'Unknown')} (ONNX Runtime)"
+            
+            logger.info(f"ONNX personality model loaded from {onnx_path}")
+            
+        except Exception as e:
+            logger.error(f"Failed to load ONNX model: {e}")
+            raise
+    
+    def _forward(self, input_ids, attention_mask) -> np.ndarray:
+        """Run the exported graph on a padded batch"""
+        outputs = self.session.run(["scores"], {
+            "input_ids": np.asarray(input_ids, dtype=np.int64),
+            "attention_mask": np.asarray(attention_mask, dtype=np.int64)
+        })
+        return outputs[0]
+
 class MockTokenizer:
     """
     Mock tokenizer for consistency with ML model interface
@@ -282,12 +498,61 @@ class MockTokenizer:
         words = self.tokenize(text)
         return list(range(len(words)))  # Mock encoding
 
-def load_personality_model(model_path: str):
+def quantize_dynamic_int8(module):
+    """
+    Dynamically quantize every Linear layer of a module to INT8 for CPU inference
+    
+    Args:
+        module: Float module (a bare nn.Linear is supported as well)
+        
+    Returns:
+        Quantized module with weights stored as INT8
+    """
+    import torch
+    import torch.nn as nn
+    from torch.ao.quantization import quantize_dynamic
+    
+    # quantize_dynamic only swaps child modules, so wrap a bare Linear layer
+    if isinstance(module, nn.Linear):
+        return quantize_dynamic(nn.Sequential(module), {nn.Linear}, dtype=torch.qint8)[0]
+    return quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8)
+
+def load_deployment_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Load the deployment section of training_config.yaml
+    
+    Args:
+        config_path: Path to the YAML configuration file
+        
+    Returns:
+        Deployment settings merged over DEFAULT_DEPLOYMENT_CONFIG
+    """
+    deployment = dict(DEFAULT_DEPLOYMENT_CONFIG)
+    
+    if not os.path.exists(config_path):
+        return deployment
+    
+    try:
+        import yaml
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        deployment.update(config.get("deployment") or {})
+        deployment["quantization"] = bool((config.get("advanced") or {}).get("quantization", False))
+    except ImportError:
+        logger.warning("PyYAML not installed. Using default deployment settings.")
+    except Exception as e:
+        logger.error(f"Failed to load deployment config: {e}")
+    
+    return deployment
+
+def load_personality_model(model_path: str, batching: bool = True, backend: Optional[str] = None):
     """
     Load personality prediction model
     
     Args:
-        model_path: Path to the model file
+        model_path: Path to the model directory (or a file inside it)
+        batching: Group concurrent predictions into batched forward passes
+        backend: 'pytorch' or 'onnx'; defaults to deployment.model_format
         
     Returns:
         Loaded personality model (mock or trained implementation)
@@ -299,9 +564,37 @@ def load_personality_model(model_path: str):
     # Try to load trained model
     try:
         if os.path.exists(model_path):
-            logger.info(f"Loading trained personality model from {model_path}")
+            model_dir = model_path if os.path.isdir(model_path) else os.path.dirname(model_path)
+            deployment = load_deployment_config()
+            backend = backend or deployment["model_format"]
+            serving_options = {
+                "batching": batching,
+                "max_batch_size": int(deployment["max_batch_size"]),
+                "max_batch_wait_ms": float(deployment["max_batch_wait_ms"]),
+                "length_buckets": deployment["length_buckets"]
+            }
+            
+            if backend == "onnx":
+                if os.path.exists(os.path.join(model_dir, ONNX_MODEL_FILENAME)):
+                    logger.info(f"Loading ONNX personality model from {model_dir}")
+                    return OnnxPersonalityModel(
+                        model_dir,
+                        optimization_level=deployment.get("optimization_level", "O2"),
+                        **serving_options
+                    )
+                logger.warning(f"No {ONNX_MODEL_FILENAME} in {model_dir}. Run export_onnx.py first; using PyTorch.")
+            
+            if deployment["quantization"]:
+                if os.path.exists(os.path.join(model_dir, INT8_MODEL_FILENAME)):
+                    logger.info(f"Loading INT8 personality model from {model_dir}")
+                    return TrainedPersonalityModel(model_dir, "cpu", quantized=True, **serving_options)
+                logger.warning(f"No {INT8_MODEL_FILENAME} in {model_dir}. Run quantize_model.py first; using FP32.")
+            
+            import torch
+            
+            logger.info(f"Loading trained personality model from {model_dir}")
             device = "cuda" if torch.cuda.is_available() else "cpu"
-            return TrainedPersonalityModel(model_path, device)
+            return TrainedPersonalityModel(model_dir, device, **serving_options)
         else:
             logger.warning(f"Trained model not found at {model_path}. Falling back to mock model.")
             return MockPersonalityModel()
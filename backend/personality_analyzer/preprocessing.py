@@ -11,6 +11,102 @@ from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Patterns are compiled once at import and shared by every preprocessing call
+URL_PATTERN = re.compile(r'http\S+|www\S+|https\S+', flags=re.MULTILINE)
+EMAIL_PATTERN = re.compile(r'\S+@\S+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+CONTRACTIONS = {
+    "i'm": "i am", "you're": "you are", "he's": "he is", "she's": "she is",
+    "it's": "it is", "we're": "we are", "they're": "they are",
+    "i've": "i have", "you've": "you have", "we've": "we have",
+    "they've": "they have", "i'll": "i will", "you'll": "you will",
+    "he'll": "he will", "she'll": "she will", "we'll": "we will",
+    "they'll": "they will", "won't": "will not", "can't": "cannot",
+    "don't": "do not", "doesn't": "does not", "didn't": "did not",
+    "isn't": "is not", "aren't": "are not", "wasn't": "was not",
+    "weren't": "were not", "haven't": "have not", "hasn't": "has not",
+    "hadn't": "had not", "shouldn't": "should not", "wouldn't": "would not",
+    "couldn't": "could not"
+}
+
+# Expansions contain no apostrophes, so one alternation pass matches the
+# result of substituting each contraction in turn
+CONTRACTION_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(re.escape(c) for c in sorted(CONTRACTIONS, key=len, reverse=True)) + r')\b'
+)
+
+BOILERPLATE_PATTERNS = [
+    re.compile(pattern, flags=re.IGNORECASE) for pattern in [
+        r'equal opportunity employer',
+        r'we are an equal opportunity',
+        r'please submit your resume',
+        r'send your cv to',
+        r'apply now',
+        r'click here to apply'
+    ]
+]
+
+# One group per normalized job term, in the order they used to be applied
+JOB_TERMS = ['requirements', 'responsibilities', 'skills']
+JOB_TERM_PATTERN = re.compile(
+    r'\b(?:(requirements?|qualifications?)|(responsibilities?|duties)|(skills?|abilities))\b'
+)
+
+def _expand_contraction(match: re.Match) -> str:
+    """Replacement function for CONTRACTION_PATTERN"""
+    return CONTRACTIONS[match.group(0)]
+
+def _normalize_job_term(match: re.Match) -> str:
+    """Replacement function for JOB_TERM_PATTERN"""
+    return JOB_TERMS[match.lastindex - 1]
+
+# Word lists for linguistic feature extraction
+FIRST_PERSON_PRONOUNS = frozenset(['i', 'me', 'my', 'myself', 'mine'])
+SECOND_PERSON_PRONOUNS = frozenset(['you', 'your', 'yours', 'yourself'])
+THIRD_PERSON_PRONOUNS = frozenset(['he', 'she', 'they', 'him', 'her', 'them'])
+
+POSITIVE_WORDS = frozenset([
+    'happy', 'excited', 'love', 'amazing', 'great', 'awesome', 'fantastic',
+    'wonderful', 'excellent', 'perfect', 'brilliant', 'outstanding'
+])
+
+NEGATIVE_WORDS = frozenset([
+    'sad', 'angry', 'hate', 'terrible', 'awful', 'horrible', 'disgusting',
+    'worried', 'anxious', 'stressed', 'frustrated', 'disappointed'
+])
+
+CERTAINTY_WORDS = frozenset([
+    'definitely', 'certainly', 'absolutely', 'sure', 'confident', 'always', 'never'
+])
+
+UNCERTAINTY_WORDS = frozenset([
+    'maybe', 'perhaps', 'might', 'possibly', 'sometimes', 'usually', 'probably'
+])
+
+# Word -> counter lookup tables. Pronouns are counted on the original words
+# (before contraction expansion), everything else on the processed words.
+PRONOUN_CATEGORIES = {
+    **dict.fromkeys(FIRST_PERSON_PRONOUNS, 'first_person'),
+    **dict.fromkeys(SECOND_PERSON_PRONOUNS, 'second_person'),
+    **dict.fromkeys(THIRD_PERSON_PRONOUNS, 'third_person')
+}
+
+WORD_CATEGORIES = {
+    **dict.fromkeys(POSITIVE_WORDS, 'positive_words'),
+    **dict.fromkeys(NEGATIVE_WORDS, 'negative_words'),
+    **dict.fromkeys(CERTAINTY_WORDS, 'certainty_words'),
+    **dict.fromkeys(UNCERTAINTY_WORDS, 'uncertainty_words')
+}
+
+# Counts that can be summed across messages (sentence_count cannot, since
+# sentences may continue across a message boundary)
+ADDITIVE_COUNTS = (
+    'word_count', 'word_chars', 'exclamation_count', 'question_count',
+    'first_person', 'second_person', 'third_person',
+    'positive_words', 'negative_words', 'certainty_words', 'uncertainty_words'
+)
+
 class TextPreprocessor:
     """
     Handles all text preprocessing for personality analysis
@@ -47,55 +143,103 @@ class TextPreprocessor:
         original_length = len(text)
         
         # Mode-specific preprocessing
-        if mode == 'jd':  # Job description
-            processed = self._preprocess_job_description(text)
-        elif mode == 'quest':  # Quest responses
-            processed = self._preprocess_quest_responses(text)
-        else:  # General conversation
-            processed = self._preprocess_general_text(text)
+        processed = self._preprocess_for_mode(text, mode)
         
         # Extract linguistic features
-        features = self._extract_linguistic_features(processed, text)
+        counts = self._count_features(processed, text)
         
         return {
             'processed_text': processed,
             'original_length': original_length,
-            'word_count': len(processed.split()),
-            'sentence_count': len([s for s in processed.split('.') if s.strip()]),
-            'features': features
+            'word_count': counts['word_count'],
+            'sentence_count': counts['sentence_count'],
+            'features': self._features_from_counts(counts)
         }
     
+    def count_message_features(self, text: str, mode: str = 'general') -> Dict[str, Any]:
+        """
+        Preprocess one message and return its raw feature counts
+        
+        Counts are additive, so the counts of several messages can be combined
+        with combine_message_features instead of re-preprocessing their
+        concatenation.
+        
+        Args:
+            text: Message text
+            mode: Processing mode ('quest', 'conversation', 'general')
+            
+        Returns:
+            Dict with processed_text, original_length and the raw counts
+        """
+        if not text or not isinstance(text, str):
+            counts = self._count_features('', '')
+            counts.update({'processed_text': '', 'original_length': 0})
+            return counts
+        
+        processed = self._preprocess_for_mode(text, mode)
+        counts = self._count_features(processed, text)
+        counts.update({'processed_text': processed, 'original_length': len(text)})
+        return counts
+    
+    def combine_message_features(self, message_counts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine per-message counts into a preprocess_text result
+        
+        The result matches preprocess_text on the messages joined with spaces
+        for every mode except 'jd', whose boilerplate patterns can span messages.
+        
+        Args:
+            message_counts: Outputs of count_message_features, in message order
+            
+        Returns:
+            Dict in the same format as preprocess_text
+        """
+        processed = ' '.join(counts['processed_text'] for counts in message_counts
+                             if counts['processed_text'])
+        
+        if not message_counts:
+            original_length = 0
+        else:
+            original_length = sum(counts['original_length'] for counts in message_counts) + len(message_counts) - 1
+        
+        totals = dict.fromkeys(ADDITIVE_COUNTS, 0)
+        for counts in message_counts:
+            for key in ADDITIVE_COUNTS:
+                totals[key] += counts[key]
+        
+        return {
+            'processed_text': processed,
+            'original_length': original_length,
+            'word_count': totals['word_count'],
+            'sentence_count': _count_sentences(processed, totals['word_count']),
+            'features': self._features_from_counts(totals)
+        }
+    
+    def _preprocess_for_mode(self, text: str, mode: str) -> str:
+        """Dispatch to the mode-specific preprocessing"""
+        if mode == 'jd':  # Job description
+            return self._preprocess_job_description(text)
+        elif mode == 'quest':  # Quest responses
+            return self._preprocess_quest_responses(text)
+        else:  # General conversation
+            return self._preprocess_general_text(text)
+    
     def _preprocess_general_text(self, text: str) -> str:
         """Standard text preprocessing for general conversation"""
         # Convert to lowercase
         text = text.lower()
         
         # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '[URL]', text, flags=re.MULTILINE)
+        text = URL_PATTERN.sub('[URL]', text)
         
         # Remove email addresses
-        text = re.sub(r'\S+@\S+', '[EMAIL]', text)
+        text = EMAIL_PATTERN.sub('[EMAIL]', text)
         
         # Handle contractions (preserve meaning)
-        contractions = {
-            "i'm": "i am", "you're": "you are", "he's": "he is", "she's": "she is",
-            "it's": "it is", "we're": "we are", "they're": "they are",
-            "i've": "i have", "you've": "you have", "we've": "we have",
-            "they've": "they have", "i'll": "i will", "you'll": "you will",
-            "he'll": "he will", "she'll": "she will", "we'll": "we will",
-            "they'll": "they will", "won't": "will not", "can't": "cannot",
-            "don't": "do not", "doesn't": "does not", "didn't": "did not",
-            "isn't": "is not", "aren't": "are not", "wasn't": "was not",
-            "weren't": "were not", "haven't": "have not", "hasn't": "has not",
-            "hadn't": "had not", "shouldn't": "should not", "wouldn't": "would not",
-            "couldn't": "could not"
-        }
-        
-        for contraction, expansion in contractions.items():
-            text = re.sub(r'\b' + contraction + r'\b', expansion, text)
+        text = CONTRACTION_PATTERN.sub(_expand_contraction, text)
         
         # Clean up extra whitespace but preserve sentence structure
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         
         return text
     
@@ -103,23 +247,12 @@ class TextPreprocessor:
         """Specialized preprocessing for job descriptions"""
         text = text.lower()
         
-        # Remove common JD boilerplate
-        boilerplate_patterns = [
-            r'equal opportunity employer',
-            r'we are an equal opportunity',
-            r'please submit your resume',
-            r'send your cv to',
-            r'apply now',
-            r'click here to apply'
-        ]
-        
-        for pattern in boilerplate_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+        # Remove common JD boilerplate (in order, since the phrases overlap)
+        for pattern in BOILERPLATE_PATTERNS:
+            text = pattern.sub('', text)
         
         # Normalize job-specific terms
-        text = re.sub(r'\b(requirements?|qualifications?)\b', 'requirements', text)
-        text = re.sub(r'\b(responsibilities?|duties)\b', 'responsibilities', text)
-        text = re.sub(r'\b(skills?|abilities)\b', 'skills', text)
+        text = JOB_TERM_PATTERN.sub(_normalize_job_term, text)
         
         return self._preprocess_general_text(text)
     
@@ -130,8 +263,8 @@ class TextPreprocessor:
         text = text.lower()
         
         # Less aggressive cleaning for quest responses to preserve personality indicators
-        text = re.sub(r'http\S+|www\S+|https\S+', '[URL]', text, flags=re.MULTILINE)
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = URL_PATTERN.sub('[URL]', text)
+        text = WHITESPACE_PATTERN.sub(' ', text).strip()
         
         return text
     
@@ -139,63 +272,86 @@ class TextPreprocessor:
         """
         Extract linguistic features that correlate with personality traits
         """
-        words = processed_text.split()
-        original_words = original_text.lower().split()
+        return self._features_from_counts(self._count_features(processed_text, original_text))
+    
+    def _count_features(self, processed_text: str, original_text: str) -> Dict[str, int]:
+        """
+        Count the raw quantities the linguistic features are built from
         
-        if not words:
-            return {}
+        Each word list is resolved through a single lookup table, so the
+        tokens are walked once instead of once per word list.
+        """
+        words = processed_text.split()
         
-        # Word-level features
-        avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
+        counts = dict.fromkeys(ADDITIVE_COUNTS, 0)
+        counts['word_count'] = len(words)
+        counts['word_chars'] = sum(map(len, words))
+        counts['sentence_count'] = _count_sentences(processed_text, len(words))
         
         # Punctuation usage (from original text)
-        exclamation_count = original_text.count('!')
-        question_count = original_text.count('?')
-        
-        # Personal pronoun usage (personality indicator)
-        first_person = sum(1 for word in original_words if word in ['i', 'me', 'my', 'myself', 'mine'])
-        second_person = sum(1 for word in original_words if word in ['you', 'your', 'yours', 'yourself'])
-        third_person = sum(1 for word in original_words if word in ['he', 'she', 'they', 'him', 'her', 'them'])
+        counts['exclamation_count'] = original_text.count('!')
+        counts['question_count'] = original_text.count('?')
         
-        # Emotional indicators
-        positive_words = sum(1 for word in words if word in [
-            'happy', 'excited', 'love', 'amazing', 'great', 'awesome', 'fantastic',
-            'wonderful', 'excellent', 'perfect', 'brilliant', 'outstanding'
-        ])
+        # Emotional and certainty indicators
+        for category in filter(None, map(WORD_CATEGORIES.get, words)):
+            counts[category] += 1
         
-        negative_words = sum(1 for word in words if word in [
-            'sad', 'angry', 'hate', 'terrible', 'awful', 'horrible', 'disgusting',
-            'worried', 'anxious', 'stressed', 'frustrated', 'disappointed'
-        ])
-        
-        # Certainty indicators
-        certainty_words = sum(1 for word in words if word in [
-            'definitely', 'certainly', 'absolutely', 'sure', 'confident', 'always', 'never'
-        ])
+        # Personal pronoun usage (personality indicator)
+        for category in filter(None, map(PRONOUN_CATEGORIES.get, original_text.lower().split())):
+            counts[category] += 1
         
-        uncertainty_words = sum(1 for word in words if word in [
-            'maybe', 'perhaps', 'might', 'possibly', 'sometimes', 'usually', 'probably'
-        ])
+        return counts
+    
+    def _features_from_counts(self, counts: Dict[str, int]) -> Dict[str, float]:
+        """Turn raw counts into per-word feature ratios"""
+        word_count = counts['word_count']
         
-        word_count = len(words)
+        if not word_count:
+            return {}
         
         return {
-            'avg_word_length': avg_word_length,
-            'exclamation_ratio': exclamation_count / word_count if word_count > 0 else 0,
-            'question_ratio': question_count / word_count if word_count > 0 else 0,
-            'first_person_ratio': first_person / word_count if word_count > 0 else 0,
-            'second_person_ratio': second_person / word_count if word_count > 0 else 0,
-            'third_person_ratio': third_person / word_count if word_count > 0 else 0,
-            'positive_emotion_ratio': positive_words / word_count if word_count > 0 else 0,
-            'negative_emotion_ratio': negative_words / word_count if word_count > 0 else 0,
-            'certainty_ratio': certainty_words / word_count if word_count > 0 else 0,
-            'uncertainty_ratio': uncertainty_words / word_count if word_count > 0 else 0,
+            'avg_word_length': counts['word_chars'] / word_count,
+            'exclamation_ratio': counts['exclamation_count'] / word_count,
+            'question_ratio': counts['question_count'] / word_count,
+            'first_person_ratio': counts['first_person'] / word_count,
+            'second_person_ratio': counts['second_person'] / word_count,
+            'third_person_ratio': counts['third_person'] / word_count,
+            'positive_emotion_ratio': counts['positive_words'] / word_count,
+            'negative_emotion_ratio': counts['negative_words'] / word_count,
+            'certainty_ratio': counts['certainty_words'] / word_count,
+            'uncertainty_ratio': counts['uncertainty_words'] / word_count,
             'word_count': word_count
         }
 
+def _count_sentences(processed_text: str, word_count: int) -> int:
+    """Number of non-blank '.'-separated segments"""
+    if '.' not in processed_text:
+        return 1 if word_count else 0
+    return sum(1 for segment in processed_text.split('.') if segment.strip())
+
+# Shared instance used by the convenience functions (TextPreprocessor is stateless)
+_preprocessor = TextPreprocessor()
+
+def get_preprocessor() -> TextPreprocessor:
+    """
+    Get the shared TextPreprocessor instance
+    """
+    return _preprocessor
+
 def preprocess_text(text: str, mode: str = 'general') -> Dict[str, Any]:
     """
     Convenience function for text preprocessing
     """
-    preprocessor = TextPreprocessor()
-    return preprocessor.preprocess_text(text, mode)
\ No newline at end of file
+    return _preprocessor.preprocess_text(text, mode)
+
+def count_message_features(text: str, mode: str = 'general') -> Dict[str, Any]:
+    """
+    Convenience function for per-message feature counting
+    """
+    return _preprocessor.count_message_features(text, mode)
+
+def combine_message_features(message_counts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Convenience function for combining per-message feature counts
+    """
+    return _preprocessor.combine_message_features(message_counts)
\ No newline at end of file
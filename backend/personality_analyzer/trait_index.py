@@ -0,0 +1,157 @@
+"""
+Trait Index Module
+
+Inverted index from normalized trait tags to the characters that have them,
+built once from the character trait lists. Each tag maps to a bitset (an
+int with bit i set for the i-th character), so a query over several traits
+is a few integer AND/OR/NOT operations instead of a scan that lowercases
+every character's trait list.
+"""
+
+import re
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .character_data import CHARACTER_TRAITS, get_all_characters
+
+# Most traits a filter expression may reference
+MAX_FILTER_TERMS = 64
+
+# One parsed filter clause: (negated, tag) alternatives, any of which matches
+Clause = List[Tuple[bool, str]]
+
+def normalize_trait(trait: str) -> str:
+    """Canonical tag for a trait: lowercase, with spaces, underscores and hyphens as one hyphen"""
+    return re.sub(r"[\s_-]+", "-", trait.strip().lower())
+
+def parse_trait_filter(expression: str) -> List[Clause]:
+    """
+    Parse a trait filter expression
+
+    Clauses separated by ',' must all match; alternatives within a clause
+    separated by '|' match if any does; a '!' before a trait negates it.
+    "energetic,creative|analytical,!chaotic" is energetic AND (creative OR
+    analytical) AND NOT chaotic.
+
+    Raises:
+        ValueError: For an empty trait or more than MAX_FILTER_TERMS traits
+    """
+    clauses = []
+    terms = 0
+    for clause_text in expression.split(','):
+        clause = []
+        for term in clause_text.split('|'):
+            term = term.strip()
+            negated = term.startswith('!')
+            tag = normalize_trait(term[1:] if negated else term)
+            if not tag or tag == '-':
+                raise ValueError(f"Empty trait in filter '{expression}'")
+            clause.append((negated, tag))
+        terms += len(clause)
+        clauses.append(clause)
+
+    if terms > MAX_FILTER_TERMS:
+        raise ValueError(f"Too many traits in filter: {terms} (maximum {MAX_FILTER_TERMS})")
+    return clauses
+
+
+class TraitIndex:
+    """
+    Inverted index of character trait tags
+
+    Results list characters in the order they were given, which is the
+    character database's order.
+    """
+
+    def __init__(self, character_traits: Dict[str, Sequence[str]]):
+        """
+        Build the index
+
+        Args:
+            character_traits: Character name -> trait tags (any case or spacing)
+        """
+        self.names = list(character_traits.keys())
+        self.everyone = (1 << len(self.names)) - 1
+
+        positions: Dict[str, List[int]] = {}
+        for position, name in enumerate(self.names):
+            for trait in character_traits[name]:
+                positions.setdefault(normalize_trait(trait), []).append(position)
+
+        # Each bitset is packed in one go; OR-ing bits into a growing int is quadratic
+        self.bitsets: Dict[str, int] = {}
+        for tag, members in positions.items():
+            bits = np.zeros(len(self.names), dtype=bool)
+            bits[members] = True
+            self.bitsets[tag] = int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def tags(self) -> List[str]:
+        """Every indexed tag, sorted"""
+        return sorted(self.bitsets)
+
+    def bitset(self, trait: str) -> int:
+        """Characters with a trait, as a bitset (0 for unknown traits)"""
+        return self.bitsets.get(normalize_trait(trait), 0)
+
+    def query(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+              none_of: Iterable[str] = ()) -> List[str]:
+        """
+        Characters with every trait in all_of, at least one in any_of (if
+        any are given) and none in none_of
+        """
+        selected = self.everyone
+        for trait in all_of:
+            selected &= self.bitset(trait)
+
+        alternatives = [self.bitset(trait) for trait in any_of]
+        if alternatives:
+            matched = 0
+            for bitset in alternatives:
+                matched |= bitset
+            selected &= matched
+
+        for trait in none_of:
+            selected &= ~self.bitset(trait)
+        return self.names_of(selected)
+
+    def select(self, expression: str) -> List[str]:
+        """Characters matching a filter expression (see parse_trait_filter)"""
+        selected = self.everyone
+        for clause in parse_trait_filter(expression):
+            matched = 0
+            for negated, tag in clause:
+                bitset = self.bitsets.get(tag, 0)
+                matched |= self.everyone & ~bitset if negated else bitset
+            selected &= matched
+        return self.names_of(selected)
+
+    def unknown_traits(self, expression: str) -> List[str]:
+        """Tags in a filter expression that no character has"""
+        return sorted({tag for clause in parse_trait_filter(expression)
+                       for _, tag in clause if tag not in self.bitsets})
+
+    def names_of(self, bitset: int) -> List[str]:
+        """Character names for the set bits, in character order"""
+        packed = np.frombuffer(bitset.to_bytes((len(self.names) + 7) // 8, 'little'), dtype=np.uint8)
+        return [self.names[position] for position in np.flatnonzero(np.unpackbits(packed, bitorder='little')).tolist()]
+
+
+# Shared index over the built-in character database, built on first use
+_default_index = None
+_default_index_lock = threading.Lock()
+
+def get_trait_index() -> TraitIndex:
+    """Get the shared trait index over get_all_characters() and CHARACTER_TRAITS"""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                _default_index = TraitIndex({name: CHARACTER_TRAITS.get(name, ())
+                                             for name in get_all_characters()})
+    return _default_index
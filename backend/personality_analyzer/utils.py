@@ -8,7 +8,8 @@ and providing explainable AI insights.
 from typing import Dict, List, Any, Tuple
 import logging
 import numpy as np
-from scipy.spatial.distance import cosine
+
+from .matching import CharacterMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -488,8 +489,9 @@ def calculate_similarity(user_profile: Dict[str, float], character_profile: Dict
     if np.linalg.norm(user_vec) == 0 or np.linalg.norm(char_vec) == 0:
         return 0.0
     
-    # Calculate cosine similarity (1 - cosine distance)
-    similarity = 1 - cosine(user_vec, char_vec)
+    # Calculate cosine similarity; numpy is enough for five dimensions, and
+    # importing scipy for it would add a third of a second to startup
+    similarity = float(np.dot(user_vec, char_vec) / np.sqrt(np.dot(user_vec, user_vec) * np.dot(char_vec, char_vec)))
     
     # Ensure result is in valid range [0, 1]
     return max(0.0, min(1.0, similarity))
@@ -498,6 +500,9 @@ def find_best_character_match(user_profile: Dict[str, float], all_characters: Di
     """
     Finds the AI character with the highest personality similarity to the user.
     
+    Builds a CharacterMatcher for the given characters on every call; callers
+    that match repeatedly against the same characters should keep one instead.
+    
     Args:
         user_profile: User's Big Five personality scores (0-1 scale)
         all_characters: Dictionary of character data from character_data.py
@@ -505,19 +510,7 @@ def find_best_character_match(user_profile: Dict[str, float], all_characters: Di
     Returns:
         Tuple of (character_name, character_data, similarity_score)
     """
-    best_match_name = None
-    best_match_data = None
-    highest_similarity = -1.0
-    
-    for char_name, char_data in all_characters.items():
-        similarity = calculate_similarity(user_profile, char_data)
-        
-        if similarity > highest_similarity:
-            highest_similarity = similarity
-            best_match_name = char_name
-            best_match_data = char_data
-    
-    return best_match_name, best_match_data, highest_similarity
+    return CharacterMatcher(all_characters).best_match(user_profile)
 
 def get_personality_insights(user_profile: Dict[str, float], selected_traits: Dict[str, bool]) -> Dict[str, Any]:
     """
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+INT8 Post-Training Quantization for the Personality Prediction Model
+===================================================================
+
+Produces a dynamically quantized INT8 copy of a trained checkpoint for
+CPU-only serving. The BERT backbone and the classification head both have
+their Linear layers quantized. Also writes a report comparing accuracy
+(MSE/R² on the test split) against p50/p99 latency and resident memory
+for the FP32 and INT8 models.
+
+Usage:
+    python quantize_model.py
+    python quantize_model.py --model_dir models/ --max_samples 200
+    python quantize_model.py --model_dir models/ --no-report
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import time
+import queue
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+import torch
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from personality_analyzer.model_loader import (
+    TrainedPersonalityModel, INT8_MODEL_FILENAME, quantize_dynamic_int8
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def quantize_model(model_dir: str) -> str:
+    """
+    Write a dynamically quantized INT8 checkpoint next to personality_model.pt
+
+    Args:
+        model_dir: Directory written by PersonalityTrainer.save_model
+
+    Returns:
+        Path to the INT8 checkpoint
+    """
+    model = TrainedPersonalityModel(model_dir, device="cpu", batching=False)
+
+    # Saved through one container so the quantized layers keep their state dict metadata
+    quantized = torch.nn.ModuleDict({
+        "bert": quantize_dynamic_int8(model.bert),
+        "classification_head": quantize_dynamic_int8(model.classification_head)
+    })
+
+    int8_path = os.path.join(model_dir, INT8_MODEL_FILENAME)
+    torch.save(quantized.state_dict(), int8_path)
+
+    fp32_size = os.path.getsize(os.path.join(model_dir, "personality_model.pt")) / 1e6
+    int8_size = os.path.getsize(int8_path) / 1e6
+    logger.info(f"Saved INT8 model to {int8_path} ({fp32_size:.1f} MB -> {int8_size:.1f} MB)")
+
+    return int8_path
+
+def load_test_split(model_dir: str, data_path: str = None) -> Tuple[List[str], List[List[float]]]:
+    """
+    Rebuild the test split the checkpoint was evaluated on
+
+    Args:
+        model_dir: Directory containing training_config.json
+        data_path: Override for the dataset directory
+
+    Returns:
+        Tuple of (texts, labels) for the test split
+    """
+    from train_model import DatasetLoader
+
+    with open(os.path.join(model_dir, "training_config.json"), 'r') as f:
+        config = json.load(f)
+
+    # Same seeding as PersonalityTrainer so the split matches training
+    seed = config.get("seed", 42)
+    torch.manual_seed(seed)
+    np.random.seed(seed)
+
+    texts, labels = DatasetLoader.load(config.get("dataset_name", "synthetic"),
+                                       data_path or config.get("data_path", "data/"))
+    _, _, (test_texts, test_labels) = DatasetLoader.split(
+        texts, labels, config.get("val_split", 0.1), config.get("test_split", 0.1), seed
+    )
+
+    return test_texts, test_labels
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # Peak RSS is the best we can do without /proc (KB on Linux, bytes on macOS)
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure_variant(model_dir: str, quantized: bool, texts: List[str], threads: int, results):
+    """Load one model variant in a fresh process and measure it"""
+    torch.set_num_threads(threads)
+    rss_before = _rss_mb()
+    model = TrainedPersonalityModel(model_dir, device="cpu", batching=False, quantized=quantized)
+    rss_after = _rss_mb()
+
+    model.predict_batch(texts[:1])  # Warm-up
+
+    predictions, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        scores = model.predict_batch([text])[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        predictions.append([scores[trait] for trait in model.traits])
+
+    results.put({
+        "predictions": predictions,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+        "model_rss_mb": rss_after - rss_before,
+        "process_rss_mb": _rss_mb()
+    })
+
+def generate_report(model_dir: str, data_path: str = None, max_samples: int = 500,
+                    threads: int = 1) -> Dict[str, Any]:
+    """
+    Compare the FP32 and INT8 models on accuracy, latency and memory
+
+    Args:
+        model_dir: Directory containing both checkpoints
+        data_path: Override for the dataset directory
+        max_samples: Cap on test samples scored per variant
+        threads: Torch intra-op threads per variant
+
+    Returns:
+        Report dictionary (also saved as quantization_report.json)
+    """
+    from sklearn.metrics import mean_squared_error, r2_score
+
+    texts, labels = load_test_split(model_dir, data_path)
+    texts, labels = texts[:max_samples], np.array(labels[:max_samples])
+
+    # Each variant runs in its own process so resident memory is not shared
+    context = multiprocessing.get_context("spawn")
+    report = {"test_samples": len(texts), "threads": threads}
+
+    for name, quantized in [("fp32", False), ("int8", True)]:
+        results = context.Queue()
+        process = context.Process(target=_measure_variant, args=(model_dir, quantized, texts, threads, results))
+        process.start()
+        measured = None
+        while measured is None:
+            try:
+                measured = results.get(timeout=1)
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(f"Measuring the {name} model failed (exit code {process.exitcode})")
+        process.join()
+
+        predictions = np.array(measured.pop("predictions"))
+        measured["mse"] = float(mean_squared_error(labels.flatten(), predictions.flatten()))
+        measured["r2"] = float(r2_score(labels.flatten(), predictions.flatten()))
+        report[name] = measured
+
+    report["delta"] = {
+        "mse": report["int8"]["mse"] - report["fp32"]["mse"],
+        "r2": report["int8"]["r2"] - report["fp32"]["r2"],
+        "latency_p50_speedup": report["fp32"]["latency_p50_ms"] / report["int8"]["latency_p50_ms"],
+        "latency_p99_speedup": report["fp32"]["latency_p99_ms"] / report["int8"]["latency_p99_ms"],
+        "model_rss_saved_mb": report["fp32"]["model_rss_mb"] - report["int8"]["model_rss_mb"]
+    }
+
+    report_path = Path(model_dir) / "quantization_report.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Quantization report saved to {report_path}")
+
+    return report
+
+def print_report(report: Dict[str, Any]):
+    """Print the FP32 vs INT8 comparison table"""
+    print("\n" + "=" * 60)
+    print(f"📊 FP32 vs INT8 ({report['test_samples']} test samples, {report['threads']} thread)")
+    print("=" * 60)
+    print(f"{'':<18}{'FP32':>12}{'INT8':>12}{'Change':>14}")
+
+    rows = [
+        ("MSE", "mse", "{:.4f}"),
+        ("R²", "r2", "{:.4f}"),
+        ("p50 latency (ms)", "latency_p50_ms", "{:.1f}"),
+        ("p99 latency (ms)", "latency_p99_ms", "{:.1f}"),
+        ("Model RSS (MB)", "model_rss_mb", "{:.0f}"),
+        ("Process RSS (MB)", "process_rss_mb", "{:.0f}")
+    ]
+    for label, key, fmt in rows:
+        fp32, int8 = report["fp32"][key], report["int8"][key]
+        print(f"{label:<18}{fmt.format(fp32):>12}{fmt.format(int8):>12}{fmt.format(int8 - fp32):>14}")
+    print("=" * 60)
+
+def main():
+    """Main quantization function"""
+    parser = argparse.ArgumentParser(description="Quantize personality model to INT8")
+
+    parser.add_argument("--model_dir", type=str, default="models/",
+                       help="Directory written by PersonalityTrainer.save_model")
+    parser.add_argument("--data_path", type=str, default=None,
+                       help="Dataset directory (defaults to the one used for training)")
+    parser.add_argument("--max_samples", type=int, default=500,
+                       help="Maximum test samples used for the report")
+    parser.add_argument("--threads", type=int, default=1,
+                       help="Torch threads per model during latency measurement")
+    parser.add_argument("--no-report", dest="report", action="store_false",
+                       help="Only write the INT8 checkpoint")
+
+    args = parser.parse_args()
+
+    try:
+        int8_path = quantize_model(args.model_dir)
+
+        if args.report:
+            report = generate_report(args.model_dir, args.data_path, args.max_samples, args.threads)
+            print_report(report)
+
+        print(f"✅ INT8 model saved to: {int8_path}")
+        print("📝 Set advanced.quantization: true in training_config.yaml to serve it")
+
+    except Exception as e:
+        logger.error(f"Quantization failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -65,6 +65,68 @@ def test_quest_analysis():
         print(f"❌ Quest analysis failed: {e}")
         return False
 
+def test_conversation_analysis():
+    """Test incremental conversation mode analysis"""
+    print("\n🧪 Testing conversation mode analysis...")
+    
+    try:
+        from personality_analyzer.preprocessing import (
+            preprocess_text, count_message_features, combine_message_features
+        )
+        
+        # Combined per-message counts must match preprocessing the joined text
+        messages = ["Hi! I'm Sam and I can't wait.", "Maybe you'd like http://x.co?", "They're GREAT, always."]
+        combined = combine_message_features([count_message_features(m, 'conversation') for m in messages])
+        assert combined == preprocess_text(' '.join(messages), 'conversation'), "Combined counts differ"
+        
+        analyzer = PersonalityAnalyzer(cache_size=0)
+        history = []
+        for turn in range(8):
+            text = f"Turn {turn}: I definitely love this, do you?"
+            analyzer.analyze_text(text, mode='conversation', context=history, session_id="test")
+            history += [{"role": "user", "content": text}, {"role": "assistant", "content": f"Reply {turn}"}]
+        
+        # Each turn only preprocesses the new message and the latest reply
+        stats = analyzer.get_conversation_stats()
+        assert stats["messages_computed"] == 1 + 2 * 7, f"Unexpected stats: {stats}"
+        
+        print(f"✅ Conversation analysis successful! {stats}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Conversation analysis failed: {e}")
+        return False
+
+def test_batch_analysis():
+    """Test batch analysis with per-item errors"""
+    print("\n🧪 Testing batch analysis...")
+    
+    try:
+        analyzer = PersonalityAnalyzer(cache_size=0, max_batch_items=4)
+        texts = ["I love working with my team!", "", "Maybe I worry too much about deadlines"]
+        
+        results = analyzer.analyze_batch(texts, mode='general')
+        
+        assert [r['status'] for r in results] == ['success', 'error', 'success'], results
+        scores, _, _ = analyzer.analyze_text(texts[2], mode='general')
+        assert results[2]['personality_scores'] == scores, "Batch result differs from single analysis"
+        
+        try:
+            analyzer.analyze_batch(texts * 2)
+            print("❌ Expected oversized batch to be rejected")
+            return False
+        except ValueError:
+            pass
+        
+        print("✅ Batch analysis successful!")
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Batch analysis failed: {e}")
+        return False
+
 def test_model_info():
     """Test model information retrieval"""
     print("\n🧪 Testing model information...")
@@ -90,6 +152,8 @@ def main():
     tests = [
         test_basic_analysis,
         test_quest_analysis,
+        test_conversation_analysis,
+        test_batch_analysis,
         test_model_info
     ]
     
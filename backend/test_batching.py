@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the micro-batching inference scheduler
+
+Uses a fake batch function so no trained model is needed.
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from personality_analyzer.batching import MicroBatchScheduler, PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+def fake_batch_fn(batch_sizes):
+    """Build a batch function that scores by text length and records batch sizes"""
+    def batch_fn(texts):
+        batch_sizes.append(len(texts))
+        time.sleep(0.01)
+        return [{"Openness": len(text) / 100.0} for text in texts]
+    return batch_fn
+
+def test_concurrent_requests_are_batched():
+    """Concurrent callers share forward passes and get their own results"""
+    print("🧪 Testing concurrent request batching...")
+
+    try:
+        batch_sizes = []
+        scheduler = MicroBatchScheduler(fake_batch_fn(batch_sizes), max_batch_size=8, max_wait_ms=50)
+        results = {}
+
+        def worker(i):
+            results[i] = scheduler.predict("x" * i)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 17)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        scheduler.close()
+
+        assert all(results[i]["Openness"] == i / 100.0 for i in range(1, 17)), "Results were mixed up"
+        assert sum(batch_sizes) == 16, f"Unexpected batch sizes: {batch_sizes}"
+        assert max(batch_sizes) <= 8, "Batch exceeded max_batch_size"
+        assert len(batch_sizes) < 16, "Requests were not batched"
+
+        print(f"✅ 16 requests served in {len(batch_sizes)} batches: {batch_sizes}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Batching test failed: {e}")
+        return False
+
+def test_interactive_requests_jump_bulk_queue():
+    """Interactive requests are served before queued bulk work"""
+    print("\n🧪 Testing interactive priority...")
+
+    try:
+        order = []
+
+        def batch_fn(texts):
+            order.extend(texts)
+            time.sleep(0.02)
+            return [{} for _ in texts]
+
+        scheduler = MicroBatchScheduler(batch_fn, max_batch_size=2, max_wait_ms=0)
+
+        # Occupy the worker, then queue bulk work followed by one interactive request
+        first = scheduler.submit("warmup", PRIORITY_BULK)
+        time.sleep(0.005)
+        bulk = [scheduler.submit(f"bulk{i}", PRIORITY_BULK) for i in range(6)]
+        interactive = scheduler.submit("interactive", PRIORITY_INTERACTIVE)
+
+        for future in [first, interactive] + bulk:
+            future.result(timeout=5)
+        scheduler.close()
+
+        assert order.index("interactive") <= 2, f"Interactive request starved: {order}"
+
+        print(f"✅ Interactive request served at position {order.index('interactive')}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Priority test failed: {e}")
+        return False
+
+def test_batch_errors_reach_callers():
+    """A failing forward pass is reported to every caller in the batch"""
+    print("\n🧪 Testing error propagation...")
+
+    try:
+        def failing_batch_fn(texts):
+            raise RuntimeError("model exploded")
+
+        scheduler = MicroBatchScheduler(failing_batch_fn, max_batch_size=4, max_wait_ms=1)
+
+        try:
+            scheduler.predict("hello", timeout=5)
+            print("❌ Expected an exception")
+            return False
+        except RuntimeError as e:
+            assert "model exploded" in str(e)
+        finally:
+            scheduler.close()
+
+        print("✅ Errors propagated to caller")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error propagation test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Micro-Batching Scheduler\n")
+
+    tests = [
+        test_concurrent_requests_are_batched,
+        test_interactive_requests_jump_bulk_queue,
+        test_batch_errors_reach_callers
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
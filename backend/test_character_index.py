@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test script for the character nearest-neighbour index
+
+Checks that CharacterIndex matches exactly like the CharacterMatcher full
+scan, ties included, before and after in-place inserts and deletes, and that
+build_matcher switches to it for large databases.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from personality_analyzer.character_index import CharacterIndex
+from personality_analyzer.matching import CharacterMatcher, CHARACTER_KEYS, TRAITS, build_matcher
+from benchmarks.benchmark_matching import make_characters
+from benchmarks.benchmark_character_index import make_continuous_characters
+
+ZERO_CHARACTER = dict.fromkeys(CHARACTER_KEYS, 1)
+
+def random_profiles(count, seed=0):
+    """Continuous profiles plus profiles on a 0.25 grid, which produce exact ties"""
+    rng = np.random.default_rng(seed)
+    continuous = [dict(zip(TRAITS, rng.random(len(TRAITS)).tolist())) for _ in range(count)]
+    grid = [dict(zip(TRAITS, (rng.integers(0, 5, len(TRAITS)) / 4).tolist())) for _ in range(count)]
+    return continuous + grid + [{}, dict.fromkeys(TRAITS, 0.0), {"Openness": 1.0, **dict.fromkeys(TRAITS[1:], 0.0)}]
+
+def assert_same_matches(index, matcher, profiles, top_k=8):
+    """Best match, top-k ranking and score distribution agree with the full scan"""
+    for profile in profiles:
+        name, _, similarity = index.best_match(profile)
+        expected_name, _, expected_similarity = matcher.best_match(profile)
+        assert name == expected_name and abs(similarity - expected_similarity) < 1e-12, f"Best match differs for {profile}"
+
+        report, expected = index.match_report(profile, top_k), matcher.match_report(profile, top_k)
+        assert [match["name"] for match in report["top_matches"]] == [match["name"] for match in expected["top_matches"]]
+        for key, value in expected["score_distribution"].items():
+            assert abs(report["score_distribution"][key] - value) < 1e-9, f"{key} differs for {profile}"
+
+def test_exact_queries_match_scan():
+    """Exact index queries return the full scan's matches, with duplicates and zero vectors"""
+    print("🧪 Testing exact index queries...")
+
+    try:
+        rng = np.random.default_rng(0)
+        for characters in (make_characters(3000, rng), make_continuous_characters(3000, rng)):
+            characters["FlatEl"] = ZERO_CHARACTER
+            assert_same_matches(CharacterIndex(characters, leaf_size=8), CharacterMatcher(characters), random_profiles(150))
+
+        empty = CharacterIndex({})
+        assert empty.best_match({}) == (None, None, -1.0)
+        assert empty.match_report({}, 3) == CharacterMatcher({}).match_report({}, 3)
+
+        print("✅ Index matched the full scan on integer and continuous databases")
+        return True
+
+    except Exception as e:
+        print(f"❌ Exact query test failed: {e}")
+        return False
+
+def test_inserts_and_deletes():
+    """In-place inserts and deletes give the matches of a matcher built from scratch"""
+    print("🧪 Testing inserts and deletes...")
+
+    try:
+        rng = np.random.default_rng(1)
+        characters = make_characters(2000, rng)
+        index = CharacterIndex(characters, leaf_size=8)
+        names = list(characters)
+
+        for step in range(3000):
+            if rng.random() < 0.4:
+                name = names[rng.integers(len(names))]
+                assert index.delete(name) == (characters.pop(name, None) is not None)
+            else:
+                name = f"PublishedEl{rng.integers(2500)}"
+                data = ZERO_CHARACTER if step % 50 == 0 else dict(zip(CHARACTER_KEYS, (1 + 4 * rng.random(5)).tolist()))
+                index.insert(name, data)
+                characters.pop(name, None)  # A re-published character counts as inserted last
+                characters[name] = data
+                names.append(name)
+
+        assert index.names == list(characters) and len(index) == len(characters)
+        matcher = CharacterMatcher(characters)
+        assert_same_matches(index, matcher, random_profiles(100, seed=2))
+
+        index.rebuild()
+        assert_same_matches(index, matcher, random_profiles(20, seed=3))
+
+        print(f"✅ {len(index)} characters matched correctly after 3000 inserts and deletes")
+        return True
+
+    except Exception as e:
+        print(f"❌ Insert/delete test failed: {e}")
+        return False
+
+def test_approximate_queries_and_build_matcher():
+    """max_leaves bounds the leaves scanned; build_matcher picks the index for large databases"""
+    print("🧪 Testing approximate queries and build_matcher...")
+
+    try:
+        rng = np.random.default_rng(4)
+        characters = make_continuous_characters(5000, rng)
+        matcher = CharacterMatcher(characters)
+        profiles = random_profiles(100, seed=5)
+
+        approximate = CharacterIndex(characters, max_leaves=4)
+        expected = [matcher.best_match(profile) for profile in profiles]
+        found = [approximate.best_match(profile) for profile in profiles]
+        assert all(name in characters and similarity <= best[2] + 1e-12
+                   for (name, _, similarity), best in zip(found, expected))
+        recall = np.mean([match[2] >= best[2] - 1e-12 for match, best in zip(found, expected)])
+        assert recall >= 0.5, f"Recall {recall:.2f} with 4 leaves"
+
+        # A budget covering every leaf is exact
+        assert_same_matches(CharacterIndex(characters, max_leaves=len(characters)), matcher, profiles[:20])
+
+        assert isinstance(build_matcher(characters), CharacterMatcher)
+        assert isinstance(build_matcher(characters, index_min_characters=len(characters)), CharacterIndex)
+        assert build_matcher(characters, index_min_characters=1, max_leaves=2).max_leaves == 2
+
+        print(f"✅ Approximate recall {recall:.2f} with 4 leaves")
+        return True
+
+    except Exception as e:
+        print(f"❌ Approximate query test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Character Index\n")
+
+    tests = [
+        test_exact_queries_match_scan,
+        test_inserts_and_deletes,
+        test_approximate_queries_and_build_matcher
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
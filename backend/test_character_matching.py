@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Test script for vectorized character matching
+
+Checks that CharacterMatcher ranks characters exactly as the per-character
+calculate_similarity loop did, for single profiles and batches, and that
+top-k matches follow the same ranking through the API handlers.
+"""
+
+import sys
+import os
+import tempfile
+import itertools
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from personality_analyzer.analyzer import PersonalityAnalyzer
+from personality_analyzer.character_data import get_all_characters
+from personality_analyzer.character_registry import get_character_registry, set_character_registry, write_registry
+from personality_analyzer.matching import CharacterMatcher, TRAITS, MAX_TOP_K, SIMILARITY_DECIMALS, build_matcher
+from personality_analyzer.utils import calculate_similarity, find_best_character_match, map_ui_traits_to_big_five
+from benchmarks.benchmark_matching import legacy_best_match, make_characters
+from api_handlers import handle_analyze_traits, handle_match_character
+
+UI_TRAITS = ["High Energy", "Cooperative", "Analytical", "Innovation", "Intense Focus", "Calm Under Pressure"]
+
+def random_profiles(count, seed=0):
+    """Continuous profiles plus profiles on a 0.25 grid, which produce exact ties"""
+    rng = np.random.default_rng(seed)
+    continuous = [dict(zip(TRAITS, rng.random(len(TRAITS)).tolist())) for _ in range(count)]
+    grid = [dict(zip(TRAITS, (rng.integers(0, 5, len(TRAITS)) / 4).tolist())) for _ in range(count)]
+    return continuous + grid
+
+def ranking(similarities):
+    """Character indices from most to least similar, earlier characters first on ties"""
+    return sorted(range(len(similarities)), key=lambda index: -similarities[index])
+
+def test_rankings_match_loop():
+    """Every profile ranks the built-in characters exactly as the loop did"""
+    print("🧪 Testing rankings against the loop...")
+
+    try:
+        characters = get_all_characters()
+        matcher = CharacterMatcher(characters)
+
+        # Every UI trait selection, plus random and tie-prone profiles
+        profiles = [map_ui_traits_to_big_five(dict(zip(UI_TRAITS, selection)))
+                    for selection in itertools.product([False, True], repeat=len(UI_TRAITS))]
+        profiles += random_profiles(2000) + [{}, dict.fromkeys(TRAITS, 0.0)]
+
+        for profile, similarities in zip(profiles, matcher.similarities_batch(profiles)):
+            expected = [round(calculate_similarity(profile, data), SIMILARITY_DECIMALS) for data in characters.values()]
+            assert ranking(similarities) == ranking(expected), f"Ranking differs for {profile}"
+            assert np.allclose(similarities, expected, rtol=0, atol=1e-12)
+            name, _, similarity = matcher.best_match(profile)
+            expected_name, _, expected_similarity = legacy_best_match(profile, characters)
+            assert name == expected_name and abs(similarity - expected_similarity) < 1e-12
+
+        print(f"✅ {len(profiles)} profiles ranked identically")
+        return True
+
+    except Exception as e:
+        print(f"❌ Ranking test failed: {e}")
+        return False
+
+def test_batch_matches_single():
+    """Batched matching over a large database gives the single-profile results"""
+    print("🧪 Testing batch matching...")
+
+    try:
+        rng = np.random.default_rng(1)
+        characters = make_characters(5000, rng)
+        characters["FlatEl"] = {"O": 1, "C": 1, "E": 1, "A": 1, "N": 1}  # All-zero vector
+        matcher = CharacterMatcher(characters)
+        profiles = random_profiles(50, seed=2)
+
+        batch = matcher.best_matches(profiles)
+        single = [matcher.best_match(profile) for profile in profiles]
+        assert [name for name, _, _ in batch] == [name for name, _, _ in single]
+        assert np.allclose([score for _, _, score in batch], [score for _, _, score in single], rtol=0, atol=1e-12)
+        assert [name for name, _, _ in batch] == [legacy_best_match(profile, characters)[0] for profile in profiles]
+
+        vectors = np.array([[profile[trait] for trait in TRAITS] for profile in profiles])
+        assert np.array_equal(matcher.similarities_batch(vectors), matcher.similarities_batch(profiles))
+        assert not matcher.similarities(profiles[0])[-1], "Zero character should score 0"
+
+        print(f"✅ {len(profiles)} profiles matched against {len(matcher)} characters in one call")
+        return True
+
+    except Exception as e:
+        print(f"❌ Batch matching test failed: {e}")
+        return False
+
+def test_find_best_character_match_compatible():
+    """find_best_character_match keeps its signature and empty-database result"""
+    print("🧪 Testing find_best_character_match...")
+
+    try:
+        characters = get_all_characters()
+        profile = {"Openness": 0.9, "Conscientiousness": 0.8, "Extraversion": 0.5,
+                   "Agreeableness": 0.7, "Neuroticism": 0.1}
+
+        name, data, similarity = find_best_character_match(profile, characters)
+        assert data is characters[name] and isinstance(similarity, float)
+        assert find_best_character_match(profile, {}) == (None, None, -1.0)
+        assert CharacterMatcher({}).best_matches([profile]) == [(None, None, -1.0)]
+
+        print(f"✅ Best match {name} ({similarity:.3f})")
+        return True
+
+    except Exception as e:
+        print(f"❌ Compatibility test failed: {e}")
+        return False
+
+def test_top_k_matches_full_ranking():
+    """Partial-sort top-k equals the head of the full ranking, with consistent margins"""
+    print("🧪 Testing top-k matches...")
+
+    try:
+        rng = np.random.default_rng(3)
+        characters = make_characters(2000, rng)
+        matcher = CharacterMatcher(characters)
+
+        for profile in random_profiles(100, seed=4):
+            similarity = matcher.similarities(profile)
+            for k in (1, 5, 40):
+                top = matcher.top_matches(similarity, k)
+                assert [match["name"] for match in top] == [matcher.names[i] for i in ranking(similarity)[:k]]
+                assert top[0]["name"] == matcher.best_match(profile)[0]
+                assert [match["rank"] for match in top] == list(range(1, k + 1))
+                for match, following in zip(top, top[1:]):
+                    assert match["margin_over_next"] == match["similarity_score"] - following["similarity_score"] >= 0
+                    assert following["margin_to_best"] >= match["margin_to_best"]
+
+        # k beyond the database returns every character; the last has no next
+        small = CharacterMatcher(get_all_characters())
+        top = small.top_matches(small.similarities({}), 100)
+        assert len(top) == len(small) and top[-1]["margin_over_next"] is None
+
+        report = small.match_report({}, top_k=3)
+        assert report["matched_character"] == {key: top[0][key] for key in report["matched_character"]}
+        assert report["score_distribution"]["count"] == len(small)
+        assert "top_matches" not in small.match_report({})
+
+        print("✅ Top-k matches follow the full ranking")
+        return True
+
+    except Exception as e:
+        print(f"❌ Top-k test failed: {e}")
+        return False
+
+def test_proportional_profiles_tie():
+    """Characters with proportional profiles score the same and fall back to database order"""
+    print("🧪 Testing proportional profile ties...")
+
+    try:
+        small = {"O": 2, "C": 2, "E": 2, "A": 1, "N": 2}
+        large = {"O": 4, "C": 4, "E": 4, "A": 1, "N": 4}
+        profiles = random_profiles(500, seed=5)
+
+        for characters in ({"SmallEl": small, "LargeEl": large}, {"LargeEl": large, "SmallEl": small}):
+            first = next(iter(characters))
+            for matcher in (CharacterMatcher(characters), build_matcher(characters, index_min_characters=0)):
+                for profile in profiles:
+                    similarities = matcher.similarities(profile)
+                    assert similarities[0] == similarities[1], f"Unequal cosines for {profile}"
+                    assert matcher.best_match(profile)[0] == first
+                    report = matcher.match_report(profile, top_k=2)
+                    assert [match["name"] for match in report["top_matches"]] == list(characters)
+                    assert report["top_matches"][0]["margin_over_next"] == 0
+
+        print(f"✅ {len(profiles)} profiles tied proportional characters in database order")
+        return True
+
+    except Exception as e:
+        print(f"❌ Proportional tie test failed: {e}")
+        return False
+
+def test_empty_database_endpoints():
+    """With no characters loaded, the match endpoints answer with an error instead of a null match"""
+    print("🧪 Testing matching without characters...")
+
+    previous = get_character_registry()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "characters.json")
+            write_registry(path, {}, {})
+            analyzer = PersonalityAnalyzer(character_registry_path=path, cache_size=0)
+
+            for handler in (handle_analyze_traits, handle_match_character):
+                payload, status = handler(analyzer, {"traits": {"High Energy": True}, "top_k": 3})
+                assert status == 503 and payload["status"] == "error", f"{handler.__name__}: {status}"
+            payload, status = handle_match_character(analyzer, {"text": "I love building things with my team."})
+            assert status == 503 and "No characters" in payload["error"]
+
+        print("✅ Empty character database reported as unavailable")
+        return True
+
+    except Exception as e:
+        print(f"❌ Empty database test failed: {e}")
+        return False
+
+    finally:
+        set_character_registry(previous)
+
+def test_top_k_endpoints():
+    """top_k is optional on the match endpoints and rejected when invalid"""
+    print("🧪 Testing top_k on the match endpoints...")
+
+    try:
+        traits = {"High Energy": True, "Analytical": True}
+
+        payload, status = handle_analyze_traits(None, {"traits": traits})
+        assert status == 200 and "top_matches" not in payload
+
+        payload, status = handle_match_character(None, {"traits": traits, "top_k": 3})
+        assert status == 200 and len(payload["top_matches"]) == 3
+        assert payload["top_matches"][0]["name"] == payload["matched_character"]["name"]
+        assert payload["score_distribution"]["max"] == payload["matched_character"]["similarity_score"]
+
+        for top_k in (0, -1, "3", 2.5, True, MAX_TOP_K + 1):
+            _, status = handle_analyze_traits(None, {"traits": traits, "top_k": top_k})
+            assert status == 400, f"top_k={top_k!r} was accepted"
+
+        print("✅ top_k returned ranked matches and invalid values were rejected")
+        return True
+
+    except Exception as e:
+        print(f"❌ Endpoint test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Character Matching\n")
+
+    tests = [
+        test_rankings_match_loop,
+        test_batch_matches_single,
+        test_find_best_character_match_compatible,
+        test_top_k_matches_full_ranking,
+        test_proportional_profiles_tie,
+        test_empty_database_endpoints,
+        test_top_k_endpoints
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Test script for the file-backed character registry
+
+Checks that JSON and YAML registry files load into the same snapshot as the
+built-in characters, that reloads (forced, by file watch and by signal) swap
+snapshots atomically while requests keep being served and keep the old
+snapshot on a broken file, and that the analyzer serves reloaded characters
+without reloading its model.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import time
+import signal
+import tempfile
+import threading
+
+import numpy as np
+
+from personality_analyzer.analyzer import PersonalityAnalyzer
+from personality_analyzer.character_data import AI_CHARACTERS, CHARACTER_TRAITS, get_characters_by_trait
+from personality_analyzer.character_registry import (CharacterRegistry, get_character_registry, install_reload_signal,
+                                                     read_registry, set_character_registry, write_registry)
+from personality_analyzer.matching import CharacterMatcher
+from personality_analyzer.trait_index import get_trait_index
+from benchmarks.benchmark_matching import make_profiles
+from api_handlers import characters_body, handle_characters, handle_analyze_traits
+
+def wait_for(condition, seconds=5.0):
+    """Poll condition until it holds or seconds pass"""
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_registry_files_match_builtin():
+    """JSON and YAML registries of the built-in characters load into the built-in snapshot"""
+    print("🧪 Testing registry files...")
+
+    try:
+        builtin = CharacterRegistry().snapshot
+        profiles = make_profiles(100, np.random.default_rng(0))
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in ("json", "yaml"):
+                path = os.path.join(directory, f"characters.{extension}")
+                write_registry(path, AI_CHARACTERS, CHARACTER_TRAITS)
+                snapshot = CharacterRegistry(path).snapshot
+
+                assert snapshot.characters == AI_CHARACTERS and snapshot.source == path
+                assert snapshot.profiles_json == builtin.profiles_json
+                assert json.loads(snapshot.profiles_json) == {"status": "success", **snapshot.profiles}
+                assert snapshot.trait_index.bitsets == get_trait_index().bitsets
+                assert [snapshot.matcher.best_match(profile)[0] for profile in profiles] == \
+                    [CharacterMatcher(AI_CHARACTERS).best_match(profile)[0] for profile in profiles]
+
+            path = os.path.join(directory, "invalid.json")
+            for registry in ({"TheBuilder": {}}, {"characters": {"TheBuilder": {"O": 4}}},
+                             {"characters": {"TheBuilder": {**AI_CHARACTERS["TheBuilder"], "E": 9}}},
+                             {"characters": {"TheBuilder": {**AI_CHARACTERS["TheBuilder"], "traits": "builder"}}}):
+                with open(path, 'w') as f:
+                    json.dump(registry, f)
+                try:
+                    read_registry(path)
+                    raise AssertionError(f"{registry} was accepted")
+                except ValueError:
+                    pass
+
+        print(f"✅ JSON and YAML registries matched the built-in {len(AI_CHARACTERS)} characters")
+        return True
+
+    except Exception as e:
+        print(f"❌ Registry file test failed: {e}")
+        return False
+
+def test_hot_reload():
+    """Reloads swap whole snapshots under load; broken files keep the current one"""
+    print("🧪 Testing hot reload...")
+
+    try:
+        characters = dict(AI_CHARACTERS)
+        profiles = make_profiles(50, np.random.default_rng(1))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "characters.json")
+            write_registry(path, characters, CHARACTER_TRAITS)
+            registry = CharacterRegistry(path)
+
+            # Every request sees one consistent snapshot while reloads run
+            errors = []
+            done = threading.Event()
+
+            def serve():
+                while not done.is_set():
+                    snapshot = registry.snapshot
+                    name, _, _ = snapshot.matcher.best_match(profiles[0])
+                    if name not in snapshot.characters or snapshot.trait_index.names != list(snapshot.characters) \
+                            or json.loads(snapshot.profiles_json)["character_count"] != len(snapshot):
+                        errors.append(name)
+
+            servers = [threading.Thread(target=serve) for _ in range(4)]
+            for server in servers:
+                server.start()
+            for i in range(20):
+                characters[f"PublishedEl{i}"] = {"O": 1 + i % 5, "C": 3, "E": 5 - i % 5, "A": 2, "N": 4}
+                write_registry(path, characters, {**CHARACTER_TRAITS, f"PublishedEl{i}": ["published"]})
+                assert registry.reload()
+            done.set()
+            for server in servers:
+                server.join()
+            assert not errors, f"Inconsistent snapshots served: {errors[:3]}"
+            assert registry.reloads == 20 and list(registry.snapshot.characters) == list(characters)
+            assert registry.snapshot.trait_index.query(all_of=["published"]) == ["PublishedEl19"]
+
+            # Unchanged content is not rebuilt; a broken file keeps the current snapshot
+            serving = registry.snapshot
+            assert not registry.reload() and registry.snapshot is serving
+            with open(path, 'w') as f:
+                f.write('{"characters": {')
+            assert not registry.reload() and registry.snapshot is serving
+            assert registry.reload_failures == 1 and "Invalid JSON" in registry.get_stats()["last_error"]
+
+            # File watch; the thread starts once the registry is used
+            registry.start_watching(0.02)
+            assert not registry.get_stats()["watching"]
+            del characters["PublishedEl0"]
+            write_registry(path, characters, CHARACTER_TRAITS)
+            assert wait_for(lambda: "PublishedEl0" not in registry.snapshot.characters), "Watcher did not reload"
+            assert registry.get_stats()["watching"]
+            registry.stop_watching()
+            assert registry.snapshot and not registry.get_stats()["watching"], "Watcher restarted after stop"
+
+            # Signal
+            previous = signal.getsignal(signal.SIGHUP)
+            try:
+                install_reload_signal()
+                del characters["PublishedEl1"]
+                write_registry(path, characters, CHARACTER_TRAITS)
+                os.kill(os.getpid(), signal.SIGHUP)
+                assert wait_for(lambda: "PublishedEl1" not in registry.snapshot.characters), "SIGHUP did not reload"
+            finally:
+                signal.signal(signal.SIGHUP, previous)
+
+        print(f"✅ {registry.reloads} reloads served consistently, watched and signalled")
+        return True
+
+    except Exception as e:
+        print(f"❌ Hot reload test failed: {e}")
+        return False
+
+def test_analyzer_serves_reloaded_characters():
+    """The analyzer matches and lists reloaded characters without reloading its model"""
+    print("🧪 Testing analyzer reloads...")
+
+    previous = get_character_registry()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "characters.yaml")
+            write_registry(path, AI_CHARACTERS, CHARACTER_TRAITS)
+            analyzer = PersonalityAnalyzer(character_registry_path=path, cache_size=0)
+            model, model_version = analyzer.model, analyzer.model_version
+
+            payload, status = handle_characters(analyzer)
+            assert status == 200 and json.loads(characters_body(analyzer)) == payload
+            assert characters_body(analyzer, "energetic") is None and characters_body(None) is None
+
+            # Only one character left, with its traits changed
+            write_registry(path, {"AGIEl": AI_CHARACTERS["AGIEl"]}, {"AGIEl": ["published"]})
+            assert analyzer.character_registry.reload()
+
+            payload, status = handle_characters(analyzer)
+            assert status == 200 and payload["character_names"] == ["AGIEl"]
+            assert json.loads(characters_body(analyzer)) == payload
+            payload, status = handle_characters(analyzer, "published")
+            assert status == 200 and payload["character_names"] == ["AGIEl"]
+            assert get_character_registry() is analyzer.character_registry
+            assert get_characters_by_trait("Published") == ["AGIEl"] and get_characters_by_trait("creative") == []
+
+            payload, status = handle_analyze_traits(analyzer, {"traits": {"creative": True}, "top_k": 3})
+            assert status == 200 and payload["matched_character"]["name"] == "AGIEl"
+            assert [match["name"] for match in payload["top_matches"]] == ["AGIEl"]
+
+            assert analyzer.model is model and analyzer.model_version == model_version
+            stats = analyzer.get_model_info()["character_registry"]
+            assert stats["reloads"] == 1 and stats["character_count"] == 1 and stats["source"] == path
+
+        print("✅ Analyzer served the reloaded characters with the same model")
+        return True
+
+    except Exception as e:
+        print(f"❌ Analyzer reload test failed: {e}")
+        return False
+
+    finally:
+        set_character_registry(previous)
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Character Registry\n")
+
+    tests = [
+        test_registry_files_match_builtin,
+        test_hot_reload,
+        test_analyzer_serves_reloaded_characters
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
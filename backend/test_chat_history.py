@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for token-budgeted chat history
+
+Checks that the history sent to Claude stays within budget however long the
+conversation runs, and that the rolling summary is reused across turns.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from personality_analyzer.chat_history import ConversationHistoryManager, estimate_tokens, message_tokens
+from personality_analyzer.claude_chat import _build_chat_request, SUMMARY_HEADER
+
+def make_history(turns):
+    """Alternating user/character messages of varying length"""
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message {i} about legacy code. " + "Back in my day we wrote tests by hand. " * (i % 7 + 1)
+        }
+        for i in range(turns)
+    ]
+
+def history_tokens(summary, messages):
+    """Estimated tokens of a windowed history"""
+    return (estimate_tokens(summary) if summary else 0) + sum(message_tokens(message) for message in messages)
+
+def test_short_history_is_untouched():
+    """History within budget is sent verbatim with no summary"""
+    print("🧪 Testing short history...")
+
+    try:
+        manager = ConversationHistoryManager(token_budget=2000, summary_token_budget=200)
+        history = make_history(6)
+        summary, messages = manager.window(history, "GrumpyOldManEl", "short")
+
+        assert summary is None
+        assert messages == history
+
+        print("✅ Short history sent as-is")
+        return True
+
+    except Exception as e:
+        print(f"❌ Short history test failed: {e}")
+        return False
+
+def test_long_history_stays_within_budget():
+    """Prompt size stays bounded as the conversation grows"""
+    print("🧪 Testing history budget...")
+
+    try:
+        manager = ConversationHistoryManager(token_budget=600, summary_token_budget=150)
+        history = make_history(400)
+
+        for turns in (10, 50, 100, 400):
+            summary, messages = manager.window(history[:turns], "GrumpyOldManEl", "long")
+            assert history_tokens(summary, messages) <= 600, f"{turns} turns exceeded the budget"
+            assert messages and messages[0]["role"] == "user", "Window does not open with a user turn"
+            assert messages == history[turns - len(messages):turns], "Recent turns were not kept verbatim"
+            if turns > 10:
+                assert summary and "GrumpyOldManEl:" in summary
+
+        print(f"✅ 400 turns fit in {history_tokens(summary, messages)} tokens "
+              f"({len(messages)} verbatim + summary)")
+        return True
+
+    except Exception as e:
+        print(f"❌ History budget test failed: {e}")
+        return False
+
+def test_rolling_summary_is_reused():
+    """Each turn only condenses the messages that just left the window"""
+    print("🧪 Testing rolling summary...")
+
+    try:
+        manager = ConversationHistoryManager(token_budget=600, summary_token_budget=150)
+        history = make_history(200)
+
+        for turns in range(2, 201, 2):
+            manager.window(history[:turns], "PirateEl", "rolling")
+        stats = manager.get_stats()
+        assert stats["messages_condensed"] < 200, f"Condensed {stats['messages_condensed']} messages"
+        assert stats["messages_reused"] > stats["messages_condensed"]
+
+        # Same result as summarizing from scratch
+        fresh_summary, _ = ConversationHistoryManager(token_budget=600, summary_token_budget=150).window(
+            history, "PirateEl")
+        rolled_summary, _ = manager.window(history, "PirateEl", "rolling")
+        assert rolled_summary == fresh_summary
+
+        # A rewritten history prefix is not served the stale summary
+        edited = [dict(message) for message in history]
+        edited[0]["content"] = "A completely different opening."
+        edited_summary, _ = manager.window(edited, "PirateEl", "rolling")
+        expected, _ = ConversationHistoryManager(token_budget=600, summary_token_budget=150).window(edited, "PirateEl")
+        assert edited_summary == expected
+
+        print(f"✅ Condensed {stats['messages_condensed']} messages, reused {stats['messages_reused']}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Rolling summary test failed: {e}")
+        return False
+
+def test_chat_request_uses_window():
+    """Chat requests carry the summary after the persona prompt"""
+    print("🧪 Testing chat request windowing...")
+
+    try:
+        history = make_history(500)
+        request = _build_chat_request("What now?", "GrumpyOldManEl", {}, history, "request")
+
+        assert len(request["system"]) == 2, "Summary block missing"
+        assert request["system"][1]["text"].startswith(SUMMARY_HEADER)
+        assert request["messages"][0]["role"] == "user"
+        assert request["messages"][-1] == {"role": "user", "content": "What now?"}
+        assert len(request["messages"]) < len(history)
+
+        print(f"✅ 500-message history sent as a summary plus {len(request['messages']) - 1} messages")
+        return True
+
+    except Exception as e:
+        print(f"❌ Chat request test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Chat History Windowing\n")
+
+    tests = [
+        test_short_history_is_untouched,
+        test_long_history_stays_within_budget,
+        test_rolling_summary_is_reused,
+        test_chat_request_uses_window
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming character chat
+
+Runs against the local fake Anthropic API, so no API key or network is needed.
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fake_anthropic import fake_anthropic_env, REPLY_TEXT
+from personality_analyzer.claude_chat import (
+    stream_character_response, stream_character_response_async, generate_character_response
+)
+
+CHAT_REQUEST = {"message": "Can you help me plan a side project?", "character_name": "PirateEl"}
+
+def parse_sse(body):
+    """Decode a server-sent event body into its JSON events"""
+    return [json.loads(block[len("data: "):]) for block in body.strip().split("\n\n")]
+
+def test_stream_deltas_before_completion():
+    """Text deltas arrive as Claude generates, well before the reply is complete"""
+    print("🧪 Testing streamed deltas...")
+
+    try:
+        with fake_anthropic_env(latency=0.1, tokens_per_second=20):
+            start = time.perf_counter()
+            arrivals = []
+            events = []
+            for event in stream_character_response(CHAT_REQUEST["message"], "PirateEl"):
+                arrivals.append(time.perf_counter() - start)
+                events.append(event)
+
+        deltas = [event["text"] for event in events if event["type"] == "delta"]
+        done = events[-1]
+        assert len(deltas) > 1, "Reply was not streamed"
+        assert "".join(deltas) == REPLY_TEXT, "Deltas do not join into the reply"
+        assert done["type"] == "done" and done["response"]["status"] == "success"
+        assert done["response"]["message"] == REPLY_TEXT
+        assert arrivals[0] < arrivals[-1] / 2, "First token arrived with the last"
+
+        print(f"✅ {len(deltas)} deltas, first after {arrivals[0] * 1000:.0f} ms, "
+              f"last after {arrivals[-1] * 1000:.0f} ms")
+        return True
+
+    except Exception as e:
+        print(f"❌ Stream test failed: {e}")
+        return False
+
+def test_stream_matches_non_streaming():
+    """Sync, async and non-streaming chats give the same final response"""
+    print("🧪 Testing stream/non-stream consistency...")
+
+    try:
+        async def collect_async():
+            return [event async for event in stream_character_response_async(CHAT_REQUEST["message"], "PirateEl")]
+
+        with fake_anthropic_env():
+            sync_done = list(stream_character_response(CHAT_REQUEST["message"], "PirateEl"))[-1]["response"]
+            async_done = asyncio.run(collect_async())[-1]["response"]
+            response = generate_character_response(CHAT_REQUEST["message"], "PirateEl")
+
+        for result in (sync_done, async_done):
+            assert result["message"] == response["message"]
+            assert result["status"] == response["status"] == "success"
+            assert result["character_name"] == response["character_name"]
+
+        print("✅ Streaming and non-streaming responses match")
+        return True
+
+    except Exception as e:
+        print(f"❌ Consistency test failed: {e}")
+        return False
+
+def test_stream_fallback():
+    """A failing Claude call streams the character's fallback message"""
+    print("🧪 Testing streamed fallback...")
+
+    try:
+        # Unknown path: the fake API answers 404, which the client does not retry
+        with fake_anthropic_env(path="/missing"):
+            events = list(stream_character_response(CHAT_REQUEST["message"], "PirateEl"))
+            response = generate_character_response(CHAT_REQUEST["message"], "PirateEl")
+
+        assert [event["type"] for event in events] == ["delta", "done"]
+        assert events[-1]["response"]["status"] == "fallback"
+        assert events[0]["text"] == events[-1]["response"]["message"] == response["message"]
+        assert "Ahoy" in events[0]["text"], "Fallback is not in character"
+
+        print("✅ Fallback streamed in character")
+        return True
+
+    except Exception as e:
+        print(f"❌ Fallback test failed: {e}")
+        return False
+
+def test_stream_endpoint():
+    """/api/chat/stream sends server-sent events ending with the /api/chat payload"""
+    print("🧪 Testing /api/chat/stream...")
+
+    try:
+        from app import app
+        client = app.test_client()
+
+        with fake_anthropic_env():
+            response = client.post('/api/chat/stream', json=CHAT_REQUEST)
+            events = parse_sse(response.get_data(as_text=True))
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        assert "".join(event["text"] for event in events[:-1]) == REPLY_TEXT
+        assert events[-1]["type"] == "done" and events[-1]["status"] == "success"
+        assert events[-1]["response"]["message"] == REPLY_TEXT
+        assert events[-1]["character_name"] == "PirateEl"
+
+        # Malformed bodies are rejected as bad requests on every chat route of both servers
+        from fastapi.testclient import TestClient
+        from asgi_app import app as asgi_app
+        with TestClient(asgi_app) as asgi_client:
+            for body in ({"message": "  "}, {"message": 5}, {"message": None}, 5, ["hi"], {}):
+                for route in ('/api/chat', '/api/chat/stream'):
+                    flask_response = client.post(route, json=body)
+                    asgi_response = asgi_client.post(route, json=body)
+                    for status, payload in ((flask_response.status_code, flask_response.get_json()),
+                                            (asgi_response.status_code, asgi_response.json())):
+                        assert status == 400 and payload["status"] == "error", (route, body, payload)
+
+        print(f"✅ Endpoint streamed {len(events) - 1} deltas")
+        return True
+
+    except Exception as e:
+        print(f"❌ Endpoint test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Chat Streaming\n")
+
+    tests = [
+        test_stream_deltas_before_completion,
+        test_stream_matches_non_streaming,
+        test_stream_fallback,
+        test_stream_endpoint
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared Claude client and prompt caching
+
+Runs against the local fake Anthropic API, so no API key or network is needed.
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.fake_anthropic import fake_anthropic_env, REPLY_TEXT
+from personality_analyzer import claude_chat
+from personality_analyzer.claude_chat import (
+    get_claude_client, generate_character_response, stream_character_response,
+    build_character_prompt, _build_chat_request
+)
+
+def test_client_is_shared():
+    """Every caller and thread gets the same client"""
+    print("🧪 Testing shared client...")
+
+    try:
+        with fake_anthropic_env():
+            clients = []
+            threads = [threading.Thread(target=lambda: clients.append(get_claude_client())) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert len(clients) == 8
+            assert all(client is get_claude_client() for client in clients), "Threads got different clients"
+
+        print("✅ One client shared by all threads")
+        return True
+
+    except Exception as e:
+        print(f"❌ Shared client test failed: {e}")
+        return False
+
+def test_connections_are_reused():
+    """Sequential and concurrent chats reuse keep-alive connections"""
+    print("🧪 Testing connection reuse...")
+
+    try:
+        with fake_anthropic_env(latency=0.05) as server:
+            for _ in range(5):
+                assert generate_character_response("Hello!", "TheBuilder")["message"] == REPLY_TEXT
+            for _ in range(3):
+                assert list(stream_character_response("Hello!", "TheBuilder"))[-1]["response"]["status"] == "success"
+            assert server.connections == 1, f"{server.connections} connections for sequential chats"
+
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(generate_character_response("Hi", "AGIEl")))
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert all(result["status"] == "success" for result in results)
+            assert server.connections <= 4, f"{server.connections} connections for 4 concurrent chats"
+
+        print(f"✅ 8 sequential chats over 1 connection, 4 concurrent over {server.connections}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Connection reuse test failed: {e}")
+        return False
+
+def test_client_recreated_after_fork():
+    """A forked child builds its own client instead of sharing the parent's sockets"""
+    print("🧪 Testing client after fork...")
+
+    try:
+        with fake_anthropic_env():
+            parent_client = get_claude_client()
+
+            if hasattr(os, "fork"):
+                read_fd, write_fd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    # Child: report whether it got a new, working client
+                    fresh = get_claude_client() is not parent_client
+                    ok = generate_character_response("Hello!", "TheBuilder")["status"] == "success"
+                    os.write(write_fd, b"1" if fresh and ok else b"0")
+                    os._exit(0)
+                os.close(write_fd)
+                result = os.read(read_fd, 1)
+                os.close(read_fd)
+                os.waitpid(pid, 0)
+                assert result == b"1", "Child reused the parent's client"
+            else:
+                # No fork here: simulate it by marking the client as the parent's
+                claude_chat._client_pid = -1
+                assert get_claude_client() is not parent_client, "Client was not rebuilt"
+
+        print("✅ Client is rebuilt in forked workers")
+        return True
+
+    except Exception as e:
+        print(f"❌ Fork test failed: {e}")
+        return False
+
+def test_prompt_memoization_and_caching():
+    """Persona prompts are built once and later turns of long chats read the prefix from the prompt cache"""
+    print("🧪 Testing prompt caching...")
+
+    try:
+        context = {"personality": "extra upbeat", "expertise": "robotics"}
+        prompt = build_character_prompt("GymBroEl", context)
+        assert build_character_prompt("GymBroEl", dict(context)) is prompt, "Prompt was rebuilt"
+        assert build_character_prompt("GymBroEl", {}) != prompt
+
+        # Short prompts are below the minimum cacheable length: no breakpoints
+        request = _build_chat_request("Hi", "GymBroEl", context, [{"role": "user", "content": "Earlier"}])
+        assert request["system"] == [{"type": "text", "text": prompt}]
+        assert request["messages"] == [{"role": "user", "content": "Earlier"}, {"role": "user", "content": "Hi"}]
+
+        # A long conversation (within the history budget) marks the end of the history
+        history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}: " + "reps and sets " * 70}
+                   for i in range(10)]
+        request = _build_chat_request("Hi", "GymBroEl", context, history)
+        assert "cache_control" not in request["system"][-1]
+        assert request["messages"][-2]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert request["messages"][-1] == {"role": "user", "content": "Hi"}
+
+        with fake_anthropic_env():
+            short = generate_character_response("Hello!", "GymBroEl", context)["usage"]
+            first = generate_character_response("Hello!", "GymBroEl", context, history)["usage"]
+            history += [{"role": "user", "content": "Hello!"}, {"role": "assistant", "content": REPLY_TEXT}]
+            second = generate_character_response("Again!", "GymBroEl", context, history)["usage"]
+            streamed = list(stream_character_response("Again!", "GymBroEl", context, history))[-1]["response"]["usage"]
+
+        assert short["cache_creation_input_tokens"] == 0 and short["cache_read_input_tokens"] == 0
+        assert first["cache_creation_input_tokens"] > 0 and first["cache_read_input_tokens"] == 0
+        # The next turn's prefix extends the cached one, which is read back
+        assert second["cache_read_input_tokens"] == first["cache_creation_input_tokens"]
+        assert 0 < second["cache_creation_input_tokens"] < first["cache_creation_input_tokens"]
+        assert streamed["cache_read_input_tokens"] > second["cache_read_input_tokens"]
+        assert streamed["cache_creation_input_tokens"] == 0
+
+        print(f"✅ Second turn read {second['cache_read_input_tokens']} prompt tokens from cache")
+        return True
+
+    except Exception as e:
+        print(f"❌ Prompt caching test failed: {e}")
+        return False
+
+def test_fake_api_settings():
+    """The fake API honours reply length and injected errors, reached through CLAUDE_BASE_URL"""
+    print("🧪 Testing fake API settings...")
+
+    try:
+        with fake_anthropic_env(reply_tokens_count=30, tokens_per_second=1000) as server:
+            response = generate_character_response("Hello!", "TheBuilder")
+            assert response["usage"]["output_tokens"] == 30
+            assert len(response["message"].split()) == 30
+            assert get_claude_client().base_url == os.environ["CLAUDE_BASE_URL"]
+            assert server.requests == 1
+
+        # 400s are not retried, so every chat falls back
+        with fake_anthropic_env(error_rate=1.0, error_status=400) as server:
+            events = list(stream_character_response("Hello!", "FreakyEl"))
+            assert events[-1]["response"]["status"] == "fallback"
+            assert server.errors == server.requests == 1
+
+        print("✅ Reply length, error injection and base URL work")
+        return True
+
+    except Exception as e:
+        print(f"❌ Fake API test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Claude Client Pooling\n")
+
+    tests = [
+        test_client_is_shared,
+        test_connections_are_reused,
+        test_client_recreated_after_fork,
+        test_prompt_memoization_and_caching,
+        test_fake_api_settings
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test script for latency metrics and the /metrics endpoint
+
+Checks histogram bookkeeping, that every analysis stage is timed, and that
+both apps expose route latency and error counts in the Prometheus format.
+"""
+
+import sys
+import os
+import re
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from personality_analyzer.metrics import Histogram, MetricsRegistry, STAGE_SECONDS, METRICS_MEDIA_TYPE
+
+TEXT = "I love building things with my team and exploring new ideas every day."
+
+# One sample line of the text exposition format
+SAMPLE_PATTERN = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="[^"]*",?)*\})? \S+$')
+
+def sample_value(body, name, **labels):
+    """Value of the sample with this name and exactly these labels, or None"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{label_text}}} " if labels else f"{name} "
+    for line in body.splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return None
+
+def check_exposition(body):
+    """Every line is a comment or a well-formed sample"""
+    for line in body.strip().splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE_PATTERN.match(line), \
+            f"Malformed line: {line}"
+
+def test_histogram_buckets():
+    """Observations land in the right cumulative buckets and render as Prometheus text"""
+    print("🧪 Testing histogram buckets...")
+
+    try:
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram("test_seconds", "Test latency", ["stage"], buckets=(0.01, 0.1, 1.0)))
+
+        for value in (0.005, 0.01, 0.05, 0.5, 5.0):
+            histogram.observe(value, "predict")
+        with histogram.time("other"):
+            pass
+
+        snapshot = histogram.snapshot("predict")
+        assert snapshot["count"] == 5
+        assert abs(snapshot["sum"] - 5.565) < 1e-9
+        assert [count for _, count in snapshot["buckets"]] == [2, 3, 4, 5], snapshot["buckets"]
+
+        body = registry.render()
+        check_exposition(body)
+        assert "# TYPE test_seconds histogram" in body
+        assert sample_value(body, "test_seconds_bucket", stage="predict", le="0.1") == 3
+        assert sample_value(body, "test_seconds_bucket", stage="predict", le="+Inf") == 5
+        assert sample_value(body, "test_seconds_count", stage="other") == 1
+
+        print("✅ Buckets are cumulative and the exposition is well formed")
+        return True
+
+    except Exception as e:
+        print(f"❌ Histogram test failed: {e}")
+        return False
+
+def test_pipeline_stages_are_timed():
+    """analyze_text and analyze_batch record every pipeline stage"""
+    print("🧪 Testing stage timing...")
+
+    try:
+        from personality_analyzer.analyzer import PersonalityAnalyzer
+
+        analyzer = PersonalityAnalyzer(cache_size=0)
+        stages = ("preprocess", "predict", "interpret", "explanation", "avatar")
+        before = {stage: STAGE_SECONDS.snapshot(stage)["count"] for stage in stages + ("predict_many",)}
+
+        analyzer.analyze_text(TEXT)
+        analyzer.analyze_batch([TEXT, TEXT + " Really."])
+
+        counts = {stage: STAGE_SECONDS.snapshot(stage)["count"] - before[stage] for stage in before}
+        assert counts == {"preprocess": 3, "predict": 1, "interpret": 3, "explanation": 3,
+                          "avatar": 3, "predict_many": 1}, counts
+
+        print(f"✅ Stages timed: {counts}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Stage timing test failed: {e}")
+        return False
+
+def test_flask_metrics_endpoint():
+    """/metrics reports route latency, errors and cache stats for the Flask app"""
+    print("🧪 Testing Flask /metrics...")
+
+    try:
+        from app import app
+
+        client = app.test_client()
+        # Route timing is recorded when the response is closed, as a WSGI server does
+        client.post('/api/analyze', json={"text": TEXT}).close()
+        client.post('/api/analyze', json={}).close()
+        client.get('/api/does_not_exist').close()
+
+        response = client.get('/metrics')
+        body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.content_type == METRICS_MEDIA_TYPE
+        check_exposition(body)
+        assert sample_value(body, "elliot_http_request_seconds_count", method="POST", route="/api/analyze") >= 2
+        assert sample_value(body, "elliot_http_request_errors_total",
+                            method="POST", route="/api/analyze", status="400") >= 1
+        assert sample_value(body, "elliot_http_request_errors_total",
+                            method="GET", route="unmatched", status="404") >= 1
+        assert sample_value(body, "elliot_pipeline_stage_seconds_count", stage="predict") >= 1
+        assert sample_value(body, "elliot_result_cache_misses_total") is not None
+        assert sample_value(body, "elliot_single_flight_executions_total") is not None
+
+        print(f"✅ Flask /metrics served {len(body.splitlines())} lines")
+        return True
+
+    except Exception as e:
+        print(f"❌ Flask metrics test failed: {e}")
+        return False
+
+def test_asgi_metrics_endpoint():
+    """/metrics on the ASGI app times streamed chats to their end and Claude calls"""
+    print("🧪 Testing ASGI /metrics...")
+
+    try:
+        from fastapi.testclient import TestClient
+        from asgi_app import app
+        from benchmarks.fake_anthropic import fake_anthropic_env
+
+        with fake_anthropic_env(latency=0.05, tokens_per_second=100), TestClient(app) as client:
+            client.post('/api/chat/stream', json={"message": "Ahoy?", "character_name": "PirateEl"})
+            client.post('/api/analyze_traits', json={})
+            body = client.get('/metrics').text
+
+        check_exposition(body)
+        stream_seconds = sample_value(body, "elliot_http_request_seconds_sum",
+                                      method="POST", route="/api/chat/stream")
+        claude_seconds = sample_value(body, "elliot_claude_call_seconds_sum", call="stream", outcome="success")
+        assert claude_seconds is not None and claude_seconds > 0.1, "Claude stream not timed"
+        # The route is timed until the last event is sent, not when headers go out
+        assert stream_seconds is not None and stream_seconds >= claude_seconds
+        assert sample_value(body, "elliot_http_request_errors_total",
+                            method="POST", route="/api/analyze_traits", status="400") >= 1
+
+        print(f"✅ Streamed chat timed at {stream_seconds * 1000:.0f} ms "
+              f"(Claude stream {claude_seconds * 1000:.0f} ms)")
+        return True
+
+    except Exception as e:
+        print(f"❌ ASGI metrics test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Metrics\n")
+
+    tests = [
+        test_histogram_buckets,
+        test_pipeline_stages_are_timed,
+        test_flask_metrics_endpoint,
+        test_asgi_metrics_endpoint
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test script for the analyze_text result cache
+
+Run this to check cache hits, expiry, eviction, model-swap invalidation and
+coalescing of identical in-flight requests.
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from personality_analyzer.analyzer import PersonalityAnalyzer
+from personality_analyzer.cache import ResultCache, SingleFlight, MISSING
+from personality_analyzer.model_loader import MockPersonalityModel
+
+TEST_TEXT = "I love building creative things with my team and I always plan ahead!"
+
+def test_repeated_analysis_hits_cache():
+    """Identical inputs are served from the cache with identical results"""
+    print("🧪 Testing repeated analysis...")
+
+    try:
+        analyzer = PersonalityAnalyzer()
+
+        first = analyzer.analyze_text(TEST_TEXT, mode='general')
+        second = analyzer.analyze_text("  " + TEST_TEXT.upper() + "\n", mode='general')
+        stats = analyzer.get_cache_stats()
+
+        assert first == second, "Cached result differs from computed result"
+        assert stats["hits"] == 1 and stats["misses"] == 1, f"Unexpected stats: {stats}"
+
+        # Different mode or context must not share an entry
+        analyzer.analyze_text(TEST_TEXT, mode='quest')
+        analyzer.analyze_text(TEST_TEXT, mode='general', context=[{"role": "user", "content": "hi"}])
+        assert analyzer.get_cache_stats()["misses"] == 3
+
+        print(f"✅ Cache stats: {analyzer.get_cache_stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Repeated analysis test failed: {e}")
+        return False
+
+def test_cached_results_are_isolated():
+    """Mutating a returned result does not corrupt the cache"""
+    print("\n🧪 Testing result isolation...")
+
+    try:
+        analyzer = PersonalityAnalyzer()
+
+        result = analyzer.analyze_quest_responses([TEST_TEXT] * 4, "Sarah")
+        assert result["avatar_data"]["user_name"] == "Sarah"
+
+        _, _, avatar = analyzer.analyze_text(" ".join([TEST_TEXT] * 4), mode='quest')
+        assert "user_name" not in avatar, "Cached avatar was mutated by a caller"
+
+        print("✅ Cached results are copied")
+        return True
+
+    except Exception as e:
+        print(f"❌ Isolation test failed: {e}")
+        return False
+
+def test_model_swap_invalidates_cache():
+    """Assigning a new model clears cached results"""
+    print("\n🧪 Testing model swap invalidation...")
+
+    try:
+        analyzer = PersonalityAnalyzer()
+        analyzer.analyze_text(TEST_TEXT)
+        version = analyzer.model_version
+
+        analyzer.model = MockPersonalityModel()
+        analyzer.analyze_text(TEST_TEXT)
+
+        assert analyzer.model_version != version
+        assert analyzer.get_cache_stats()["hits"] == 0, "Stale result served after model swap"
+
+        print("✅ Model swap invalidated the cache")
+        return True
+
+    except Exception as e:
+        print(f"❌ Model swap test failed: {e}")
+        return False
+
+def test_eviction_and_expiry():
+    """Entries are evicted least-recently-used first and expire after the TTL"""
+    print("\n🧪 Testing eviction and expiry...")
+
+    try:
+        cache = ResultCache(max_size=2, ttl_seconds=0.05)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING, "Least recently used entry was not evicted"
+        assert cache.get("a") == 1
+
+        time.sleep(0.06)
+        assert cache.get("a") is MISSING, "Expired entry was served"
+
+        print(f"✅ Eviction and expiry work: {cache.get_stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Eviction test failed: {e}")
+        return False
+
+class SlowModel(MockPersonalityModel):
+    """Mock model that takes long enough for concurrent requests to overlap"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def predict(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(0.2)
+        return super().predict(*args, **kwargs)
+
+def run_concurrently(fn, count):
+    """Call fn from `count` threads at once and collect the results"""
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fn()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_identical_requests_are_coalesced():
+    """Concurrent identical analyses share one computation"""
+    print("\n🧪 Testing single-flight coalescing...")
+
+    try:
+        analyzer = PersonalityAnalyzer()
+        model = analyzer.model = SlowModel()
+
+        results = run_concurrently(lambda: analyzer.analyze_text(TEST_TEXT), 8)
+        assert model.calls == 1, f"Model ran {model.calls} times"
+        assert all(result == results[0] for result in results)
+        assert len({id(result[2]) for result in results}) == 8, "Callers share result objects"
+
+        quests = run_concurrently(lambda: analyzer.analyze_quest_responses([TEST_TEXT] * 4, "Sarah"), 6)
+        assert model.calls == 2, f"Model ran {model.calls} times"
+        assert all(quest == quests[0] and quest["completion_status"] == "complete" for quest in quests)
+
+        stats = analyzer.get_single_flight_stats()
+        assert stats["coalesced"] == 12 and stats["in_flight"] == 0, stats
+
+        print(f"✅ 14 concurrent requests ran 2 analyses: {stats}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Coalescing test failed: {e}")
+        return False
+
+def test_single_flight_shares_errors():
+    """Waiters see the leader's exception, and the key is free again afterwards"""
+    print("\n🧪 Testing single-flight errors...")
+
+    try:
+        flight = SingleFlight()
+        calls = []
+
+        def failing():
+            calls.append(1)
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        def call():
+            try:
+                return flight.do("key", failing)
+            except RuntimeError as e:
+                return str(e)
+
+        assert run_concurrently(call, 4) == ["boom"] * 4
+        assert len(calls) == 1
+        assert flight.do("key", lambda: 42) == 42, "Failed key was not released"
+
+        print(f"✅ Errors are shared: {flight.get_stats()}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Single-flight error test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Result Cache\n")
+
+    tests = [
+        test_repeated_analysis_hits_cache,
+        test_cached_results_are_isolated,
+        test_model_swap_invalidates_cache,
+        test_eviction_and_expiry,
+        test_identical_requests_are_coalesced,
+        test_single_flight_shares_errors
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test script for the inverted trait index
+
+Checks TraitIndex lookups against the previous get_characters_by_trait scan,
+multi-trait AND/OR/NOT filters against set arithmetic, and the filter
+parameter of /api/characters.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from personality_analyzer.character_data import CHARACTER_TRAITS, get_characters_by_trait
+from personality_analyzer.trait_index import TraitIndex, normalize_trait, parse_trait_filter, MAX_FILTER_TERMS
+from benchmarks.benchmark_trait_index import (legacy_characters_by_trait, legacy_filter,
+                                              make_character_traits, make_queries)
+from api_handlers import handle_characters
+
+def test_single_trait_lookup_matches_scan():
+    """Every trait, in any case, finds the characters the scan did"""
+    print("🧪 Testing single-trait lookups...")
+
+    try:
+        traits = {trait for traits in CHARACTER_TRAITS.values() for trait in traits}
+        for trait in traits | {"unknown"}:
+            for variant in (trait, trait.upper(), trait.title()):
+                assert get_characters_by_trait(variant) == legacy_characters_by_trait(variant), variant
+
+        # Spacing variants normalize to the same tag
+        assert normalize_trait(" Risk_Taking ") == normalize_trait("risk taking") == "risk-taking"
+        assert get_characters_by_trait("Pattern Seeking") == ["ConspiracyEl"]
+
+        print(f"✅ {len(traits)} traits looked up like the scan")
+        return True
+
+    except Exception as e:
+        print(f"❌ Single-trait test failed: {e}")
+        return False
+
+def test_multi_trait_queries():
+    """AND/OR/NOT queries and filter expressions agree with single-trait scans"""
+    print("🧪 Testing multi-trait queries...")
+
+    try:
+        rng = np.random.default_rng(0)
+        character_traits = make_character_traits(3000, rng)
+        index = TraitIndex(character_traits)
+
+        for all_of, any_of, none_of in make_queries(100, rng):
+            expected = legacy_filter(character_traits, all_of, any_of, none_of)
+            assert index.query(all_of, any_of, none_of) == expected
+            expression = ",".join(all_of + ["|".join(any_of)] + [f"!{trait}" for trait in none_of])
+            assert index.select(expression) == expected, expression
+
+        assert index.query() == list(character_traits)
+        assert index.select("!creative|creative") == list(character_traits)
+        assert index.select("nonexistent") == [] and index.unknown_traits("creative,nonexistent") == ["nonexistent"]
+
+        for invalid in ("", "creative,,energetic", "creative|", "!", ",".join(["a"] * (MAX_FILTER_TERMS + 1))):
+            try:
+                parse_trait_filter(invalid)
+                raise AssertionError(f"{invalid!r} was accepted")
+            except ValueError:
+                pass
+
+        print("✅ Filters matched set arithmetic over single-trait scans")
+        return True
+
+    except Exception as e:
+        print(f"❌ Multi-trait test failed: {e}")
+        return False
+
+def test_characters_endpoint_filter():
+    """/api/characters filters by trait expression and rejects malformed ones"""
+    print("🧪 Testing the /api/characters filter...")
+
+    try:
+        payload, status = handle_characters(None)
+        assert status == 200 and payload["character_count"] == len(CHARACTER_TRAITS) and "filter" not in payload
+
+        payload, status = handle_characters(None, "energetic|analytical,!chaotic")
+        expected = legacy_filter(CHARACTER_TRAITS, [], ["energetic", "analytical"], ["chaotic"])
+        assert status == 200 and payload["character_names"] == expected
+        assert list(payload["characters"]) == expected and payload["character_count"] == len(expected)
+
+        payload, status = handle_characters(None, "energetic,nonexistent")
+        assert status == 200 and payload["character_names"] == [] and payload["unknown_traits"] == ["nonexistent"]
+
+        _, status = handle_characters(None, "energetic,,creative")
+        assert status == 400
+
+        print(f"✅ Filter returned {expected}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Endpoint filter test failed: {e}")
+        return False
+
+def test_asgi_filter_off_event_loop():
+    """Filtered /api/characters responses are built on the executor, not the ASGI event loop"""
+    print("🧪 Testing the ASGI /api/characters filter...")
+
+    try:
+        import threading
+        from fastapi.testclient import TestClient
+        import asgi_app
+
+        threads = []
+        handler = asgi_app.handle_characters
+
+        def recording_handler(*args):
+            threads.append(threading.current_thread().name)
+            return handler(*args)
+
+        asgi_app.handle_characters = recording_handler
+        try:
+            with TestClient(asgi_app.app) as client:
+                unfiltered = client.get('/api/characters')
+                filtered = client.get('/api/characters', params={"filter": "energetic,!chaotic"})
+                invalid = client.get('/api/characters', params={"filter": "energetic,,creative"})
+        finally:
+            asgi_app.handle_characters = handler
+
+        assert unfiltered.status_code == 200 and unfiltered.json()["character_count"] == len(CHARACTER_TRAITS)
+        assert filtered.status_code == 200 and filtered.json() == handler(asgi_app.analyzer, "energetic,!chaotic")[0]
+        assert invalid.status_code == 400
+        assert len(threads) == 2 and all(name.startswith("inference") for name in threads), threads
+
+        print(f"✅ Filtered responses built on {threads[0]}")
+        return True
+
+    except Exception as e:
+        print(f"❌ ASGI filter test failed: {e}")
+        return False
+
+def main():
+    """Run all tests"""
+    print("🚀 Testing Trait Index\n")
+
+    tests = [
+        test_single_trait_lookup_matches_scan,
+        test_multi_trait_queries,
+        test_characters_endpoint_filter,
+        test_asgi_filter_off_event_loop
+    ]
+
+    passed = sum(1 for test in tests if test())
+    total = len(tests)
+
+    print(f"\n📊 Test Results: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
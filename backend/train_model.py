@@ -12,19 +12,24 @@ Features:
 - Configurable classification heads (Linear, BiLSTM, etc.)
 - Comprehensive evaluation metrics
 - Model checkpointing and saving
+- Knowledge distillation into a smaller student model
 - Hyperparameter tuning support
 
 Usage:
     python train_model.py --dataset pandora --model bert-base-uncased --epochs 10
     python train_model.py --dataset custom --model roberta-base --batch_size 16
+    python train_model.py --distill --teacher_path models/ --output_dir models/student/
 """
 
 import os
 import sys
+import copy
 import json
+import time
 import argparse
 import logging
 import warnings
+import hashlib
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -92,10 +97,18 @@ class TrainingConfig:
     logging_steps: int = 100
     save_steps: int = 1000
     
+    # Knowledge distillation configuration
+    distillation: bool = False
+    teacher_model_path: str = "models/"  # Directory written by save_model for the teacher
+    student_num_layers: int = 4  # Teacher encoder layers kept in the student, evenly spaced
+    latency_samples: int = 32  # Test texts timed on CPU when comparing student and teacher
+    distillation_alpha: float = 0.7  # Weight of teacher soft targets vs. ground-truth labels
+    
     # Paths
     data_path: str = "data/"
     model_save_path: str = "models/"
     logs_path: str = "logs/"
+    cache_path: str = "cache/"
     
     # Device configuration
     device: str = "cuda" if torch.cuda.is_available() else "cpu"
@@ -127,11 +140,13 @@ class TrainingConfig:
 class PersonalityDataset(Dataset):
     """Dataset class for personality prediction"""
     
-    def __init__(self, texts: List[str], labels: List[List[float]], tokenizer, max_length: int = 512):
+    def __init__(self, texts: List[str], labels: List[List[float]], tokenizer, max_length: int = 512,
+                 teacher_logits: Optional[torch.Tensor] = None):
         self.texts = texts
         self.labels = labels
         self.tokenizer = tokenizer
         self.max_length = max_length
+        self.teacher_logits = teacher_logits
         
     def __len__(self):
         return len(self.texts)
@@ -149,21 +164,34 @@ class PersonalityDataset(Dataset):
             return_tensors='pt'
         )
         
-        return {
+        item = {
             'input_ids': encoding['input_ids'].squeeze(),
             'attention_mask': encoding['attention_mask'].squeeze(),
             'labels': labels
         }
+        
+        # Soft targets for knowledge distillation
+        if self.teacher_logits is not None:
+            item['teacher_logits'] = self.teacher_logits[idx]
+        
+        return item
+
+def student_layer_indices(teacher_layers: int, student_layers: int) -> List[int]:
+    """Evenly spaced teacher layers kept in a student, always including the top layer"""
+    if not 1 <= student_layers < teacher_layers:
+        raise ValueError(f"Student needs between 1 and {teacher_layers - 1} layers, got {student_layers}")
+    step = teacher_layers / student_layers
+    return [round((i + 1) * step) - 1 for i in range(student_layers)]
 
 class PersonalityModel(nn.Module):
     """Personality prediction model with configurable classification head"""
     
-    def __init__(self, config: TrainingConfig):
+    def __init__(self, config: TrainingConfig, backbone: Optional[nn.Module] = None):
         super().__init__()
         self.config = config
         
-        # Load pre-trained model
-        self.bert = AutoModel.from_pretrained(config.model_name)
+        # Load pre-trained model (teachers loaded from a saved model pass a rebuilt backbone)
+        self.bert = backbone if backbone is not None else AutoModel.from_pretrained(config.model_name)
         
         # Freeze embeddings if specified
         if config.freeze_embeddings:
@@ -199,7 +227,7 @@ class PersonalityModel(nn.Module):
         else:
             raise ValueError(f"Unknown classification head: {self.config.classification_head}")
     
-    def forward(self, input_ids, attention_mask, labels=None):
+    def forward(self, input_ids, attention_mask, labels=None, teacher_logits=None):
         # Get BERT outputs
         outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
         
@@ -231,12 +259,22 @@ class PersonalityModel(nn.Module):
         if labels is not None:
             loss_fn = nn.MSELoss()
             loss = loss_fn(logits, labels)
+            
+            # Distillation: blend in the distance to the teacher's outputs
+            if teacher_logits is not None:
+                alpha = self.config.distillation_alpha
+                loss = alpha * loss_fn(logits, teacher_logits) + (1 - alpha) * loss
         
-        return {
+        result = {
             'loss': loss,
-            'logits': logits,
-            'hidden_states': outputs.hidden_states if hasattr(outputs, 'hidden_states') else None
+            'logits': logits
         }
+        
+        # Only expose hidden states when the backbone returned them; None breaks eval gathering
+        if getattr(outputs, 'hidden_states', None) is not None:
+            result['hidden_states'] = outputs.hidden_states
+        
+        return result
 
 class DatasetLoader:
     """Dataset loading utilities"""
@@ -473,11 +511,43 @@ class DatasetLoader:
         
         return texts, personality_scores
 
+    @staticmethod
+    def load(dataset_name: str, data_path: str) -> Tuple[List[str], List[List[float]]]:
+        """Load a dataset by name"""
+        if dataset_name == "pandora":
+            return DatasetLoader.load_pandora_dataset(data_path)
+        elif dataset_name == "essays_big5":
+            return DatasetLoader.load_essays_big5_dataset(data_path)
+        elif dataset_name == "custom":
+            return DatasetLoader.load_custom_dataset(data_path)
+        elif dataset_name == "synthetic":
+            return DatasetLoader.create_synthetic_dataset()
+        else:
+            raise ValueError(f"Unknown dataset: {dataset_name}")
+    
+    @staticmethod
+    def split(texts: List[str], labels: List[List[float]], val_split: float, test_split: float,
+              seed: int) -> Tuple[Tuple[List, List], Tuple[List, List], Tuple[List, List]]:
+        """Split texts and labels into (train, val, test) pairs"""
+        # First split: separate test set
+        train_texts, test_texts, train_labels, test_labels = train_test_split(
+            texts, labels, test_size=test_split, random_state=seed
+        )
+        
+        # Second split: separate validation from training
+        val_size = val_split / (1 - test_split)
+        train_texts, val_texts, train_labels, val_labels = train_test_split(
+            train_texts, train_labels, test_size=val_size, random_state=seed
+        )
+        
+        return (train_texts, train_labels), (val_texts, val_labels), (test_texts, test_labels)
+
 class PersonalityTrainer:
     """Main trainer class for personality prediction"""
     
     def __init__(self, config: TrainingConfig):
         self.config = config
+        self.distillation_report = None
         self.setup_logging()
         self.setup_directories()
         self.set_seed()
@@ -505,7 +575,7 @@ class PersonalityTrainer:
     
     def setup_directories(self):
         """Create necessary directories"""
-        for path in [self.config.data_path, self.config.model_save_path, self.config.logs_path]:
+        for path in [self.config.data_path, self.config.model_save_path, self.config.logs_path, self.config.cache_path]:
             Path(path).mkdir(parents=True, exist_ok=True)
     
     def set_seed(self):
@@ -515,30 +585,113 @@ class PersonalityTrainer:
         if torch.cuda.is_available():
             torch.cuda.manual_seed_all(self.config.seed)
     
+    def build_model(self, teacher: Optional[PersonalityModel] = None) -> PersonalityModel:
+        """
+        Build the model to train
+        
+        When distilling, the student is a copy of the teacher with only
+        student_num_layers of its encoder layers: it keeps the teacher's
+        embeddings, the kept layers' weights, the pooler and the
+        classification head, so training starts from the teacher's
+        representations instead of random weights.
+        """
+        if teacher is None:
+            return PersonalityModel(self.config)
+        
+        encoder = getattr(teacher.bert, 'encoder', None)
+        if encoder is None or not hasattr(encoder, 'layer'):
+            raise ValueError(f"Cannot truncate a {type(teacher.bert).__name__} backbone: no encoder.layer")
+        
+        teacher_layers = len(encoder.layer)
+        keep = student_layer_indices(teacher_layers, self.config.student_num_layers)
+        
+        student = copy.deepcopy(teacher)
+        student.bert.encoder.layer = nn.ModuleList([student.bert.encoder.layer[i] for i in keep])
+        student.bert.config.num_hidden_layers = len(keep)
+        
+        # The student inherits the teacher's architecture, head included
+        self.config.hidden_size = teacher.config.hidden_size
+        self.config.classification_head = teacher.config.classification_head
+        student.config = self.config
+        student.train()
+        
+        logger.info(f"Built student from teacher layers {keep} ({len(keep)} of {teacher_layers})")
+        return student
+    
+    def load_teacher(self) -> PersonalityModel:
+        """Load the trained teacher model and switch to its tokenizer"""
+        teacher_path = Path(self.config.teacher_model_path)
+        if teacher_path.resolve() == Path(self.config.model_save_path).resolve():
+            raise ValueError("Student output directory must differ from the teacher model directory")
+        
+        with open(teacher_path / "training_config.json", 'r') as f:
+            saved_config = json.load(f)
+        
+        fields = {k: v for k, v in saved_config.items() if k in TrainingConfig.__dataclass_fields__}
+        teacher_config = TrainingConfig(**fields)
+        teacher_config.distillation = False
+        teacher_config.device = self.config.device
+        
+        # Student shares the teacher's tokenizer and base architecture
+        self.config.model_name = teacher_config.model_name
+        if (teacher_path / "tokenizer").exists():
+            self.tokenizer = AutoTokenizer.from_pretrained(teacher_path / "tokenizer")
+        
+        backbone_config = teacher_path / "backbone"
+        backbone = AutoModel.from_config(AutoConfig.from_pretrained(backbone_config)) if backbone_config.exists() else None
+        
+        teacher = PersonalityModel(teacher_config, backbone=backbone)
+        teacher.load_state_dict(torch.load(teacher_path / "personality_model.pt", map_location=self.config.device))
+        teacher.to(self.config.device)
+        teacher.eval()
+        
+        logger.info(f"Loaded teacher model from {teacher_path}")
+        return teacher
+    
+    def compute_teacher_logits(self, teacher: PersonalityModel, texts: List[str]) -> torch.Tensor:
+        """Run the teacher over texts, caching the outputs on disk"""
+        # Key on the teacher checkpoint, sequence length and texts so stale caches are never reused
+        weights_path = Path(self.config.teacher_model_path) / "personality_model.pt"
+        stat = weights_path.stat()
+        key = hashlib.sha256()
+        key.update(f"{weights_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{self.config.max_length}".encode())
+        for text in texts:
+            key.update(str(text).encode())
+            key.update(b"\0")
+        
+        cache_file = Path(self.config.cache_path) / f"teacher_logits_{key.hexdigest()[:16]}.pt"
+        if cache_file.exists():
+            logger.info(f"Using cached teacher outputs from {cache_file}")
+            return torch.load(cache_file)
+        
+        logger.info(f"Computing teacher outputs for {len(texts)} samples...")
+        dummy_labels = [[0.0] * self.config.num_labels] * len(texts)
+        dataset = PersonalityDataset(texts, dummy_labels, self.tokenizer, self.config.max_length)
+        loader = DataLoader(dataset, batch_size=self.config.batch_size, shuffle=False)
+        
+        all_logits = []
+        with torch.no_grad():
+            for batch in loader:
+                outputs = teacher(
+                    input_ids=batch['input_ids'].to(self.config.device),
+                    attention_mask=batch['attention_mask'].to(self.config.device)
+                )
+                all_logits.append(outputs['logits'].cpu())
+        
+        teacher_logits = torch.cat(all_logits, dim=0)
+        torch.save(teacher_logits, cache_file)
+        logger.info(f"Cached teacher outputs to {cache_file}")
+        
+        return teacher_logits
+    
     def load_dataset(self) -> Tuple[List[str], List[List[float]]]:
         """Load dataset based on configuration"""
-        if self.config.dataset_name == "pandora":
-            return DatasetLoader.load_pandora_dataset(self.config.data_path)
-        elif self.config.dataset_name == "essays_big5":
-            return DatasetLoader.load_essays_big5_dataset(self.config.data_path)
-        elif self.config.dataset_name == "custom":
-            return DatasetLoader.load_custom_dataset(self.config.data_path)
-        elif self.config.dataset_name == "synthetic":
-            return DatasetLoader.create_synthetic_dataset()
-        else:
-            raise ValueError(f"Unknown dataset: {self.config.dataset_name}")
+        return DatasetLoader.load(self.config.dataset_name, self.config.data_path)
     
     def split_dataset(self, texts: List[str], labels: List[List[float]]) -> Tuple[Dataset, Dataset, Dataset]:
         """Split dataset into train, validation, and test sets"""
-        # First split: separate test set
-        train_texts, test_texts, train_labels, test_labels = train_test_split(
-            texts, labels, test_size=self.config.test_split, random_state=self.config.seed
-        )
-        
-        # Second split: separate validation from training
-        val_size = self.config.val_split / (1 - self.config.test_split)
-        train_texts, val_texts, train_labels, val_labels = train_test_split(
-            train_texts, train_labels, test_size=val_size, random_state=self.config.seed
+        (train_texts, train_labels), (val_texts, val_labels), (test_texts, test_labels) = DatasetLoader.split(
+            texts, labels, self.config.val_split, self.config.test_split, self.config.seed
         )
         
         # Create datasets
@@ -554,15 +707,25 @@ class PersonalityTrainer:
         """Main training loop"""
         logger.info("Starting personality prediction model training...")
         
+        # Load teacher first: the student must use its tokenizer
+        teacher = self.load_teacher() if self.config.distillation else None
+        
         # Load dataset
         texts, labels = self.load_dataset()
         
         # Split dataset
         train_dataset, val_dataset, test_dataset = self.split_dataset(texts, labels)
         
-        # Initialize model
-        model = PersonalityModel(self.config)
+        # Soft targets for the training split; validation and test stay on true labels
+        if teacher is not None:
+            train_dataset.teacher_logits = self.compute_teacher_logits(teacher, train_dataset.texts)
+        
+        # Initialize model (the student starts as a truncated copy of the teacher)
+        model = self.build_model(teacher)
         model.to(self.config.device)
+        if teacher is not None:
+            # Only needed again for the CPU comparison after training
+            teacher.to("cpu")
         
         # Training arguments
         training_args = TrainingArguments(
@@ -605,11 +768,15 @@ class PersonalityTrainer:
         logger.info(f"Test results: {test_results}")
         
         # Save final model
-        self.save_model(trainer.model, trainer.tokenizer)
+        self.save_model(trainer.model, self.tokenizer)
         
         # Generate evaluation report
         self.generate_evaluation_report(trainer.model, test_dataset)
         
+        # Measure the student against its teacher: test error and CPU latency
+        if teacher is not None:
+            self.distillation_report = self.compare_with_teacher(teacher, trainer.model, test_dataset)
+        
         logger.info("Training completed successfully!")
         
         return trainer.model
@@ -657,6 +824,9 @@ class PersonalityTrainer:
         # Save tokenizer
         tokenizer.save_pretrained(model_path / "tokenizer")
         
+        # Save backbone architecture so loaders can rebuild it without the base checkpoint
+        model.bert.config.save_pretrained(model_path / "backbone")
+        
         # Save configuration
         config_dict = {}
         for key, value in self.config.__dict__.items():
@@ -671,34 +841,88 @@ class PersonalityTrainer:
         
         logger.info(f"Model saved to {model_path}")
     
-    def generate_evaluation_report(self, model, test_dataset):
-        """Generate comprehensive evaluation report"""
-        logger.info("Generating evaluation report...")
-        
-        # Set model to evaluation mode
+    def predict(self, model, dataset, device: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Predictions and labels of a model over a dataset"""
+        device = device or self.config.device
         model.eval()
-        
-        # Create data loader
-        test_loader = DataLoader(test_dataset, batch_size=self.config.batch_size, shuffle=False)
+        loader = DataLoader(dataset, batch_size=self.config.batch_size, shuffle=False)
         
         all_predictions = []
         all_labels = []
         
         with torch.no_grad():
-            for batch in test_loader:
-                input_ids = batch['input_ids'].to(self.config.device)
-                attention_mask = batch['attention_mask'].to(self.config.device)
-                labels = batch['labels'].to(self.config.device)
-                
-                outputs = model(input_ids=input_ids, attention_mask=attention_mask)
-                predictions = outputs['logits']
-                
-                all_predictions.append(predictions.cpu().numpy())
-                all_labels.append(labels.cpu().numpy())
+            for batch in loader:
+                outputs = model(
+                    input_ids=batch['input_ids'].to(device),
+                    attention_mask=batch['attention_mask'].to(device)
+                )
+                all_predictions.append(outputs['logits'].cpu().numpy())
+                all_labels.append(batch['labels'].cpu().numpy())
+        
+        return np.concatenate(all_predictions, axis=0), np.concatenate(all_labels, axis=0)
+    
+    def cpu_latency_ms(self, model, dataset) -> float:
+        """Median single-text CPU latency of a model, in milliseconds"""
+        model = copy.deepcopy(model).to("cpu").eval()
+        timings = []
+        with torch.no_grad():
+            for i in range(min(self.config.latency_samples, len(dataset))):
+                item = dataset[i]
+                input_ids = item['input_ids'].unsqueeze(0)
+                attention_mask = item['attention_mask'].unsqueeze(0)
+                start = time.perf_counter()
+                model(input_ids=input_ids, attention_mask=attention_mask)
+                timings.append((time.perf_counter() - start) * 1000)
+        return float(np.median(timings))
+    
+    def compare_with_teacher(self, teacher, student, test_dataset) -> Dict[str, Any]:
+        """
+        Compare the student with its teacher on the test set
+        
+        Reports both models' error against the true labels, how far the
+        student's predictions are from the teacher's, and median single-text
+        CPU latency, and saves the report to distillation_report.json.
+        """
+        logger.info("Comparing student with teacher...")
+        
+        teacher_predictions, labels = self.predict(teacher, test_dataset, device="cpu")
+        student_predictions, _ = self.predict(student, test_dataset)
+        teacher_metrics = self.compute_metrics((teacher_predictions, labels))
+        student_metrics = self.compute_metrics((student_predictions, labels))
+        
+        teacher_ms = self.cpu_latency_ms(teacher, test_dataset)
+        student_ms = self.cpu_latency_ms(student, test_dataset)
+        
+        report = {
+            'teacher_layers': teacher.bert.config.num_hidden_layers,
+            'student_layers': student.bert.config.num_hidden_layers,
+            'teacher_mae': float(teacher_metrics['overall_mae']),
+            'student_mae': float(student_metrics['overall_mae']),
+            'teacher_mse': float(teacher_metrics['overall_mse']),
+            'student_mse': float(student_metrics['overall_mse']),
+            'student_teacher_mae': float(mean_absolute_error(teacher_predictions.flatten(),
+                                                             student_predictions.flatten())),
+            'teacher_cpu_ms': teacher_ms,
+            'student_cpu_ms': student_ms,
+            'cpu_speedup': teacher_ms / student_ms,
+            'latency_samples': min(self.config.latency_samples, len(test_dataset)),
+            'max_length': self.config.max_length
+        }
         
-        # Concatenate all predictions and labels
-        all_predictions = np.concatenate(all_predictions, axis=0)
-        all_labels = np.concatenate(all_labels, axis=0)
+        report_path = Path(self.config.model_save_path) / "distillation_report.json"
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        
+        logger.info(f"Student MAE {report['student_mae']:.4f} vs teacher {report['teacher_mae']:.4f}; "
+                    f"CPU latency {student_ms:.1f} ms vs {teacher_ms:.1f} ms ({report['cpu_speedup']:.1f}x faster)")
+        logger.info(f"Distillation report saved to {report_path}")
+        return report
+    
+    def generate_evaluation_report(self, model, test_dataset):
+        """Generate comprehensive evaluation report"""
+        logger.info("Generating evaluation report...")
+        
+        all_predictions, all_labels = self.predict(model, test_dataset)
         
         # Create visualization
         self.create_evaluation_plots(all_predictions, all_labels)
@@ -792,6 +1016,16 @@ def main():
     parser.add_argument("--max_length", type=int, default=512,
                        help="Maximum sequence length")
     
+    # Distillation arguments
+    parser.add_argument("--distill", action="store_true",
+                       help="Train a small student from a trained teacher's outputs")
+    parser.add_argument("--teacher_path", type=str, default="models/",
+                       help="Directory of the trained teacher model")
+    parser.add_argument("--student_layers", type=int, default=4,
+                       help="Teacher encoder layers kept in the student (evenly spaced)")
+    parser.add_argument("--distillation_alpha", type=float, default=0.7,
+                       help="Weight of teacher soft targets vs. ground-truth labels")
+    
     # Output arguments
     parser.add_argument("--output_dir", type=str, default="models/",
                        help="Directory to save trained model")
@@ -810,6 +1044,10 @@ def main():
         learning_rate=args.learning_rate,
         num_epochs=args.epochs,
         max_length=args.max_length,
+        distillation=args.distill,
+        teacher_model_path=args.teacher_path,
+        student_num_layers=args.student_layers,
+        distillation_alpha=args.distillation_alpha,
         model_save_path=args.output_dir,
         logs_path=args.logs_dir,
     )
@@ -829,6 +1067,12 @@ def main():
         print(f"✅ Model saved to: {config.model_save_path}")
         print(f"✅ Logs saved to: {config.logs_path}")
         print(f"✅ Model architecture: {config.model_name} + {config.classification_head}")
+        if config.distillation:
+            report = trainer.distillation_report
+            print(f"✅ Distilled student: {report['student_layers']} of the teacher's {report['teacher_layers']} layers")
+            print(f"✅ Test MAE: student {report['student_mae']:.4f}, teacher {report['teacher_mae']:.4f}")
+            print(f"✅ CPU latency: student {report['student_cpu_ms']:.1f} ms, teacher {report['teacher_cpu_ms']:.1f} ms "
+                  f"({report['cpu_speedup']:.1f}x faster)")
         print(f"✅ Dataset: {config.dataset_name}")
         print("="*60)
         